@@ -0,0 +1,85 @@
+"""Microbenchmark: single-pass listing extractor vs. the per-pattern re.findall scans
+
+Usage:
+    python benchmarks/bench_listing_extractor.py
+    python benchmarks/bench_listing_extractor.py --rows 100 500 2000 --repeat 20
+"""
+import argparse
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ecourts_scraper import LISTING_PATTERNS, extract_listing_info
+
+
+def legacy_extract_listing_info(text_content):
+    """The original extraction: up to ten uncompiled re.findall scans"""
+    listing_info = {}
+    for field, patterns in LISTING_PATTERNS:
+        for pattern in patterns:
+            matches = re.findall(pattern, text_content, re.IGNORECASE)
+            if matches:
+                listing_info[field] = matches[0].strip() if field == "court" else matches[0]
+                break
+    return listing_info
+
+
+def build_history_text(rows, fallback=False):
+    """Lowercased text of a case history with the given number of hearing rows
+
+    With fallback=True the fields only match their lower-priority patterns,
+    which is the worst case for the per-pattern scans.
+    """
+    lines = [
+        "district and sessions bench, aurangabad" if fallback else "district and sessions court, aurangabad",
+        "case type regular civil suit",
+        "filing number 1519/2016",
+        "cnr number mhau030151912016",
+        "judge business on date hearing date purpose of hearing",
+    ]
+    for i in range(rows):
+        day = i % 28 + 1
+        month = i % 12 + 1
+        year = 2010 + i % 15
+        lines.append(
+            f"civil judge senior division {day:02d}-{month:02d}-{year} "
+            f"{day:02d}-{month:02d}-{year + 1} evidence"
+        )
+    # The interesting fields sit at the end, as they do on the portal
+    if fallback:
+        lines.append("listed on: 18-10-2026")
+        lines.append("sr no. 34")
+    else:
+        lines.append("next hearing date: 18-10-2026")
+        lines.append("before: 12-civil judge senior division")
+        lines.append("serial no. 34")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the listing_info extractor")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 100, 500, 2000],
+                        help="Hearing row counts to benchmark")
+    parser.add_argument("--repeat", type=int, default=50, help="Calls per measurement")
+    args = parser.parse_args()
+
+    print(f"{'case':>9} {'rows':>6} {'chars':>9} {'legacy ms':>10} {'single ms':>10} {'speedup':>8}")
+    for fallback in (False, True):
+        for rows in args.rows:
+            text = build_history_text(rows, fallback)
+            assert extract_listing_info(text) == legacy_extract_listing_info(text)
+
+            legacy = min(timeit.repeat(lambda: legacy_extract_listing_info(text), number=args.repeat, repeat=3))
+            single = min(timeit.repeat(lambda: extract_listing_info(text), number=args.repeat, repeat=3))
+            legacy_ms = legacy / args.repeat * 1000
+            single_ms = single / args.repeat * 1000
+            label = "fallback" if fallback else "first"
+            print(f"{label:>9} {rows:>6} {len(text):>9} {legacy_ms:>10.3f} {single_ms:>10.3f} "
+                  f"{legacy_ms / single_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""Offline benchmark suite: parsing, listing checks, PDFs, saving and full fetch cycles
+
+Every benchmark runs in a fresh process against the scaled corpus (see
+corpus.py), so its peak RSS is its own. Fetch cycles go through the local
+stand-in portal with a fixed CAPTCHA answer, so nothing touches the network.
+
+Usage:
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --sizes small large --repeat 10 --label after-change
+    python benchmarks/bench_suite.py --compare benchmarks/results/bench_before_20261017_120000.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import date, datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from corpus import SIZES, cause_list_args, write_corpus
+from ecourts_metrics import percentile
+
+try:
+    import resource
+except ImportError:       # Windows
+    resource = None
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+CHECK_DATE = date(2026, 10, 18)
+
+# Benchmark name -> what one operation processes (fetch_* go through the stand-in)
+BENCHMARKS = {
+    "parse_case_details": "case",
+    "check_case_listing": "case",
+    "create_case_pdf": "case",
+    "save_to_file": "case",
+    "parse_cause_list": "row",
+    "create_cause_list_pdf": "row",
+    "fetch_case": "case",
+    "fetch_cause_list": "row",
+}
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB (None where unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _setup(name, entry, corpus_dir, work_dir):
+    """Build the operation to time; returns (callable, items per operation, cleanup)"""
+    from ecourts_scraper import ECourtsScraper, save_to_file
+    from ecourts_causelist import iter_cause_list_rows
+    from ecourts_http import HTTPScraper
+
+    with open(entry["history"], encoding="utf-8") as f:
+        history_html = f.read()
+    with open(entry["cause_list"], encoding="utf-8") as f:
+        cause_list_html = f.read()
+    cnr = entry["cnr"]
+
+    # Parsing and PDF methods do not need a browser; the HTTP scraper is cheap to build
+    scraper = HTTPScraper(pdf_mode="none")
+    scraper.download_dir = work_dir
+    cleanup = scraper.close
+
+    if name == "parse_case_details":
+        return (lambda: scraper.parse_case_details(history_html, cnr)), 1, cleanup
+
+    if name in ("check_case_listing", "create_case_pdf", "save_to_file"):
+        case_data = scraper.parse_case_details(history_html, cnr)
+        if name == "check_case_listing":
+            return (lambda: ECourtsScraper.check_case_listing(case_data, CHECK_DATE)), 1, cleanup
+        if name == "create_case_pdf":
+            return (lambda: scraper.create_case_pdf(case_data)), 1, cleanup
+        json_path = os.path.join(work_dir, "case.json")
+        return (lambda: save_to_file(case_data, json_path)), 1, cleanup
+
+    rows = list(iter_cause_list_rows(cause_list_html))
+    if name == "parse_cause_list":
+        return (lambda: list(iter_cause_list_rows(cause_list_html))), len(rows), cleanup
+    if name == "create_cause_list_pdf":
+        cause_list_data = {"url": "http://127.0.0.1/", "content": cause_list_html}
+        return (lambda: scraper.create_cause_list_pdf(cause_list_data)), len(rows), cleanup
+
+    # Full fetch cycles through the stand-in portal
+    from ecourts_standin import start_standin_server, DEFAULT_CAPTCHA_ANSWER
+    from ecourts_captcha import CaptchaBroker, FixedSolver
+
+    server = start_standin_server(corpus_dir)
+    broker = CaptchaBroker([FixedSolver(DEFAULT_CAPTCHA_ANSWER)])
+    fetcher = HTTPScraper(base_url=server.base_url, pdf_mode="none", captcha_broker=broker)
+
+    def stop():
+        fetcher.close()
+        broker.close()
+        server.shutdown()
+        server.server_close()
+        scraper.close()
+
+    if name == "fetch_case":
+        return (lambda: fetcher.fetch_case_by_cnr(cnr)), 1, stop
+
+    state, district, court_complex, list_date = entry["cause_list_args"]
+
+    def fetch_cause_list():
+        html = fetcher.request_cause_list(
+            {"state_code": state, "dist_code": district, "court_complex_code": court_complex}, list_date
+        )
+        return list(iter_cause_list_rows(html or ""))
+    return fetch_cause_list, len(rows), stop
+
+
+def _run_benchmark(name, entry, corpus_dir, repeat):
+    """Child process: time `repeat` operations and report timings and memory"""
+    with tempfile.TemporaryDirectory() as work_dir:
+        # Keep the scraper's progress messages out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            operation, items, cleanup = _setup(name, entry, corpus_dir, work_dir)
+            rss_before = peak_rss_mb()
+            try:
+                operation()         # warm-up
+                timings = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    operation()
+                    timings.append(time.perf_counter() - started)
+            finally:
+                cleanup()
+    return {"timings": timings, "items": items, "rss_setup_mb": rss_before, "peak_rss_mb": peak_rss_mb()}
+
+
+def run_suite(sizes, names, repeat, corpus_dir):
+    """Run every benchmark on every corpus size; returns the result records"""
+    corpus = write_corpus(corpus_dir, sizes)
+    for size, entry in corpus.items():
+        entry["cause_list_args"] = cause_list_args(size)
+
+    context = multiprocessing.get_context("spawn")
+    results = []
+    for size in sizes:
+        for name in names:
+            with context.Pool(1) as pool:
+                raw = pool.apply(_run_benchmark, (name, corpus[size], corpus_dir, repeat))
+            timings = sorted(raw["timings"])
+            mean = sum(timings) / len(timings)
+            unit = BENCHMARKS[name]
+            record = {
+                "benchmark": name,
+                "size": size,
+                "repeat": repeat,
+                "unit": unit,
+                "items_per_op": raw["items"],
+                "mean_ms": round(mean * 1000, 3),
+                "p50_ms": round(percentile(timings, 0.5) * 1000, 3),
+                "p95_ms": round(percentile(timings, 0.95) * 1000, 3),
+                "ops_per_sec": round(1 / mean, 2) if mean else None,
+                f"{unit}s_per_sec": round(raw["items"] / mean, 2) if mean else None,
+                "rss_setup_mb": raw["rss_setup_mb"],
+                "peak_rss_mb": raw["peak_rss_mb"],
+            }
+            results.append(record)
+            rate = record[f"{unit}s_per_sec"]
+            print(f"{name:<22} {size:>7} {record['items_per_op']:>6} {record['mean_ms']:>10.2f} "
+                  f"{record['p95_ms']:>10.2f} {rate:>12.1f} {unit + 's/s':<7} {record['peak_rss_mb'] or 0:>8.1f}")
+    return results
+
+
+def compare(results, previous_path):
+    """Print throughput and peak RSS against an earlier results file"""
+    with open(previous_path, encoding="utf-8") as f:
+        previous = {(r["benchmark"], r["size"]): r for r in json.load(f)["results"]}
+
+    print(f"\nCompared with {previous_path}")
+    print(f"{'benchmark':<22} {'size':>7} {'speedup':>8} {'peak RSS MB':>18}")
+    for record in results:
+        old = previous.get((record["benchmark"], record["size"]))
+        if not old or not old.get("ops_per_sec"):
+            continue
+        speedup = record["ops_per_sec"] / old["ops_per_sec"]
+        rss = f"{old['peak_rss_mb']} -> {record['peak_rss_mb']}"
+        print(f"{record['benchmark']:<22} {record['size']:>7} {speedup:>7.2f}x {rss:>18}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the eCourts scraper")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES),
+                        help="Corpus sizes to run (default: all)")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), default=list(BENCHMARKS),
+                        help="Benchmarks to run (default: all)")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed operations per benchmark (default: 5)")
+    parser.add_argument("--label", default="run", help="Name for this run, e.g. a branch or version")
+    parser.add_argument("--output", help="Results JSON (default: benchmarks/results/bench_<label>_<time>.json)")
+    parser.add_argument("--corpus", help="Keep the generated corpus in this directory")
+    parser.add_argument("--compare", metavar="FILE", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    print(f"{'benchmark':<22} {'size':>7} {'items':>6} {'mean ms':>10} {'p95 ms':>10} {'rate':>12} "
+          f"{'':<7} {'peak MB':>8}")
+    started = datetime.now()
+    if args.corpus:
+        results = run_suite(args.sizes, args.only, args.repeat, args.corpus)
+    else:
+        with tempfile.TemporaryDirectory() as corpus_dir:
+            results = run_suite(args.sizes, args.only, args.repeat, corpus_dir)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"bench_{args.label}_{started.strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "label": args.label,
+            "started": started.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "results": results,
+        }, f, indent=4)
+    print(f"\n✓ Results saved to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Benchmark corpus: recorded portal pages scaled from small to very large
+
+The recorded fixtures in fixtures/ are the "small" entries. Larger entries
+keep the recorded page's markup and grow its hearing history / cause list
+rows, so the parsers see the same structure at every size. The corpus is
+written in the stand-in server's fixture layout (see ecourts_standin.py).
+"""
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ecourts_standin import DEFAULT_FIXTURES_DIR, cause_list_fixture_name
+
+RECORDED_CNR = "MHAU030151912016"
+RECORDED_CAUSE_LIST = ("MH", "Aurangabad", "District Court", "18-10-2026")
+
+# hearing rows per case history / rows per cause list, by corpus size
+SIZES = {
+    "small": {"hearings": None, "cause_list_rows": None},
+    "medium": {"hearings": 50, "cause_list_rows": 200},
+    "large": {"hearings": 300, "cause_list_rows": 2000},
+    "xlarge": {"hearings": 1000, "cause_list_rows": 6000},
+}
+
+HISTORY_TABLE_RE = re.compile(r'(<table class="history_table table">.*?</thead>\n)(.*?)(</table>)', re.S)
+CAUSE_TABLE_RE = re.compile(r'<h3>.*</table>', re.S)
+
+CASE_TYPES = ["R.C.S.", "R.C.A.", "S.C.C.", "M.A.", "CRI.M.A."]
+PURPOSES = ["Appearance", "Written Statement", "Evidence", "Arguments", "Judgment", "Steps"]
+
+
+def _read_fixture(*parts):
+    with open(os.path.join(DEFAULT_FIXTURES_DIR, *parts), encoding="utf-8") as f:
+        return f.read()
+
+
+def corpus_cnr(size):
+    """CNR used for the case history of a corpus size"""
+    if SIZES[size]["hearings"] is None:
+        return RECORDED_CNR
+    return f"MHAU03{list(SIZES).index(size):06d}2016"
+
+
+def build_history_html(hearings, cnr):
+    """The recorded #history_cnr page with `hearings` rows of hearing history"""
+    html = _read_fixture("cnr", f"{RECORDED_CNR}.html").replace(RECORDED_CNR, cnr)
+    rows = []
+    for i in range(hearings):
+        year = 2016 + i * 10 // max(hearings, 1)
+        business = f"{i % 28 + 1:02d}-{i % 12 + 1:02d}-{year}"
+        hearing = f"{(i + 7) % 28 + 1:02d}-{(i + 1) % 12 + 1:02d}-{year}"
+        rows.append(
+            f"<tr><td>Civil Judge Senior Division</td><td>{business}</td>"
+            f"<td>{hearing}</td><td>{PURPOSES[i % len(PURPOSES)]}</td></tr>\n"
+        )
+    # The recorded upcoming hearing stays last, as on the portal
+    rows.append("<tr><td>Civil Judge Senior Division</td><td>04-09-2026</td>"
+                "<td>18-10-2026</td><td>Evidence</td></tr>\n")
+    return HISTORY_TABLE_RE.sub(lambda m: m.group(1) + "".join(rows) + m.group(3), html, count=1)
+
+
+def build_cause_list_html(rows, courts=None):
+    """The recorded cause list page grown to `rows` cases spread over several courts"""
+    html = _read_fixture("cause_list", cause_list_fixture_name(*RECORDED_CAUSE_LIST))
+    courts = courts or max(1, rows // 60)
+    per_court = -(-rows // courts)
+    sections = []
+    serial = 0
+    for court in range(courts):
+        lines = [
+            f"<h3>In The Court Of : {court + 1}-Civil Judge Senior Division, Aurangabad</h3>",
+            f'<table id="dispTable{court}" class="table">',
+            "<thead><tr><th>Sr No</th><th>Cases</th><th>Party Name</th><th>Advocate</th></tr></thead>",
+            "<tbody>",
+        ]
+        for i in range(min(per_court, rows - serial)):
+            if i % 20 == 0:
+                lines.append(f'<tr><td colspan="4">Civil Cases - {PURPOSES[i // 20 % len(PURPOSES)]}</td></tr>')
+            number = serial + 1
+            year = 2010 + number % 15
+            case_type = CASE_TYPES[number % len(CASE_TYPES)]
+            cnr = f"MHAU03{number:06d}{year}"
+            lines.append(
+                f"<tr><td>{i + 1}</td><td>{case_type}/{number:04d}/{year}<br>"
+                f"<a href=\"#\" onclick=\"viewHistory('{cnr}','3','{court + 1}')\">View</a></td>"
+                f"<td>Petitioner {number} versus Respondent {number}</td><td>Advocate {number % 97}</td></tr>"
+            )
+            serial += 1
+        lines.append("</tbody>\n</table>")
+        sections.append("\n".join(lines))
+    return CAUSE_TABLE_RE.sub(lambda m: "\n".join(sections), html, count=1)
+
+
+def cause_list_args(size):
+    """(state, district, court_complex, date) of a corpus size's cause list"""
+    if SIZES[size]["cause_list_rows"] is None:
+        return RECORDED_CAUSE_LIST
+    return ("MH", "Aurangabad", f"Bench Complex {size}", "18-10-2026")
+
+
+def write_corpus(directory, sizes=SIZES):
+    """Write every size in the stand-in fixture layout; returns {size: {...paths}}"""
+    for sub in ("cnr", "case", "cause_list"):
+        os.makedirs(os.path.join(directory, sub), exist_ok=True)
+
+    corpus = {}
+    for size in sizes:
+        spec = SIZES[size]
+        cnr = corpus_cnr(size)
+        if spec["hearings"] is None:
+            history = _read_fixture("cnr", f"{RECORDED_CNR}.html")
+            cause_list = _read_fixture("cause_list", cause_list_fixture_name(*RECORDED_CAUSE_LIST))
+        else:
+            history = build_history_html(spec["hearings"], cnr)
+            cause_list = build_cause_list_html(spec["cause_list_rows"])
+
+        history_path = os.path.join(directory, "cnr", f"{cnr}.html")
+        cause_list_path = os.path.join(directory, "cause_list", cause_list_fixture_name(*cause_list_args(size)))
+        for path, html in ((history_path, history), (cause_list_path, cause_list)):
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+        corpus[size] = {"cnr": cnr, "history": history_path, "cause_list": cause_list_path}
+    return corpus
@@ -0,0 +1,431 @@
+"""Batch CNR lookups spread over a pool of parallel ChromeDriver sessions"""
+import multiprocessing
+from multiprocessing import util
+import threading
+import itertools
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from functools import partial
+
+from ecourts_scraper import ECourtsScraper, create_scraper, save_case, save_to_file
+from ecourts_index import DateIndex
+from ecourts_captcha import BrokerClient, CaptchaBroker, relay_requests
+from ecourts_metrics import METRICS
+from ecourts_record import CaseRecord
+from ecourts_journal import JobJournal
+from ecourts_supervisor import SupervisedScraper, DEFAULT_MEMORY_LIMIT
+
+# Per-worker state (each pool process owns exactly one supervised browser session)
+_scraper = None
+_recycle_after = 25
+_memory_limit = DEFAULT_MEMORY_LIMIT
+_headless = False
+_profile = "standard"
+_engine = "browser"
+_base_url = None
+_captcha_client = None
+_spool_dir = None
+_journal = None
+
+
+def read_cnrs(source):
+    """Read CNR numbers from a file, or from stdin when source is '-'"""
+    if source == "-":
+        lines = sys.stdin.read().splitlines()
+        # CAPTCHA answers still have to come from the operator's console
+        _reopen_console()
+    else:
+        with open(source, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+
+    cnrs = []
+    seen = set()
+    for line in lines:
+        # Allow comments and blank lines in watch files
+        cnr = line.split("#", 1)[0].strip().upper()
+        if cnr and cnr not in seen:
+            seen.add(cnr)
+            cnrs.append(cnr)
+    return cnrs
+
+
+def _reopen_console():
+    """Point stdin back at the terminal after the CNR list was piped in"""
+    console = "CON" if os.name == "nt" else "/dev/tty"
+    try:
+        sys.stdin = open(console, encoding="utf-8")
+    except OSError:
+        print("Warning: no console available, CAPTCHA prompts will fail")
+
+
+def _init_worker(engine, base_url, headless, profile, captcha_requests, captcha_answers, spool_dir=None,
+                 journal_ref=None, recycle_after=25, memory_limit=DEFAULT_MEMORY_LIMIT):
+    """Pool initializer: remember the engine settings and shared CAPTCHA channels"""
+    global _engine, _base_url, _headless, _profile, _captcha_client, _spool_dir, _journal
+    global _recycle_after, _memory_limit
+    _engine = engine
+    _recycle_after = recycle_after
+    _memory_limit = memory_limit
+    _base_url = base_url
+    _headless = headless
+    _profile = profile
+    _spool_dir = spool_dir
+    if journal_ref:
+        # Own connection to the run's journal: cases are marked in flight as they start
+        path, run_id, max_attempts = journal_ref
+        _journal = JobJournal(path).attach(run_id, max_attempts)
+    # CAPTCHAs go to the broker in the parent process, labelled with this worker
+    _captcha_client = BrokerClient(captcha_requests, captcha_answers, f" (worker {os.getpid()})")
+    # Start from zero: a forked worker inherits the parent's samples
+    METRICS.reset()
+
+    # Quit Chrome when the pool shuts this worker down
+    util.Finalize(None, _close_worker_scraper, exitpriority=10)
+
+
+def _close_worker_scraper():
+    """Close this worker's browser session"""
+    global _scraper
+    if _scraper is not None:
+        _scraper.close()
+        _scraper = None
+
+
+def _fetch_one(cnr):
+    """Fetch a single CNR in a worker process"""
+    global _scraper
+    started = time.time()
+    if _journal is not None:
+        _journal.start(cnr)
+    try:
+        if _scraper is None:
+            # PDFs are rendered by the parent's PDF pool, never in the browser worker.
+            # The supervisor restarts the session by count, memory use or WebDriver failure
+            _scraper = SupervisedScraper(
+                partial(create_scraper, _engine, headless=_headless, captcha_broker=_captcha_client,
+                        base_url=_base_url, pdf_mode="none", profile=_profile),
+                recycle_after=_recycle_after, memory_limit=_memory_limit, label=f" (worker {os.getpid()})"
+            )
+        case_data = _scraper.fetch_case_by_cnr(cnr)
+        if case_data and _spool_dir and isinstance(case_data, CaseRecord):
+            # Only the path travels back to the parent; the HTML is read when saved
+            case_data.spill_html(_spool_dir)
+        if not case_data and _journal is not None:
+            _journal.fail(cnr, "no case details returned")
+    except Exception as e:
+        print(f"Worker error for {cnr}: {str(e)}")
+        METRICS.count("worker_errors")
+        if _journal is not None:
+            _journal.fail(cnr, f"worker error: {str(e)}")
+        # Drop the session so the next case starts a fresh browser
+        _close_worker_scraper()
+        case_data = None
+    # Stage timings travel back with the result and are merged by the parent
+    return cnr, case_data, time.time() - started, METRICS.drain()
+
+
+def iter_batch(cnrs, workers=None, recycle_after=25, headless=False, engine="browser", base_url=None,
+               captcha_broker=None, profile="standard", spool_dir=None, journal=None,
+               memory_limit=DEFAULT_MEMORY_LIMIT):
+    """Yield (cnr, case_data, seconds) tuples as each case finishes
+
+    CAPTCHAs from every worker are answered through captcha_broker (a
+    console operator queue by default). With spool_dir the workers write
+    each case's raw HTML there and send back only the parsed record. With
+    a journal run the workers mark each case in flight, or failed, there.
+    Each worker's session is restarted after recycle_after cases, once its
+    browser uses more than memory_limit MB, or when it breaks (the case is
+    then fetched again on the new session).
+    """
+    if not workers:
+        workers = min(4, os.cpu_count() or 1)
+    workers = max(1, min(workers, len(cnrs)))
+
+    with multiprocessing.Manager() as manager:
+        captcha_requests = manager.Queue()
+        captcha_answers = manager.dict()
+
+        own_broker = captcha_broker is None
+        if own_broker:
+            captcha_broker = CaptchaBroker()
+        stop_event = threading.Event()
+        relay = threading.Thread(
+            target=relay_requests,
+            args=(captcha_broker, captcha_requests, captcha_answers, stop_event),
+            daemon=True
+        )
+        relay.start()
+
+        pool = multiprocessing.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(engine, base_url, headless, profile, captcha_requests, captcha_answers, spool_dir,
+                      journal.ref if journal is not None else None, recycle_after, memory_limit)
+        )
+        try:
+            for cnr, case_data, elapsed, samples in pool.imap_unordered(_fetch_one, cnrs):
+                METRICS.merge(samples)
+                METRICS.observe("lookup", elapsed)
+                yield cnr, case_data, elapsed
+            pool.close()
+        except BaseException:
+            pool.terminate()
+            raise
+        finally:
+            pool.join()
+            stop_event.set()
+            relay.join(timeout=1)
+            if own_broker:
+                captcha_broker.close()
+
+
+class BatchLog:
+    """Finished batch entries: kept for the result JSON, or streamed out as JSON lines"""
+
+    def __init__(self, stream_path=None):
+        self.stream_path = stream_path
+        self.entries = None if stream_path else []
+        self.file = open(stream_path, "w", encoding="utf-8") if stream_path else None
+        self.fetched = 0
+
+    def add(self, entry):
+        if entry["fetched"]:
+            self.fetched += 1
+        if self.file is None:
+            self.entries.append(entry)
+        else:
+            self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def _save_case(entry, case_data, output_dir, date_index, store=None, log=None, journal=None,
+               changes=None, change=None):
+    """Save one case (JSON file or result store), index its hearing dates and record where it went
+
+    With a change tracker, a case unchanged since its last saved snapshot
+    keeps that snapshot: nothing is written or indexed again.
+    """
+    if changes is not None and changes.unchanged(change):
+        location = change.location
+        entry["unchanged"] = True
+        if change.pdf_path:
+            case_data["pdf_path"] = change.pdf_path
+    else:
+        location = save_case(case_data, output_dir, store)
+        date_index.add_case(case_data, location)
+    if changes is not None:
+        delta = changes.record(case_data, location, change)
+        if delta is not None:
+            entry["changed"] = sorted(delta.get("changed", ())) if delta["status"] == "changed" else "new"
+    if journal is not None:
+        # Done only once saved: a crash before this point fetches the case again
+        journal.finish(entry["cnr_number"], location)
+    entry["json_path" if store is None else "stored_as"] = location
+    entry["pdf_path"] = case_data.get("pdf_path")
+    if log is not None:
+        log.add(entry)
+        if log.stream_path and isinstance(case_data, CaseRecord):
+            # Saved: nothing of this case needs to stay around
+            case_data.drop_html(remove_spool=True)
+
+
+def _finish_pdf(entry, case_data, future, change, output_dir, date_index, store=None, log=None, journal=None,
+                changes=None):
+    """Record a rendered PDF and save the case JSON"""
+    pdf_path = future.result()
+    case_data["pdf_created"] = bool(pdf_path)
+    if pdf_path:
+        case_data["pdf_path"] = pdf_path
+    _save_case(entry, case_data, output_dir, date_index, store, log, journal, changes, change)
+
+
+def _retry_failed(journal, fetch):
+    """Further passes over the cases that failed, while they have attempts left"""
+    while True:
+        retry = journal.retryable()
+        if not retry:
+            return
+        print(f"\nRetrying {len(retry)} failed cases")
+        METRICS.count("retries", len(retry))
+        yield from fetch(retry)
+
+
+def run_batch(cnrs, workers=None, recycle_after=25, check_date=None, date_label="",
+              output_dir=".", headless=False, engine="browser", base_url=None,
+              cache=None, max_age=None, refresh=False, pdf_mode="inline", pdf_workers=None,
+              captcha_broker=None, profile="standard", store=None, stream=False, journal=None,
+              memory_limit=DEFAULT_MEMORY_LIMIT, changes=None):
+    """Run a batch of CNR lookups and save each result as it arrives
+
+    With pdf_mode "inline" the PDFs are rendered by a separate process pool
+    while the browser sessions move on to the next case. With a result
+    store each case becomes a deduplicated snapshot instead of a JSON file.
+    With stream, nothing per case is kept once it is saved: the per-case
+    entries go to a JSON lines file and the HTML travels through a spool
+    directory, so memory stays flat however long the batch is.
+    With a journal run (ecourts_journal) cases finished before a crash are
+    skipped and failed ones get further passes up to its attempt limit.
+    With a change tracker (ecourts_changes) cases unchanged since the last
+    run skip the PDF and the save, and changed ones get a delta record.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    started_label = datetime.now().strftime('%Y%m%d_%H%M%S')
+
+    if journal is not None:
+        remaining = journal.todo()
+        if journal.resumed:
+            print(f"✓ Resuming interrupted batch: {len(cnrs) - len(remaining)} of {len(cnrs)} cases already done")
+        cnrs = remaining
+
+    # Answer fresh cases from the cache (loaded one at a time); only the rest go to the browser pool
+    cached = set()
+    if cache is not None and not refresh:
+        cached = cache.fresh_keys(cnrs, max_age)
+    to_fetch = [cnr for cnr in cnrs if cnr not in cached]
+
+    print("\n" + "="*60)
+    print(f"BATCH MODE - {len(cnrs)} cases ({len(cached)} from cache)")
+    print("="*60)
+
+    pdf_pool = None
+    if pdf_mode == "inline" and to_fetch:
+        from ecourts_pdf import PDFRenderPool
+        pdf_pool = PDFRenderPool(pdf_workers)
+    # At most this many parsed cases wait for their PDFs at any time
+    max_pending = pdf_pool.workers * 2 if pdf_pool else 0
+    date_index = DateIndex()
+    pending_pdfs = []
+
+    spool_dir = os.path.join(output_dir, ".html_spool") if stream else None
+    log = BatchLog(os.path.join(output_dir, f"batch_result_{started_label}.jsonl") if stream else None)
+
+    batch_started = time.time()
+    done = 0
+    seen = set()
+    def fetch(keys):
+        return iter_batch(keys, workers, recycle_after, headless, engine, base_url, captcha_broker,
+                          profile, spool_dir, journal, memory_limit)
+
+    results = ((cnr, cache.get(cnr, max_age), 0.0) for cnr in cnrs if cnr in cached)
+    if to_fetch:
+        results = itertools.chain(results, fetch(to_fetch))
+        if journal is not None:
+            results = itertools.chain(results, _retry_failed(journal, fetch))
+
+    try:
+        for cnr, case_data, elapsed in results:
+            # Later passes over failed cases are shown as retries, not counted again
+            retry = cnr in seen
+            if not retry:
+                seen.add(cnr)
+                done += 1
+            from_cache = cnr in cached
+            entry = {"cnr_number": cnr, "seconds": round(elapsed, 2), "fetched": case_data is not None,
+                     "cached": from_cache}
+
+            if case_data:
+                if check_date:
+                    is_listed = ECourtsScraper.check_case_listing(case_data, check_date)
+                    listing_info = case_data.get("listing_info", {})
+                    entry["listed"] = is_listed
+                    entry["serial_number"] = listing_info.get("serial_number")
+                    entry["court"] = listing_info.get("court")
+                    entry["next_hearing_date"] = listing_info.get("next_hearing_date")
+
+                if cache is not None and not from_cache:
+                    cache.put(cnr, case_data)
+
+                change = changes.check(case_data, store) if changes is not None else None
+                if from_cache or (change is not None and changes.unchanged(change)):
+                    _save_case(entry, case_data, output_dir, date_index, store, log, journal, changes, change)
+                elif pdf_pool:
+                    if stream and isinstance(case_data, CaseRecord):
+                        # The PDF does not need the HTML; keep it on disk until the case is saved
+                        case_data.spill_html(spool_dir)
+                    # Saved once its PDF is ready
+                    pending_pdfs.append((entry, case_data, pdf_pool.submit(case_data), change))
+                else:
+                    if pdf_mode == "later":
+                        case_data["pdf_pending"] = True
+                    _save_case(entry, case_data, output_dir, date_index, store, log, journal, changes, change)
+
+                status = "✓ (cached)" if from_cache else "✓"
+                if change is not None and not from_cache:
+                    status += " unchanged" if changes.unchanged(change) else f" {change.status}"
+                if check_date:
+                    status += " LISTED" if entry["listed"] else " not listed"
+                    status += f" {date_label}"
+            else:
+                status = "✗ failed"
+                # A case with attempts left is logged by the retry pass, so each CNR gets one final entry
+                if journal is None or journal.attempts(cnr) >= journal.max_attempts:
+                    log.add(entry)
+                else:
+                    status += " (will retry)"
+
+            progress = "retry" if retry else f"{done}/{len(cnrs)}"
+            print(f"[{progress}] {cnr}: {status} ({elapsed:.1f}s)")
+            # Let go of this case before waiting for the next one
+            case_data = None
+
+            # Save cases whose PDFs have finished in the meantime
+            still_pending = []
+            for item in pending_pdfs:
+                if item[2].done():
+                    _finish_pdf(*item, output_dir, date_index, store, log, journal, changes)
+                else:
+                    still_pending.append(item)
+            pending_pdfs = still_pending
+            # Fetching faster than rendering: wait for the oldest PDF
+            while max_pending and len(pending_pdfs) > max_pending:
+                _finish_pdf(*pending_pdfs.pop(0), output_dir, date_index, store, log, journal, changes)
+
+        for entry, case_data, future, change in pending_pdfs:
+            _finish_pdf(entry, case_data, future, change, output_dir, date_index, store, log, journal, changes)
+    finally:
+        if pdf_pool:
+            pdf_pool.shutdown()
+        date_index.close()
+        log.close()
+        if spool_dir and os.path.isdir(spool_dir) and not os.listdir(spool_dir):
+            os.rmdir(spool_dir)
+
+    total = time.time() - batch_started
+    fetched = log.fetched
+    result = {
+        "started": datetime.fromtimestamp(batch_started).isoformat(),
+        "seconds": round(total, 2),
+        "check_date": str(check_date) if check_date else None,
+        "total": len(cnrs),
+        "fetched": fetched,
+        "failed": len(cnrs) - fetched,
+        "metrics": METRICS.summary(),
+    }
+    if journal is not None:
+        result["journal"] = dict(journal.counts(), run_id=journal.run_id)
+    if changes is not None:
+        result["changes"] = dict(changes.counts, deltas_file=changes.deltas_path)
+    if stream:
+        result["cases_file"] = log.stream_path
+    else:
+        result["cases"] = log.entries
+
+    filename = os.path.join(output_dir, f"batch_result_{started_label}.json")
+    save_to_file(result, filename)
+    print(f"✓ Batch finished: {fetched}/{len(cnrs)} cases in {total:.1f}s")
+    if journal is not None:
+        print(journal.format_summary())
+    if changes is not None:
+        print(changes.format_summary())
+    if captcha_broker is not None:
+        print(captcha_broker.format_summary())
+    if cache is not None:
+        cache.close()
+    return result
@@ -0,0 +1,209 @@
+"""Persistent on-disk cache of parsed case data, keyed by CNR"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from ecourts_metrics import METRICS
+from ecourts_record import CaseRecord
+
+DEFAULT_CACHE_PATH = os.path.join("downloads", "case_cache.db")
+DEFAULT_TTL = 6 * 3600              # seconds a cached case stays fresh
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    key TEXT PRIMARY KEY,
+    cnr_number TEXT,
+    case_json TEXT NOT NULL,
+    history_html TEXT,
+    fetched_at REAL NOT NULL,
+    accessed_at REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_cases_accessed ON cases (accessed_at);
+CREATE INDEX IF NOT EXISTS idx_cases_cnr ON cases (cnr_number);
+"""
+
+
+def details_key(case_type, case_number, case_year):
+    """Cache key for a case looked up by type/number/year"""
+    return f"{case_type.upper()}/{case_number}/{case_year}"
+
+
+class CaseCache:
+    """SQLite-backed case cache with a TTL and LRU/size-based eviction"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL,
+                 max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def get(self, key, max_age=None):
+        """Return cached case data for key if younger than max_age (default: TTL)"""
+        max_age = self.ttl if max_age is None else max_age
+        now = time.time()
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT case_json, history_html, fetched_at FROM cases WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                METRICS.count("cache_misses")
+                return None
+            case_json, history_html, fetched_at = row
+            if now - fetched_at > max_age:
+                METRICS.count("cache_misses")
+                return None
+            self.conn.execute("UPDATE cases SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+
+        case_data = CaseRecord.from_dict(json.loads(case_json))
+        if history_html is not None:
+            case_data["raw_html"] = history_html
+        case_data["cached_at"] = fetched_at
+        METRICS.count("cache_hits")
+        return case_data
+
+    def fresh_keys(self, keys, max_age=None):
+        """Subset of keys with an entry younger than max_age, without loading any case data"""
+        max_age = self.ttl if max_age is None else max_age
+        cutoff = time.time() - max_age
+        keys = list(keys)
+        fresh = set()
+        with self._lock:
+            # Stay well under SQLite's bound parameter limit
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT key FROM cases WHERE fetched_at >= ? AND key IN ({','.join('?' * len(chunk))})",
+                    [cutoff] + chunk
+                )
+                fresh.update(row[0] for row in rows)
+        return fresh
+
+    def put(self, key, case_data):
+        """Store parsed case data and its #history_cnr HTML"""
+        if not case_data:
+            return
+        # plain_text is derived from the HTML again on the way out
+        record = {k: case_data[k] for k in case_data.keys() if k not in ("raw_html", "plain_text", "cached_at")}
+        case_json = json.dumps(record, ensure_ascii=False)
+        history_html = case_data.get("raw_html")
+        size = len(case_json) + len(history_html or "")
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cases "
+                "(key, cnr_number, case_json, history_html, fetched_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, case_data.get("cnr_number"), case_json, history_html, now, now, size)
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self):
+        """Drop least recently used entries beyond the count and size limits"""
+        count, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cases").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+
+        doomed = []
+        for key, size in self.conn.execute("SELECT key, size FROM cases ORDER BY accessed_at"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        self.conn.executemany("DELETE FROM cases WHERE key = ?", doomed)
+
+    def invalidate(self, key):
+        """Forget one cached case"""
+        with self._lock:
+            self.conn.execute("DELETE FROM cases WHERE key = ?", (key,))
+            self.conn.commit()
+
+    def purge_expired(self):
+        """Delete every entry older than the TTL; returns how many were removed"""
+        with self._lock:
+            cursor = self.conn.execute("DELETE FROM cases WHERE fetched_at < ?", (time.time() - self.ttl,))
+            self.conn.commit()
+            return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class CachedFetcher:
+    """Answers case lookups from the cache and only starts a scraper on a miss"""
+
+    def __init__(self, scraper_factory, cache=None, max_age=None, refresh=False):
+        self.scraper_factory = scraper_factory
+        self.cache = cache
+        self.max_age = max_age
+        self.refresh = refresh
+        self.scraper = None
+
+    def _get_scraper(self):
+        if self.scraper is None:
+            self.scraper = self.scraper_factory()
+        return self.scraper
+
+    def session(self, fallback_factory=None):
+        """The portal session lookups ran on
+
+        After a cache hit no session is open yet; fallback_factory (e.g. a
+        browserless HTTP session) is then started instead of the usual one.
+        """
+        if self.scraper is None and fallback_factory is not None:
+            self.scraper = fallback_factory()
+        return self._get_scraper()
+
+    def _lookup(self, key):
+        if self.cache is None or self.refresh:
+            return None
+        case_data = self.cache.get(key, self.max_age)
+        if case_data:
+            age = (time.time() - case_data["cached_at"]) / 60
+            print(f"✓ Using cached case data for {key} (fetched {age:.0f} min ago)")
+        return case_data
+
+    def _store(self, key, case_data):
+        if self.cache is not None and case_data:
+            self.cache.put(key, case_data)
+
+    def fetch_case_by_cnr(self, cnr_full):
+        """Fetch case details using CNR number, from the cache when fresh"""
+        case_data = self._lookup(cnr_full)
+        if case_data is None:
+            case_data = self._get_scraper().fetch_case_by_cnr(cnr_full)
+            self._store(cnr_full, case_data)
+        return case_data
+
+    def fetch_case_by_details(self, case_type, case_number, case_year):
+        """Fetch case details using case type, number, and year, from the cache when fresh"""
+        key = details_key(case_type, case_number, case_year)
+        case_data = self._lookup(key)
+        if case_data is None:
+            case_data = self._get_scraper().fetch_case_by_details(case_type, case_number, case_year)
+            self._store(key, case_data)
+        return case_data
+
+    def close(self):
+        if self.scraper is not None:
+            self.scraper.close()
+        if self.cache is not None:
+            self.cache.close()
@@ -0,0 +1,474 @@
+"""CAPTCHA broker: one operator (or an offline solver) answers CAPTCHAs for many sessions
+
+Sessions submit their CAPTCHA image as soon as it has loaded and carry on
+filling the search form; the answer is only collected right before the form
+is submitted. Challenges are answered first by any offline solvers, then by
+the operator queue (console or a local web page). A rejected answer is
+resubmitted with a fresh image at the front of the queue.
+"""
+import base64
+import collections
+import html
+import importlib
+import os
+import queue
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+CAPTCHA_QUEUE_DIR = os.path.join("downloads", "captcha_queue")
+DEFAULT_WEB_PORT = 8090
+
+
+class CaptchaTimeout(Exception):
+    """No answer to a CAPTCHA arrived within the session's captcha_timeout"""
+
+
+class CaptchaChallenge:
+    """One CAPTCHA image waiting for its text"""
+
+    def __init__(self, image, label="", attempt=1, skip_solvers=()):
+        self.token = uuid.uuid4().hex
+        self.image = image
+        self.label = label
+        self.attempt = attempt
+        # Offline solvers that already got this session's CAPTCHA wrong
+        self.skip_solvers = set(skip_solvers)
+        self.created = time.time()
+
+
+class CaptchaTicket:
+    """Handle a session holds while its CAPTCHA is being answered"""
+
+    def __init__(self, challenge):
+        self.challenge = challenge
+        self.answer = None
+        self.solver = None
+        self.answered_at = None
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def token(self):
+        return self.challenge.token
+
+    def done(self):
+        return self._event.is_set()
+
+    def set_answer(self, answer, solver):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self.answer = answer
+            self.solver = solver
+            self.answered_at = time.time()
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def add_done_callback(self, callback):
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def result(self, timeout=None):
+        """Block until the answer arrives; None on timeout"""
+        self._event.wait(timeout)
+        return self.answer
+
+
+class PromptTicket:
+    """Ticket for sessions without a broker: asks the prompt when the answer is needed"""
+
+    def __init__(self, prompt):
+        self.prompt = prompt
+        self.solver = "prompt"
+
+    def done(self):
+        return False
+
+    def result(self, timeout=None):
+        return self.prompt()
+
+
+# -- Offline solvers -------------------------------------------------------
+
+class CaptchaSolver:
+    """Offline solver interface: return the CAPTCHA text, or None to pass it on"""
+    name = "solver"
+
+    def solve(self, challenge):
+        raise NotImplementedError
+
+
+class FixedSolver(CaptchaSolver):
+    """Always answers the same text (e.g. the local stand-in portal's CAPTCHA)"""
+    name = "fixed"
+
+    def __init__(self, answer):
+        self.answer = answer
+
+    def solve(self, challenge):
+        return self.answer
+
+
+def load_solver(spec):
+    """Solver from a command line spec: 'fixed:TEXT' or 'package.module:ClassName'"""
+    name, _, arg = spec.partition(":")
+    if name == "fixed":
+        return FixedSolver(arg)
+    if not arg:
+        raise ValueError(f"Unknown CAPTCHA solver '{spec}' (use fixed:TEXT or module:ClassName)")
+    solver = getattr(importlib.import_module(name), arg)()
+    if not hasattr(solver, "solve"):
+        raise ValueError(f"{spec} has no solve(challenge) method")
+    return solver
+
+
+# -- Broker ------------------------------------------------------------------
+
+class CaptchaBroker:
+    """Queue of CAPTCHA challenges from many sessions, answered one at a time"""
+
+    def __init__(self, solvers=(), operator=None):
+        self.solvers = list(solvers)
+        self._queue = collections.deque()
+        self._cond = threading.Condition()
+        self._tickets = {}
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="captcha") if self.solvers else None
+        self.stats = collections.Counter()
+        self.wait_seconds = []
+        self.started = time.time()
+        self.operator = operator if operator is not None else ConsoleOperator()
+        self.operator.attach(self)
+
+    def submit(self, image, label="", retry_of=None):
+        """Queue a CAPTCHA image; returns a CaptchaTicket
+
+        retry_of is the ticket whose answer the portal rejected: the new
+        challenge skips the solver that got it wrong and jumps the queue.
+        """
+        if retry_of is not None and getattr(retry_of, "challenge", None) is not None:
+            previous = retry_of.challenge
+            challenge = CaptchaChallenge(image, label, previous.attempt + 1, previous.skip_solvers)
+            if retry_of.solver:
+                challenge.skip_solvers.add(retry_of.solver)
+            self.stats["rejected"] += 1
+        else:
+            challenge = CaptchaChallenge(image, label)
+
+        ticket = CaptchaTicket(challenge)
+        ticket.add_done_callback(self._record)
+        with self._cond:
+            self._tickets[ticket.token] = ticket
+
+        solvers = [s for s in self.solvers if s.name not in challenge.skip_solvers]
+        if solvers:
+            self._executor.submit(self._solve_offline, ticket, solvers)
+        else:
+            self._enqueue(ticket, front=challenge.attempt > 1)
+        return ticket
+
+    def _solve_offline(self, ticket, solvers):
+        for solver in solvers:
+            try:
+                answer = solver.solve(ticket.challenge)
+            except Exception as e:
+                print(f"CAPTCHA solver {solver.name} failed: {str(e)}")
+                continue
+            if answer:
+                ticket.set_answer(answer, solver.name)
+                return
+        self._enqueue(ticket, front=ticket.challenge.attempt > 1)
+
+    def _enqueue(self, ticket, front=False):
+        with self._cond:
+            if front:
+                self._queue.appendleft(ticket)
+            else:
+                self._queue.append(ticket)
+            self._cond.notify_all()
+
+    def _record(self, ticket):
+        with self._cond:
+            self._tickets.pop(ticket.token, None)
+            try:
+                self._queue.remove(ticket)
+            except ValueError:
+                pass
+        self.stats["answered"] += 1
+        self.stats[f"by_{ticket.solver}"] += 1
+        self.wait_seconds.append(ticket.answered_at - ticket.challenge.created)
+
+    def next_ticket(self, timeout=None):
+        """Take the challenge at the front of the operator queue (None on timeout)"""
+        with self._cond:
+            if not self._queue:
+                self._cond.wait(timeout)
+            if not self._queue:
+                return None
+            return self._queue.popleft()
+
+    def cancel(self, ticket):
+        """Withdraw a challenge its session stopped waiting for"""
+        with self._cond:
+            self._tickets.pop(ticket.token, None)
+            try:
+                self._queue.remove(ticket)
+            except ValueError:
+                pass
+        self.stats["timed_out"] += 1
+
+    def pending(self):
+        """Challenges waiting for the operator, front of the queue first"""
+        with self._cond:
+            return list(self._queue)
+
+    def answer(self, token, text, solver="operator"):
+        """Answer a queued challenge by token; False if it is no longer waiting"""
+        with self._cond:
+            ticket = self._tickets.get(token)
+        if ticket is None:
+            return False
+        ticket.set_answer(text, solver)
+        return True
+
+    def summary(self):
+        """Answer counts and how long sessions waited for them"""
+        minutes = max((time.time() - self.started) / 60, 1e-9)
+        waits = self.wait_seconds
+        return {
+            "answered": self.stats["answered"],
+            "rejected": self.stats["rejected"],
+            "by_solver": {key[3:]: count for key, count in self.stats.items() if key.startswith("by_")},
+            "mean_wait_seconds": round(sum(waits) / len(waits), 2) if waits else None,
+            "answers_per_minute": round(self.stats["answered"] / minutes, 2),
+        }
+
+    def format_summary(self):
+        summary = self.summary()
+        solvers = ", ".join(f"{name} {count}" for name, count in summary["by_solver"].items()) or "none"
+        wait = summary["mean_wait_seconds"]
+        return (f"CAPTCHAs: {summary['answered']} answered ({solvers}), {summary['rejected']} rejected, "
+                f"mean wait {wait if wait is not None else 0:.1f}s, {summary['answers_per_minute']}/min")
+
+    def close(self):
+        self.operator.close()
+        if self._executor:
+            self._executor.shutdown(wait=False)
+
+
+def save_challenge_image(challenge, directory=CAPTCHA_QUEUE_DIR):
+    """Write a challenge's image to disk and return its path (None without an image)"""
+    if not challenge.image:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{challenge.token}.png")
+    with open(path, "wb") as f:
+        f.write(challenge.image)
+    return path
+
+
+# -- Operators ---------------------------------------------------------------
+
+class ConsoleOperator:
+    """Asks the operator on the console, one challenge at a time, retries first"""
+
+    def __init__(self):
+        self.broker = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def attach(self, broker):
+        self.broker = broker
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            ticket = self.broker.next_ticket(timeout=0.5)
+            if ticket is None:
+                continue
+            challenge = ticket.challenge
+            image_path = save_challenge_image(challenge)
+            waiting = len(self.broker.pending())
+            if image_path:
+                print(f"CAPTCHA image saved to: {image_path}")
+            if waiting:
+                print(f"({waiting} more CAPTCHAs waiting)")
+            retry = " - previous answer was wrong" if challenge.attempt > 1 else ""
+            label = f"[{challenge.label}{retry}] " if challenge.label or retry else ""
+            try:
+                answer = input(f"{label}Enter CAPTCHA: ")
+            except (EOFError, OSError):
+                answer = ""
+            ticket.set_answer(answer, "operator")
+            if image_path:
+                try:
+                    os.remove(image_path)
+                except OSError:
+                    pass
+
+    def close(self):
+        self._stop.set()
+
+
+class WebOperator:
+    """Local web page listing every waiting CAPTCHA with an answer box"""
+
+    def __init__(self, port=DEFAULT_WEB_PORT, host="127.0.0.1"):
+        self.host = host
+        self.port = port
+        self.broker = None
+        self.server = None
+
+    def attach(self, broker):
+        self.broker = broker
+        operator = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.startswith("/image/"):
+                    token = self.path[len("/image/"):]
+                    ticket = next((t for t in operator.broker.pending() if t.token == token), None)
+                    if ticket is None or not ticket.challenge.image:
+                        self.send_error(404)
+                        return
+                    self._send(200, "image/png", ticket.challenge.image)
+                    return
+                self._send(200, "text/html; charset=utf-8", operator.render_page().encode("utf-8"))
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                form = parse_qs(self.rfile.read(length).decode("utf-8"))
+                token = form.get("token", [""])[0]
+                answer = form.get("answer", [""])[0].strip()
+                if token and answer:
+                    operator.broker.answer(token, answer)
+                self.send_response(303)
+                self.send_header("Location", "/")
+                self.end_headers()
+
+            def _send(self, status, content_type, body):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"✓ CAPTCHA queue at http://{self.host}:{self.port}/")
+
+    def render_page(self):
+        """The queue as a page of image + answer forms, auto-refreshing"""
+        rows = []
+        for ticket in self.broker.pending():
+            challenge = ticket.challenge
+            image = ""
+            if challenge.image:
+                encoded = base64.b64encode(challenge.image).decode("ascii")
+                image = f'<img src="data:image/png;base64,{encoded}">'
+            retry = " <b>(previous answer was wrong)</b>" if challenge.attempt > 1 else ""
+            rows.append(
+                f'<form method="post"><p>{html.escape(challenge.label)}{retry}</p>{image} '
+                f'<input type="hidden" name="token" value="{challenge.token}">'
+                f'<input name="answer" autocomplete="off"> <button>Submit</button></form><hr>'
+            )
+        body = "".join(rows) or "<p>No CAPTCHAs waiting.</p>"
+        return ('<html><head><title>eCourts CAPTCHA queue</title>'
+                '<meta http-equiv="refresh" content="3"></head>'
+                f'<body><h2>CAPTCHAs waiting: {len(rows)}</h2>{body}</body></html>')
+
+    def close(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+
+def create_broker(operator="console", solvers=(), port=DEFAULT_WEB_PORT):
+    """Broker with the chosen operator ('console' or 'web') and offline solvers"""
+    if operator == "web":
+        return CaptchaBroker([load_solver(s) for s in solvers], WebOperator(port))
+    return CaptchaBroker([load_solver(s) for s in solvers], ConsoleOperator())
+
+
+# -- Sessions in other processes ---------------------------------------------
+
+class RemoteTicket:
+    """Ticket for a challenge relayed to the broker in the parent process"""
+
+    def __init__(self, token, answers):
+        self.token = token
+        self.solver = None
+        # What a retry has to tell the broker: this attempt's number and the solvers to skip
+        self.attempt = None
+        self.skip_solvers = ()
+        self._answers = answers
+
+    def result(self, timeout=None):
+        deadline = time.time() + timeout if timeout is not None else None
+        while deadline is None or time.time() < deadline:
+            reply = self._answers.pop(self.token, None)
+            if reply is not None:
+                answer, self.attempt, self.skip_solvers, self.solver = reply
+                return answer
+            time.sleep(0.2)
+        return None
+
+
+class BrokerClient:
+    """Broker stand-in for pool workers: relays challenges over a Manager queue"""
+
+    def __init__(self, requests, answers, label_suffix=""):
+        self.requests = requests
+        self.answers = answers
+        self.label_suffix = label_suffix
+
+    def submit(self, image, label="", retry_of=None):
+        token = uuid.uuid4().hex
+        retry = None
+        if retry_of is not None and getattr(retry_of, "attempt", None):
+            retry = (retry_of.attempt, tuple(retry_of.skip_solvers), retry_of.solver)
+        self.requests.put((token, f"{label}{self.label_suffix}", image, retry))
+        return RemoteTicket(token, self.answers)
+
+
+def relay_requests(broker, requests, answers, stop_event):
+    """Parent-side thread: feed worker challenges into the broker and send answers back
+
+    No ticket is kept once its answer is sent; a retry brings the rejected
+    attempt's number and solvers back with it.
+    """
+    while not stop_event.is_set():
+        try:
+            token, label, image, retry = requests.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        except (EOFError, OSError):
+            return
+        retry_of = None
+        if retry is not None:
+            attempt, skip_solvers, solver = retry
+            retry_of = CaptchaTicket(CaptchaChallenge(None, label, attempt, skip_solvers))
+            retry_of.solver = solver
+        ticket = broker.submit(image, label, retry_of=retry_of)
+
+        def send(ticket, token=token):
+            challenge = ticket.challenge
+            try:
+                answers[token] = (ticket.answer, challenge.attempt, tuple(challenge.skip_solvers), ticket.solver)
+            except (EOFError, OSError):
+                pass
+        ticket.add_done_callback(send)
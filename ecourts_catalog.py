@@ -0,0 +1,240 @@
+"""Local catalog of the portal's dropdown options (states, districts, court complexes, case types)
+
+Filling the cause list form used to walk the AJAX cascade on every run:
+select a state by its visible text, wait for the districts, select, wait
+for the court complexes, select. Case types were found by reading every
+<option> over WebDriver, one round trip each. The catalog remembers the
+option values per dropdown (and per parent selection) in a JSON file, so
+names are resolved, with fuzzy matching, before the browser is touched and
+a fresh catalog fills the whole form in a single script call. Entries older
+than the catalog's max age are read from the live page again and updated.
+"""
+import difflib
+import json
+import os
+import re
+import threading
+import time
+
+DEFAULT_CATALOG_PATH = os.path.join("downloads", "catalog.json")
+DEFAULT_MAX_AGE = 7 * 24 * 3600        # seconds before options are read from the page again
+
+# Cause list form dropdowns, parent first
+CAUSE_LIST_LEVELS = (
+    ("state_code", "state"),
+    ("dist_code", "district"),
+    ("court_complex_code", "court complex"),
+)
+
+# [[value, text], ...] of a <select>, in one call
+OPTIONS_JS = """
+var select = document.getElementById(arguments[0]);
+if (!select) {
+    return null;
+}
+var options = [];
+for (var i = 0; i < select.options.length; i++) {
+    options.push([select.options[i].value, select.options[i].text.trim()]);
+}
+return options;
+"""
+
+# Select [[id, value, text], ...] by value in one call. Options the page has
+# not loaded yet are added from the catalog. Only the last select fires
+# "change" unless fireAll is set (a parent's change would reload its
+# children and undo their selection). resetIds are emptied first, so a
+# following dropdown wait sees the newly loaded options.
+SELECT_VALUES_JS = """
+var picks = arguments[0], fireAll = arguments[1], resetIds = arguments[2] || [];
+for (var r = 0; r < resetIds.length; r++) {
+    var child = document.getElementById(resetIds[r]);
+    if (child) {
+        child.options.length = Math.min(child.options.length, 1);
+    }
+}
+var missing = [];
+for (var i = 0; i < picks.length; i++) {
+    var select = document.getElementById(picks[i][0]);
+    if (!select) {
+        missing.push(picks[i][0]);
+        continue;
+    }
+    var found = false;
+    for (var j = 0; j < select.options.length; j++) {
+        if (select.options[j].value === picks[i][1]) {
+            found = true;
+            break;
+        }
+    }
+    if (!found) {
+        select.add(new Option(picks[i][2], picks[i][1]));
+    }
+    select.value = picks[i][1];
+    if (fireAll || i === picks.length - 1) {
+        select.dispatchEvent(new Event('change', {bubbles: true}));
+    }
+}
+return missing;
+"""
+
+
+class CatalogError(LookupError):
+    """A name that matches none of a dropdown's known options"""
+
+
+def normalize_name(text):
+    """Lowercase words only, for comparing option names"""
+    return " ".join(re.sub(r'[^a-z0-9]+', ' ', str(text).lower()).split())
+
+
+def entry_key(select_id, parents=()):
+    """Catalog key of a dropdown's options under its parent selection"""
+    return "/".join((select_id,) + tuple(str(parent) for parent in parents))
+
+
+def clean_options(options):
+    """Drop placeholder options ("Select state" and friends have no value)"""
+    return [[str(value), text] for value, text in options or () if str(value).strip() and value != "0"]
+
+
+def match_option(options, name):
+    """(value, text) of the option best matching name, or None
+
+    Tried in order: the option value itself, the exact name, the first
+    option containing the name (as the scraper always matched case types),
+    then the closest name by difflib ratio.
+    """
+    name = str(name).strip()
+    for value, text in options:
+        if value == name:
+            return value, text
+    wanted = normalize_name(name)
+    if not wanted:
+        return None
+    normalized = [(normalize_name(text), value, text) for value, text in options]
+    for norm, value, text in normalized:
+        if norm == wanted:
+            return value, text
+    for norm, value, text in normalized:
+        if wanted in norm:
+            return value, text
+    close = difflib.get_close_matches(wanted, [norm for norm, _, _ in normalized], n=1, cutoff=0.8)
+    if close:
+        for norm, value, text in normalized:
+            if norm == close[0]:
+                return value, text
+    return None
+
+
+def suggest(options, name, limit=3):
+    """Closest option names, for error messages"""
+    names = {normalize_name(text): text for _, text in options}
+    close = difflib.get_close_matches(normalize_name(name), list(names), n=limit, cutoff=0.4)
+    return [names[norm] for norm in close]
+
+
+class OptionCatalog:
+    """JSON-backed map from dropdown (and parent selection) to its option values"""
+
+    def __init__(self, path=DEFAULT_CATALOG_PATH, max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self.entries = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f).get("entries", {})
+        except (OSError, ValueError):
+            return {}
+
+    def save(self):
+        """Write the catalog, keeping newer entries other processes saved meanwhile"""
+        with self._lock:
+            merged = self._read()
+            for key, entry in self.entries.items():
+                if entry["refreshed_at"] >= merged.get(key, {}).get("refreshed_at", 0):
+                    merged[key] = entry
+            self.entries = merged
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": merged}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    def update(self, select_id, parents, options, save=True):
+        """Remember a dropdown's options as just read from the page; returns them cleaned"""
+        options = clean_options(options)
+        if options:
+            with self._lock:
+                self.entries[entry_key(select_id, parents)] = {"options": options, "refreshed_at": time.time()}
+            if save:
+                self.save()
+        return options
+
+    def options(self, select_id, parents=(), fresh_only=True):
+        """Known options of a dropdown, or None if unknown (or stale with fresh_only)"""
+        entry = self.entries.get(entry_key(select_id, parents))
+        if not entry:
+            return None
+        if fresh_only and time.time() - entry["refreshed_at"] > self.max_age:
+            return None
+        return entry["options"]
+
+    def resolve(self, select_id, name, parents=(), label=None, options=None):
+        """(value, text) for name, None when the options are not known yet
+
+        Raises CatalogError when the options are known and nothing matches.
+        """
+        options = self.options(select_id, parents) if options is None else options
+        if options is None:
+            return None
+        match = match_option(options, name)
+        if match is None:
+            hint = suggest(options, name)
+            message = f"Unknown {label or select_id} '{name}'"
+            if hint:
+                message += f" (did you mean: {', '.join(hint)}?)"
+            raise CatalogError(message)
+        return match
+
+    def resolve_levels(self, names, levels=CAUSE_LIST_LEVELS):
+        """Resolve a parent-first chain of names as far as the catalog knows it
+
+        Returns one (value, text) per level, or None from the first level
+        whose options are not known (the browser has to read those).
+        """
+        resolved = []
+        parents = ()
+        for (select_id, label), name in zip(levels, names):
+            match = self.resolve(select_id, name, parents, label)
+            if match is None:
+                return resolved + [None] * (len(names) - len(resolved))
+            resolved.append(match)
+            parents += (match[0],)
+        return resolved
+
+    def find(self, text, limit=10):
+        """Catalog entries whose option names match text: (key, value, name) tuples"""
+        wanted = normalize_name(text)
+        hits = []
+        for key, entry in sorted(self.entries.items()):
+            for value, name in entry["options"]:
+                norm = normalize_name(name)
+                if wanted in norm or difflib.SequenceMatcher(None, wanted, norm).ratio() >= 0.8:
+                    hits.append((key, value, name))
+        return hits[:limit]
+
+
+def print_catalog_matches(hits, text):
+    """Print the result of a catalog search"""
+    print("\n" + "="*50)
+    print(f"CATALOG MATCHES FOR '{text}'")
+    print("="*50)
+    if not hits:
+        print("No matching options (run --catalog-refresh to read them from the portal)")
+    for key, value, name in hits:
+        print(f"{name}  value={value}  [{key}]")
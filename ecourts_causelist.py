@@ -0,0 +1,196 @@
+"""Structured cause list rows and a hash index for checking a whole watchlist at once"""
+import json
+import os
+import re
+from collections import namedtuple
+
+import lxml.html
+
+CNR_RE = re.compile(r'\b([A-Z]{4}[0-9]{12})\b')
+CASE_NUMBER_RE = re.compile(r'([A-Za-z][A-Za-z.()\-& ]*?)\s*/\s*(\d+)\s*/\s*(\d{4})')
+SERIAL_RE = re.compile(r'^\s*(\d+[A-Za-z]?)\s*[.)]?\s*$')
+COURT_HEADING_RE = re.compile(r'court|judge|bench|magistrate', re.IGNORECASE)
+COURT_PREFIX_RE = re.compile(r'^(?:in\s+the\s+)?court\s+of\s*[:\-]?\s*', re.IGNORECASE)
+
+CAUSE_LIST_DIR = os.path.join("downloads", "cause_lists")
+
+CauseListRow = namedtuple(
+    "CauseListRow", ["serial_number", "case_number", "cnr_number", "parties", "advocate", "court"]
+)
+
+
+def _text(element):
+    return ' '.join(''.join(element.itertext()).split())
+
+
+def _court_name(heading):
+    """Court name from a heading like 'In The Court Of : 12-Civil Judge'"""
+    return COURT_PREFIX_RE.sub('', heading) or heading
+
+
+def normalize_case_number(text):
+    """Canonical TYPE/NUMBER/YEAR key (e.g. 'R.C.S./0151/2016' -> 'RCS/151/2016')"""
+    match = CASE_NUMBER_RE.search(text or "")
+    if not match:
+        return None
+    case_type = re.sub(r'[^A-Z]', '', match.group(1).upper())
+    return f"{case_type}/{int(match.group(2))}/{match.group(3)}"
+
+
+def iter_cause_list_rows(html, default_court=None):
+    """Yield CauseListRow tuples from a cause list page, in page order
+
+    A row counts as a case when its first cell is a serial number and
+    another cell holds a case number (TYPE/NUMBER/YEAR). Headings and
+    single-cell rows that mention a court or judge set the court for the
+    rows that follow.
+    """
+    if not html or not html.strip():
+        return
+    root = lxml.html.fromstring(html)
+    court = default_court
+
+    for element in root.iter('h2', 'h3', 'h4', 'caption', 'tr'):
+        if element.tag != 'tr':
+            heading = _text(element)
+            if heading and COURT_HEADING_RE.search(heading):
+                court = _court_name(heading)
+            continue
+
+        cells = [cell for cell in element if cell.tag in ('td', 'th')]
+        if len(cells) == 1 or (cells and cells[0].get('colspan')):
+            heading = _text(cells[0])
+            if heading and COURT_HEADING_RE.search(heading):
+                court = _court_name(heading)
+            continue
+        if len(cells) < 2:
+            continue
+
+        serial = SERIAL_RE.match(_text(cells[0]))
+        if not serial:
+            continue
+
+        case_cell = cells[1]
+        case_text = _text(case_cell)
+        case_number = normalize_case_number(case_text)
+        # The CNR usually sits in a link's onclick/href rather than the visible text
+        markup = lxml.html.tostring(element, encoding='unicode')
+        cnr_match = CNR_RE.search(markup)
+        if not case_number and not cnr_match:
+            continue
+
+        yield CauseListRow(
+            serial_number=serial.group(1),
+            case_number=case_number or case_text,
+            cnr_number=cnr_match.group(1) if cnr_match else None,
+            parties=_text(cells[2]) if len(cells) > 2 else "",
+            advocate=_text(cells[3]) if len(cells) > 3 else "",
+            court=court
+        )
+
+
+def parse_cause_list(html, default_court=None):
+    """All rows of a cause list page as a list of CauseListRow"""
+    return list(iter_cause_list_rows(html, default_court))
+
+
+class CauseListIndex:
+    """Hash index over cause list rows by CNR and by normalized case number"""
+
+    def __init__(self, rows=(), date=None):
+        self.date = date
+        self.rows = []
+        self.by_cnr = {}
+        self.by_case_number = {}
+        for row in rows:
+            self.add(row)
+
+    def add(self, row):
+        self.rows.append(row)
+        if row.cnr_number:
+            self.by_cnr.setdefault(row.cnr_number, row)
+        key = normalize_case_number(row.case_number)
+        if key:
+            self.by_case_number.setdefault(key, row)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def lookup(self, item):
+        """Find a watchlist item (CNR or TYPE/NUMBER/YEAR) in the cause list"""
+        item = item.strip().upper()
+        row = self.by_cnr.get(item)
+        if row is None:
+            key = normalize_case_number(item)
+            if key:
+                row = self.by_case_number.get(key)
+        return row
+
+    def check(self, item):
+        """Listing result for one item, in the shape check_case_listing reports"""
+        row = self.lookup(item)
+        return {
+            "case": item,
+            "listed": row is not None,
+            "serial_number": row.serial_number if row else None,
+            "court": row.court if row else None,
+            "case_number": row.case_number if row else None,
+            "cnr_number": row.cnr_number if row else None,
+            "parties": row.parties if row else None,
+            "next_hearing_date": self.date if row else None,
+        }
+
+    def check_watchlist(self, items):
+        """Check every watchlist item against this cause list"""
+        return [self.check(item) for item in items]
+
+    def save(self, filepath, **meta):
+        """Store the parsed rows as JSON so later checks skip the download"""
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        data = dict(meta, date=self.date, rows=[row._asdict() for row in self.rows])
+        # Written whole or not at all: an existing file means a finished download
+        tmp_path = f"{filepath}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, filepath)
+        return filepath
+
+    @classmethod
+    def load(cls, filepath):
+        with open(filepath, encoding='utf-8') as f:
+            data = json.load(f)
+        return cls((CauseListRow(**row) for row in data.get("rows", [])), data.get("date"))
+
+
+def cause_list_stem(state, district, court_complex, date):
+    """File name stem for one court complex and day, e.g. 'Maharashtra_Mumbai_City-Civil-Court_18-10-2026'"""
+    return "_".join(re.sub(r'[^A-Za-z0-9]+', '-', part).strip('-') for part in
+                    (state, district, court_complex, date))
+
+
+def cause_list_path(state, district, court_complex, date):
+    """Where the parsed cause list for one court complex and day is stored"""
+    return os.path.join(CAUSE_LIST_DIR, f"{cause_list_stem(state, district, court_complex, date)}.json")
+
+
+def cause_list_pdf_name(state, district, court_complex, date):
+    """File name of the PDF of one court complex and day's cause list"""
+    return f"cause_list_{cause_list_stem(state, district, court_complex, date)}.pdf"
+
+
+def print_watchlist_report(results, date_label):
+    """Print the listing check for each watchlist item"""
+    print("\n" + "="*50)
+    print(f"WATCHLIST CHECK FOR {date_label.upper()}")
+    print("="*50)
+    for result in results:
+        if result["listed"]:
+            print(f"✓ {result['case']} IS listed {date_label}")
+            print(f"  Serial Number: {result['serial_number']}")
+            print(f"  Court Name: {result['court'] or 'N/A'}")
+        else:
+            print(f"✗ {result['case']} is NOT listed {date_label}")
+    listed = sum(1 for result in results if result["listed"])
+    print(f"\n{listed}/{len(results)} watched cases listed {date_label}")
@@ -0,0 +1,205 @@
+"""Change detection between runs: case fingerprints and compact delta records
+
+A case's fingerprint is the hash of its normalized #history_cnr fragment
+plus one hash per field of case_details and listing_info (and of its
+hearing dates and orders). The fingerprint of the last saved snapshot of
+every case is kept in a small SQLite table with where that snapshot went.
+A case whose fragment is unchanged since then needs no PDF, no new JSON
+file or store snapshot and no re-indexing; a changed one is saved as
+usual and a delta record (old and new value of each changed field, new
+hearing dates, new orders) is appended to a JSON lines file.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+DEFAULT_CHANGES_PATH = os.path.join("downloads", "fingerprints.db")
+DEFAULT_DELTAS_PATH = os.path.join("downloads", "case_changes.jsonl")
+
+# Fields compared as a whole; new entries are listed in the delta
+LIST_FIELDS = ("hearing_dates", "orders")
+# Fields compared per key
+DICT_FIELDS = ("case_details", "listing_info")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fingerprints (
+    cnr_number TEXT PRIMARY KEY,
+    fragment_hash TEXT,
+    field_hashes TEXT NOT NULL,
+    field_values TEXT NOT NULL,
+    location TEXT,
+    pdf_path TEXT,
+    checked_at REAL NOT NULL,
+    changed_at REAL NOT NULL
+);
+"""
+
+# Markup that differs between two fetches of the same case
+COMMENT_RE = re.compile(r'<!--.*?-->', re.S)
+HIDDEN_INPUT_RE = re.compile(r'<input\b[^>]*\btype=["\']?hidden["\']?[^>]*>', re.I)
+BETWEEN_TAGS_RE = re.compile(r'>\s+<')
+SPACE_RE = re.compile(r'\s+')
+
+Fingerprint = namedtuple("Fingerprint", ["fragment", "fields", "values"])
+# status: "new", "changed" or "unchanged"; previous: the Fingerprint it was compared with
+Change = namedtuple("Change", ["status", "fingerprint", "previous", "location", "pdf_path"])
+
+
+def _hash(data):
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def normalize_fragment(html):
+    """The fragment without comments, hidden tokens and whitespace differences"""
+    html = COMMENT_RE.sub("", html)
+    html = HIDDEN_INPUT_RE.sub("", html)
+    html = BETWEEN_TAGS_RE.sub("><", html)
+    return SPACE_RE.sub(" ", html).strip()
+
+
+def tracked_values(case_data):
+    """{field key: value} of the compared fields, e.g. 'listing_info.next_hearing_date'"""
+    values = {}
+    for field in DICT_FIELDS:
+        for key, value in (case_data.get(field) or {}).items():
+            values[f"{field}.{key}"] = value
+    for field in LIST_FIELDS:
+        if case_data.get(field):
+            values[field] = list(case_data[field])
+    return values
+
+
+def fingerprint(case_data):
+    """Fingerprint of a case: normalized fragment hash and per-field hashes"""
+    html = case_data.get("raw_html")
+    values = tracked_values(case_data)
+    fields = {
+        key: _hash(json.dumps(value, ensure_ascii=False, sort_keys=True))[:16]
+        for key, value in values.items()
+    }
+    return Fingerprint(_hash(normalize_fragment(html)) if html else None, fields, values)
+
+
+def same_case(old, new):
+    """True when two fingerprints describe the same case state
+
+    The fragment decides when both have one (it also covers rows the parser
+    does not extract); otherwise the field hashes do.
+    """
+    if old.fragment and new.fragment:
+        return old.fragment == new.fragment
+    return old.fields == new.fields
+
+
+def _new_items(old, new):
+    seen = {json.dumps(item, sort_keys=True) for item in old or ()}
+    return [item for item in new or () if json.dumps(item, sort_keys=True) not in seen]
+
+
+def case_delta(cnr, change):
+    """Compact record of what changed in a case since its last saved snapshot"""
+    new = change.fingerprint
+    delta = {"cnr_number": cnr, "detected_at": datetime.now().isoformat(), "status": change.status}
+    if change.previous is None:
+        delta["next_hearing_date"] = new.values.get("listing_info.next_hearing_date")
+        return delta
+    old = change.previous
+    delta["changed"] = {
+        key: {"old": old.values.get(key), "new": new.values.get(key)}
+        for key in sorted(set(old.fields) | set(new.fields))
+        if key not in LIST_FIELDS and old.fields.get(key) != new.fields.get(key)
+    }
+    for field in LIST_FIELDS:
+        added = _new_items(old.values.get(field), new.values.get(field))
+        if added:
+            delta[f"new_{field}"] = added
+    if not delta["changed"] and not any(f"new_{field}" in delta for field in LIST_FIELDS):
+        # Only the fragment changed, in rows the parser does not extract
+        delta["fragment_only"] = True
+    return delta
+
+
+class ChangeTracker:
+    """Fingerprints of the last saved snapshot of every case, and the delta log"""
+
+    def __init__(self, path=DEFAULT_CHANGES_PATH, deltas_path=DEFAULT_DELTAS_PATH):
+        self.path = path
+        self.deltas_path = deltas_path
+        self._lock = threading.Lock()
+        for directory in {os.path.dirname(path), os.path.dirname(deltas_path)}:
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.counts = {"new": 0, "changed": 0, "unchanged": 0}
+
+    def check(self, case_data, store=None):
+        """Compare a fetched case with its last saved snapshot (read only)
+
+        A case not tracked yet is compared with its latest snapshot in the
+        result store, when there is one.
+        """
+        cnr = case_data.get("cnr_number")
+        current = fingerprint(case_data)
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT fragment_hash, field_hashes, field_values, location, pdf_path FROM fingerprints "
+                "WHERE cnr_number = ?", (cnr,)
+            ).fetchone()
+        if row:
+            fragment, fields, values, location, pdf_path = row
+            previous = Fingerprint(fragment, json.loads(fields), json.loads(values))
+        else:
+            stored = store.latest(cnr, with_html=True) if store is not None else None
+            if stored is None:
+                return Change("new", current, None, None, None)
+            previous = fingerprint(stored)
+            location, pdf_path = store.path, stored.get("pdf_path")
+        status = "unchanged" if same_case(previous, current) else "changed"
+        return Change(status, current, previous, location, pdf_path)
+
+    def unchanged(self, change):
+        """True when the case can keep its last snapshot (and PDF) as they are"""
+        return change.status == "unchanged" and bool(change.location)
+
+    def record(self, case_data, location, change=None):
+        """Remember the fingerprint of a case just saved (or kept); returns its delta record, None if unchanged"""
+        change = change or self.check(case_data)
+        cnr = case_data.get("cnr_number")
+        current = change.fingerprint
+        now = time.time()
+        delta = case_delta(cnr, change) if change.status != "unchanged" else None
+        with self._lock:
+            self.counts[change.status] += 1
+            self.conn.execute(
+                "INSERT INTO fingerprints (cnr_number, fragment_hash, field_hashes, field_values, location, "
+                "pdf_path, checked_at, changed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (cnr_number) DO UPDATE SET fragment_hash = excluded.fragment_hash, "
+                "field_hashes = excluded.field_hashes, field_values = excluded.field_values, "
+                "location = excluded.location, pdf_path = COALESCE(excluded.pdf_path, fingerprints.pdf_path), "
+                "checked_at = excluded.checked_at, "
+                "changed_at = CASE WHEN ? THEN excluded.changed_at ELSE fingerprints.changed_at END",
+                (cnr, current.fragment, json.dumps(current.fields), json.dumps(current.values, ensure_ascii=False),
+                 location, case_data.get("pdf_path"), now, now, delta is not None)
+            )
+            self.conn.commit()
+            if delta is not None:
+                with open(self.deltas_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(delta, ensure_ascii=False) + "\n")
+        return delta
+
+    def format_summary(self):
+        return (f"Changes: {self.counts['changed']} changed, {self.counts['new']} new, "
+                f"{self.counts['unchanged']} unchanged (deltas in {self.deltas_path})")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
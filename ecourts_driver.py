@@ -0,0 +1,210 @@
+"""Chrome startup: cached chromedriver resolution and the browser profiles
+
+ChromeDriverManager().install() checks the latest release online on every
+call. The resolved driver path is remembered in a small JSON file instead,
+so later runs start Chrome without any network access; it is only resolved
+again when the file is gone, a different version is pinned, or Chrome
+refuses the cached driver (e.g. after a browser update).
+
+    ECOURTS_CHROMEDRIVER=/path/to/chromedriver     use this driver, never resolve
+    ECOURTS_CHROMEDRIVER_VERSION=120.0.6099.109    pin the driver version
+
+The "lean" profile loads only what a search needs: the form, its scripts
+and styles, the CAPTCHA image and the result fragment. Images, fonts, media
+and known third-party hosts are blocked through CDP, and the HTTP disk
+cache lives in a directory reused by later runs.
+"""
+import fnmatch
+import json
+import os
+import re
+import time
+
+CACHE_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "ecourts-scraper")
+DRIVER_CACHE_PATH = os.path.join(CACHE_ROOT, "chromedriver.json")
+BROWSER_CACHE_DIR = os.path.join(CACHE_ROOT, "chrome-cache")
+BROWSER_CACHE_SIZE = 200 * 1024 * 1024
+
+PROFILES = ("standard", "lean")
+
+# URL patterns the lean profile blocks (Network.setBlockedURLs wildcards)
+LEAN_BLOCKED_URLS = [
+    # images (the CAPTCHA is served by a .php endpoint and stays allowed)
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.svg", "*.webp", "*.ico", "*.bmp",
+    # fonts
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    # media
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.wav",
+    # third-party hosts: analytics, tag managers, social widgets, CDN fonts
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*fonts.googleapis.com*", "*fonts.gstatic.com*", "*facebook.net*", "*facebook.com*",
+    "*twitter.com*", "*platform.twitter.com*", "*youtube.com*", "*addthis.com*", "*sharethis.com*",
+]
+
+# Requests that must never be blocked, whatever the patterns above say
+LEAN_ALLOWED_URLS = [
+    "https://services.ecourts.gov.in/ecourtindia_v6/vendor/securimage/securimage_show.php",
+]
+
+LEAN_ARGUMENTS = [
+    "--disable-extensions",
+    "--disable-background-networking",
+    "--disable-component-update",
+    "--disable-default-apps",
+    "--disable-sync",
+    "--disable-notifications",
+    "--mute-audio",
+    "--no-first-run",
+    "--autoplay-policy=user-gesture-required",
+    "--disable-features=Translate,MediaRouter,OptimizationHints",
+]
+
+VERSION_RE = re.compile(r'(\d+\.\d+\.\d+\.\d+)')
+
+
+def _read_cache(cache_path):
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(cache_path, entry):
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=4)
+    except OSError as e:
+        print(f"Warning: could not cache the chromedriver path: {str(e)}")
+
+
+def resolve_chromedriver(refresh=False, cache_path=DRIVER_CACHE_PATH):
+    """Path of the chromedriver binary, from the cache when possible"""
+    explicit = os.environ.get("ECOURTS_CHROMEDRIVER")
+    if explicit:
+        return explicit
+
+    pinned = os.environ.get("ECOURTS_CHROMEDRIVER_VERSION") or None
+    if not refresh:
+        cached = _read_cache(cache_path)
+        if (cached and os.path.isfile(cached.get("path", ""))
+                and (pinned is None or cached.get("version") == pinned)):
+            return cached["path"]
+
+    # Only now pay for webdriver_manager (and its network check)
+    from webdriver_manager.chrome import ChromeDriverManager
+    path = ChromeDriverManager(driver_version=pinned).install()
+    match = VERSION_RE.search(path)
+    _write_cache(cache_path, {
+        "path": path,
+        "version": pinned or (match.group(1) if match else None),
+        "resolved_at": time.time(),
+    })
+    print(f"✓ chromedriver resolved: {path}")
+    return path
+
+
+def blocked_url_patterns(blocked=LEAN_BLOCKED_URLS, allowed=LEAN_ALLOWED_URLS):
+    """Block patterns minus any that would catch an allowlisted URL"""
+    return [pattern for pattern in blocked
+            if not any(fnmatch.fnmatchcase(url, pattern) for url in allowed)]
+
+
+class CacheSlot:
+    """A disk cache directory reused across runs, held by one Chrome at a time
+
+    Chrome's disk cache cannot be shared by concurrent browsers, so parallel
+    sessions each take the first free numbered slot under BROWSER_CACHE_DIR.
+    The slot is released when the session closes (or its process dies).
+    """
+
+    def __init__(self, base_dir=BROWSER_CACHE_DIR, max_slots=32):
+        self.path = None
+        self._lock_file = None
+        os.makedirs(base_dir, exist_ok=True)
+        try:
+            import fcntl
+        except ImportError:
+            # No advisory locks (Windows): one directory per process
+            self.path = os.path.join(base_dir, f"pid-{os.getpid()}")
+            return
+        for slot in range(max_slots):
+            lock_file = open(os.path.join(base_dir, f"slot-{slot}.lock"), "w")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                continue
+            self._lock_file = lock_file
+            self.path = os.path.join(base_dir, f"slot-{slot}")
+            return
+        self.path = os.path.join(base_dir, f"pid-{os.getpid()}")
+
+    def release(self):
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+
+def build_chrome_options(headless=False, download_dir=None, profile="standard", cache_dir=None):
+    """ChromeOptions for a scraper session"""
+    from selenium import webdriver
+
+    options = webdriver.ChromeOptions()
+    if headless:
+        options.add_argument("--headless=new")
+
+    prefs = {
+        "download.default_directory": download_dir,
+        "download.prompt_for_download": False,
+    }
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--no-sandbox")
+
+    if profile == "lean":
+        for argument in LEAN_ARGUMENTS:
+            options.add_argument(argument)
+        if cache_dir:
+            options.add_argument(f"--disk-cache-dir={cache_dir}")
+            options.add_argument(f"--disk-cache-size={BROWSER_CACHE_SIZE}")
+        prefs.update({
+            "profile.default_content_setting_values.notifications": 2,
+            "profile.default_content_setting_values.geolocation": 2,
+            "profile.default_content_setting_values.media_stream": 2,
+            "profile.password_manager_enabled": False,
+            "credentials_enable_service": False,
+        })
+        # Loading stops at DOMContentLoaded; the event-driven waits cover the rest
+        options.page_load_strategy = "eager"
+
+    options.add_experimental_option("prefs", prefs)
+    return options
+
+
+def apply_profile(driver, profile):
+    """Install the lean profile's request blocking on a started browser"""
+    if profile != "lean":
+        return
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": blocked_url_patterns()})
+    except Exception as e:
+        print(f"Warning: request blocking unavailable: {str(e)}")
+
+
+def start_chrome(options, profile="standard"):
+    """Start Chrome with the cached driver, re-resolving once if Chrome rejects it"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.service import Service
+    from selenium.common.exceptions import SessionNotCreatedException
+
+    try:
+        driver = webdriver.Chrome(service=Service(resolve_chromedriver()), options=options)
+    except SessionNotCreatedException:
+        if os.environ.get("ECOURTS_CHROMEDRIVER"):
+            raise
+        print("Cached chromedriver does not match this Chrome, resolving it again...")
+        driver = webdriver.Chrome(service=Service(resolve_chromedriver(refresh=True)), options=options)
+    apply_profile(driver, profile)
+    return driver
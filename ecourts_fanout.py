@@ -0,0 +1,324 @@
+"""Cause list fan-out: every court complex of some districts over a range of working days
+
+The districts and court complexes come from the option catalog
+(ecourts_catalog), so "Maharashtra, all districts, next 5 days" becomes one
+cause list job per court complex per day before any session is started.
+Jobs run on a pool of scraper sessions (one per worker thread) with a cap
+on parallel sessions per portal host. A court day whose parsed cause list
+is on disk counts as finished, and the job journal (ecourts_journal) keeps
+the attempts and failures of the rest, so a rerun only downloads what is
+still missing.
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import partial
+from urllib.parse import urlsplit
+
+from ecourts_scraper import create_scraper, save_to_file
+from ecourts_scheduler import backoff_delay
+from ecourts_catalog import OptionCatalog, CatalogError, CAUSE_LIST_LEVELS
+from ecourts_causelist import cause_list_path, cause_list_pdf_name
+from ecourts_captcha import CaptchaBroker
+from ecourts_metrics import METRICS
+from ecourts_supervisor import SupervisedScraper, DEFAULT_RECYCLE_AFTER, DEFAULT_MEMORY_LIMIT
+
+DEFAULT_PORTAL_HOST = "services.ecourts.gov.in"
+
+CauseListJob = namedtuple("CauseListJob", ["state", "district", "court_complex", "date"])
+
+
+def job_key(job):
+    """Journal key of a job: where its parsed cause list is stored"""
+    return cause_list_path(job.state, job.district, job.court_complex, job.date)
+
+
+def job_done(job, pdf_mode):
+    """True when the court day's parsed rows (and its PDF, unless PDFs are off) are on disk"""
+    if not os.path.exists(job_key(job)):
+        return False
+    if pdf_mode == "none":
+        return True
+    pdf_name = cause_list_pdf_name(job.state, job.district, job.court_complex, job.date)
+    return os.path.exists(os.path.join("downloads", pdf_name))
+
+
+def split_names(text):
+    """Names from a ';'-separated option (court names may contain commas)"""
+    return [name.strip() for name in (text or "").split(";") if name.strip()]
+
+
+def working_days(start, days, skip_weekdays=(6,)):
+    """The next `days` dates from start (inclusive) that are not on skip_weekdays (Sunday by default)"""
+    dates = []
+    day = start
+    while len(dates) < days:
+        if day.weekday() not in skip_weekdays:
+            dates.append(day)
+        day += timedelta(days=1)
+    return dates
+
+
+def _pick(options, names, select_id, parents, label, catalog):
+    """Options selected by name (all of them when no names were given)"""
+    if not names:
+        return options
+    return [catalog.resolve(select_id, name, parents, label, options) for name in names]
+
+
+def expand_jobs(catalog, states, districts=(), courts=(), dates=()):
+    """One job per court complex per date, from the catalogued options
+
+    Returns (jobs, missing) where missing lists the state/district
+    selections whose options are not in the catalog yet.
+    """
+    (state_id, state_label), (dist_id, dist_label), (court_id, court_label) = CAUSE_LIST_LEVELS
+    jobs, missing = [], []
+    state_options = catalog.options(state_id, fresh_only=False)
+    if state_options is None:
+        return jobs, [(state, "") for state in states] or [("", "")]
+    for state_value, state_name in _pick(state_options, states, state_id, (), state_label, catalog):
+        district_options = catalog.options(dist_id, (state_value,), fresh_only=False)
+        if district_options is None:
+            missing.extend([(state_name, district) for district in districts] or [(state_name, "")])
+            continue
+        for dist_value, dist_name in _pick(district_options, districts, dist_id, (state_value,),
+                                           dist_label, catalog):
+            parents = (state_value, dist_value)
+            court_options = catalog.options(court_id, parents, fresh_only=False)
+            if court_options is None:
+                missing.append((state_name, dist_name))
+                continue
+            for _, court_name in _pick(court_options, courts, court_id, parents, court_label, catalog):
+                for day in dates:
+                    jobs.append(CauseListJob(state_name, dist_name, court_name, day.strftime("%d-%m-%Y")))
+    return jobs, missing
+
+
+class CauseListFanout:
+    """Runs cause list jobs over a pool of scraper sessions with per-host limits"""
+
+    def __init__(self, workers=2, per_host=2, max_attempts=3, engine="browser", base_url=None,
+                 headless=False, profile="standard", pdf_mode="inline", catalog=None,
+                 journal=None, restart=False, refresh=False, captcha_broker=None,
+                 backoff_base=5, backoff_cap=120, recycle_after=DEFAULT_RECYCLE_AFTER,
+                 memory_limit=DEFAULT_MEMORY_LIMIT):
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self.max_attempts = max(1, max_attempts)
+        self.engine = engine
+        self.base_url = base_url
+        self.headless = headless
+        self.profile = profile
+        self.pdf_mode = pdf_mode
+        self.catalog = catalog or OptionCatalog()
+        # JobJournal: job states survive a crash (restart ignores an interrupted run)
+        self.journal = journal
+        self.restart = restart
+        # Download again even the court days already on disk
+        self.refresh = refresh
+        # The JournalRun of the current run
+        self._run = None
+        self.captcha_broker = captcha_broker
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.recycle_after = recycle_after
+        self.memory_limit = memory_limit
+        # Every job goes to the same portal, so the host cap bounds the sessions hitting it
+        self.host = urlsplit(base_url).netloc if base_url else DEFAULT_PORTAL_HOST
+
+        self._local = threading.local()
+        self._scrapers = []
+        self._scrapers_lock = threading.Lock()
+
+    # -- worker thread side -------------------------------------------------
+
+    def _scraper(self):
+        """This thread's supervised scraper session, created on first use"""
+        scraper = getattr(self._local, "scraper", None)
+        if scraper is None:
+            scraper = SupervisedScraper(
+                partial(create_scraper, self.engine, headless=self.headless, captcha_broker=self.captcha_broker,
+                        base_url=self.base_url, pdf_mode=self.pdf_mode, profile=self.profile,
+                        catalog=self.catalog),
+                recycle_after=self.recycle_after, memory_limit=self.memory_limit
+            )
+            self._local.scraper = scraper
+            with self._scrapers_lock:
+                self._scrapers.append(scraper)
+        return scraper
+
+    def _download(self, job):
+        """Blocking cause list download, run inside the thread pool"""
+        if self._run is not None:
+            self._run.start(job_key(job))
+        try:
+            with METRICS.timer("cause_list"):
+                result = self._scraper().download_cause_list(job.state, job.district, job.court_complex, job.date)
+            if self._run is not None and not (result and result.get("status") == "success"):
+                self._run.fail(job_key(job), (result or {}).get("message", "download failed"))
+            return result
+        except Exception as e:
+            print(f"Error downloading {job.court_complex} {job.date}: {str(e)}")
+            METRICS.count("worker_errors")
+            if self._run is not None:
+                self._run.fail(job_key(job), f"worker error: {str(e)}")
+            scraper = self._local.scraper
+            self._local.scraper = None
+            if scraper is not None:
+                scraper.close()
+            return None
+
+    def _close_scrapers(self):
+        with self._scrapers_lock:
+            for scraper in self._scrapers:
+                scraper.close()
+            self._scrapers = []
+
+    def refresh_catalog(self, missing):
+        """Read the options the expansion was missing, with one browser session"""
+        scraper = create_scraper(headless=self.headless, profile=self.profile, catalog=self.catalog)
+        try:
+            for state, district in missing:
+                scraper.refresh_catalog(state or None, district or None)
+        finally:
+            scraper.close()
+
+    # -- event loop side ----------------------------------------------------
+
+    async def _run_job(self, job, loop, executor, global_limit, host_limit):
+        """Download one cause list with retries; returns a report entry"""
+        started = time.time()
+        # Attempts made before a restart count towards the limit
+        attempt = self._run.attempts(job_key(job)) if self._run is not None else 0
+        result = None
+        while attempt < self.max_attempts:
+            attempt += 1
+            async with global_limit, host_limit:
+                result = await loop.run_in_executor(executor, self._download, job)
+            if result and result.get("status") == "success":
+                break
+            if attempt < self.max_attempts:
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                print(f"Retrying {job.court_complex} {job.date} in {delay:.0f}s "
+                      f"({attempt}/{self.max_attempts} failed)")
+                METRICS.count("retries")
+                await asyncio.sleep(delay)
+        ok = bool(result) and result.get("status") == "success"
+        return {"job": job, "result": result if ok else None, "attempts": attempt,
+                "error": None if ok else (result or {}).get("message", "download failed"),
+                "seconds": round(time.time() - started, 2)}
+
+    async def run_async(self, jobs):
+        """Run every job, journalling each one as it finishes"""
+        loop = asyncio.get_running_loop()
+        global_limit = asyncio.Semaphore(self.workers)
+        host_limit = asyncio.Semaphore(self.per_host)
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ecourts-causelist")
+        try:
+            tasks = [
+                asyncio.ensure_future(self._run_job(job, loop, executor, global_limit, host_limit))
+                for job in jobs
+            ]
+            entries = []
+            for done, task in enumerate(asyncio.as_completed(tasks), 1):
+                entry = await task
+                job = entry["job"]
+                if entry["result"]:
+                    if self._run is not None:
+                        self._run.finish(job_key(job), entry["result"]["rows_path"])
+                    status = f"✓ {entry['result']['cases_found']} cases"
+                else:
+                    status = f"✗ {entry['error']}"
+                print(f"[{done}/{len(tasks)}] {job.court_complex}, {job.district} on {job.date}: {status}")
+                entries.append(entry)
+            return entries
+        finally:
+            await loop.run_in_executor(executor, self._close_scrapers)
+            executor.shutdown(wait=True)
+
+    def run(self, states, districts=(), courts=(), start=None, days=1, report_dir="."):
+        """Expand the selection into jobs, run the ones not finished yet and write a report"""
+        started = time.time()
+        dates = working_days(start or datetime.now().date(), max(1, days))
+        try:
+            jobs, missing = expand_jobs(self.catalog, states, districts, courts, dates)
+            if missing and self.engine == "browser":
+                print(f"Reading {len(missing)} missing district/court lists into the catalog...")
+                self.refresh_catalog(missing)
+                jobs, missing = expand_jobs(self.catalog, states, districts, courts, dates)
+        except CatalogError as e:
+            print(f"✗ {str(e)}")
+            return None
+        for state, district in missing:
+            print(f"✗ No catalogued court complexes for {district or state or 'any state'} "
+                  f"(run --catalog-refresh with the browser engine)")
+
+        # A parsed cause list and its PDF on disk (both written atomically) are a finished court day
+        todo = jobs if self.refresh else [job for job in jobs if not job_done(job, self.pdf_mode)]
+        if self.journal is not None:
+            self._run = self.journal.begin("cause_list", [job_key(job) for job in jobs], self.max_attempts,
+                                           restart=self.restart or self.refresh)
+            pending = set(todo)
+            for job in jobs:
+                if job not in pending:
+                    self._run.finish(job_key(job), job_key(job))
+            unfinished = set(self._run.todo())
+            todo = [job for job in todo if job_key(job) in unfinished]
+        print("\n" + "="*60)
+        print(f"CAUSE LIST FAN-OUT - {len(jobs)} court days ({len(jobs) - len(todo)} already done or given up)")
+        print("="*60)
+        print(f"{self.workers} sessions, at most {self.per_host} at a time on {self.host}")
+
+        own_broker = self.captcha_broker is None
+        if own_broker:
+            self.captcha_broker = CaptchaBroker()
+        try:
+            entries = asyncio.run(self.run_async(todo)) if todo else []
+        finally:
+            if own_broker:
+                self.captcha_broker.close()
+                self.captcha_broker = None
+
+        report = {
+            "generated": datetime.now().isoformat(),
+            "seconds": round(time.time() - started, 2),
+            "dates": [day.strftime("%d-%m-%Y") for day in dates],
+            "total": len(jobs),
+            "skipped": len(jobs) - len(todo),
+            "downloaded": [
+                dict(entry["job"]._asdict(), rows_path=entry["result"]["rows_path"],
+                     cases_found=entry["result"]["cases_found"], attempts=entry["attempts"])
+                for entry in entries if entry["result"]
+            ],
+            "failed": [
+                dict(entry["job"]._asdict(), error=entry["error"], attempts=entry["attempts"])
+                for entry in entries if not entry["result"]
+            ],
+            "missing": [{"state": state, "district": district} for state, district in missing],
+            "metrics": METRICS.summary(),
+        }
+        if self._run is not None:
+            report["journal"] = dict(self._run.counts(), run_id=self._run.run_id)
+        os.makedirs(report_dir, exist_ok=True)
+        filename = os.path.join(report_dir, f"cause_list_fanout_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+        save_to_file(report, filename)
+        print_fanout_report(report)
+        return report
+
+
+def print_fanout_report(report):
+    """Print the summary of a fan-out run"""
+    print("\n" + "="*60)
+    print(f"CAUSE LISTS - {', '.join(report['dates'])}")
+    print("="*60)
+    for line in report["failed"]:
+        print(f"✗ {line['court_complex']}, {line['district']} on {line['date']}: {line['error']} "
+              f"({line['attempts']} attempts)")
+    cases = sum(line["cases_found"] for line in report["downloaded"])
+    print(f"\n{len(report['downloaded'])} downloaded ({cases} cases), {report['skipped']} skipped, "
+          f"{len(report['failed'])} failed in {report['seconds']:.0f}s")
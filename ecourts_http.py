@@ -0,0 +1,321 @@
+"""Browserless fetch engine that talks to the eCourts form/AJAX endpoints directly"""
+import os
+import re
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import lxml.html
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ecourts_scraper import ECourtsScraper, load_history_fragment, element_text
+from ecourts_metrics import METRICS
+from ecourts_captcha import CaptchaTimeout
+from ecourts_catalog import OptionCatalog, CatalogError, CAUSE_LIST_LEVELS
+
+BASE_URL = "https://services.ecourts.gov.in/ecourtindia_v6/"
+
+# Portal endpoints, relative to BASE_URL
+CAPTCHA_PATH = "vendor/securimage/securimage_show.php"
+CNR_SEARCH_PATH = "?p=cnr_status/searchByCNR/"
+CASE_SEARCH_PATH = "?p=casestatus/submit_case_no"
+CAUSE_LIST_PATH = "?p=cause_list/submitCauseList"
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+APP_TOKEN_RE = re.compile(r'''app_token["']?\s*(?:value=|[:=])\s*["']([0-9a-fA-F]+)["']''')
+
+
+class HTTPScraper(ECourtsScraper):
+    """Same interface as ECourtsScraper, backed by a pooled requests.Session
+
+    Parsing, PDF creation and listing checks are inherited unchanged; only
+    the fetch path differs.
+    """
+
+    def __init__(self, base_url=BASE_URL, captcha_prompt=None, pool_size=10, timeout=30, pdf_mode="inline",
+                 captcha_broker=None, catalog=None, changes=None, captcha_timeout=None):
+        self.captcha_prompt = captcha_prompt
+        self.captcha_broker = captcha_broker
+        self.captcha_timeout = captcha_timeout
+        self.captcha_waiting_since = None
+        self.pdf_mode = pdf_mode
+        self.catalog = catalog or OptionCatalog()
+        self.changes = changes
+        self.last_error = None
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        self.timeout = timeout
+        self.driver = None
+        self.waits = None
+        self.app_token = None
+
+        # Keep-alive connection pool with retries on transient gateway errors
+        self.session = requests.Session()
+        retry = Retry(total=2, backoff_factor=0.5, status_forcelist=[502, 503, 504],
+                      allowed_methods=["GET", "POST"])
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update({
+            "User-Agent": USER_AGENT,
+            "Referer": self.base_url,
+        })
+
+        self.download_dir = os.path.join(os.getcwd(), "downloads")
+        os.makedirs("downloads", exist_ok=True)
+
+    def _url(self, path):
+        return self.base_url + path
+
+    def _update_token(self, text):
+        """Pick up the app_token from a page or JSON response"""
+        match = APP_TOKEN_RE.search(text)
+        if match:
+            self.app_token = match.group(1)
+
+    @METRICS.timed("page_load")
+    def load_form(self):
+        """Open the search page to get session cookies and the app token"""
+        response = self.session.get(self.base_url, timeout=self.timeout)
+        response.raise_for_status()
+        self._update_token(response.text)
+        return response.text
+
+    def captcha_image(self):
+        """Download a fresh CAPTCHA image for this session (PNG bytes)"""
+        response = self.session.get(self._url(CAPTCHA_PATH), timeout=self.timeout)
+        response.raise_for_status()
+        return response.content
+
+    def fetch_captcha_image(self):
+        """Download the CAPTCHA image for this session and return its path"""
+        filepath = os.path.join(self.download_dir, f"captcha_{os.getpid()}_{id(self):x}.png")
+        with open(filepath, "wb") as f:
+            f.write(self.captcha_image())
+        return filepath
+
+    def request_captcha(self, label="", retry_of=None):
+        """Fetch a fresh CAPTCHA and hand it to the broker (or the console prompt)"""
+        if self.captcha_broker is None:
+            # The console prompt needs the image on disk to be read
+            print(f"CAPTCHA image saved to: {self.fetch_captcha_image()}")
+        return super().request_captcha(label, retry_of)
+
+    @METRICS.timed("search_request")
+    def _post(self, path, data):
+        """POST an AJAX form and return the decoded JSON (or raw text)"""
+        data = dict(data, ajax_req="true")
+        if self.app_token:
+            data["app_token"] = self.app_token
+        response = self.session.post(
+            self._url(path),
+            data=data,
+            headers={"X-Requested-With": "XMLHttpRequest"},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        self._update_token(response.text)
+        try:
+            return response.json()
+        except ValueError:
+            return response.text
+
+    @staticmethod
+    def _error_message(payload):
+        """Return the portal's error text from a JSON response, if any"""
+        if isinstance(payload, dict):
+            for key in ("errormsg", "error", "msg"):
+                if payload.get(key):
+                    # bs4 is only needed on this (error) path
+                    from bs4 import BeautifulSoup
+                    return BeautifulSoup(str(payload[key]), "html.parser").get_text(" ", strip=True)
+        return None
+
+    @staticmethod
+    def _extract_history(payload):
+        """Return the #history_cnr element from a search response"""
+        if isinstance(payload, dict):
+            fragments = [v for v in payload.values() if isinstance(v, str) and "<" in v]
+            html = next((f for f in fragments if "history_cnr" in f), None)
+            if html is None:
+                html = next((f for f in fragments if "<table" in f), "")
+        else:
+            html = payload or ""
+
+        return load_history_fragment(html)
+
+    def _search(self, path, form_data, captcha_field, ticket=None, label=""):
+        """Submit a search with CAPTCHA retries and return the history div"""
+        payload = self._submit(path, form_data, captcha_field, ticket, label)
+        return None if payload is None else self._extract_history(payload)
+
+    def _submit(self, path, form_data, captcha_field, ticket=None, label=""):
+        """Submit a CAPTCHA-protected form with retries and return the response payload"""
+        for attempt in range(3):
+            if ticket is None:
+                ticket = self.request_captcha(label)
+            try:
+                form_data[captcha_field] = self.wait_for_captcha(ticket)
+            except CaptchaTimeout as e:
+                print(f"✗ {str(e)}")
+                self.last_error = e
+                return None
+            payload = self._post(path, form_data)
+            print(f"Attempt {attempt + 1}: Submitted CAPTCHA")
+
+            error = self._error_message(payload)
+            if error and ("captcha" in error.lower() or "invalid" in error.lower()):
+                print(f"Error: {error}")
+                if attempt < 2:
+                    print("Invalid CAPTCHA, retrying...")
+                    METRICS.count("captcha_retries")
+                    # The new image goes to the front of the CAPTCHA queue
+                    ticket = self.request_captcha(label, retry_of=ticket)
+                    continue
+                return None
+            if error:
+                print(f"Error: {error}")
+                return None
+
+            print("CAPTCHA accepted! Loading results...")
+            return payload
+        return None
+
+    def fetch_case_by_cnr(self, cnr_full):
+        """Fetch case details using CNR number"""
+        try:
+            self.load_form()
+            print(f"Searching for CNR: {cnr_full}")
+
+            history_div = self._search(CNR_SEARCH_PATH, {"cino": cnr_full}, "fcaptcha_code", label=cnr_full)
+            if history_div is None or not element_text(history_div, strip=True):
+                print("No case details found")
+                METRICS.count("empty_results")
+                return None
+
+            case_data = self.parse_case_details(history_div, cnr_full)
+
+            METRICS.count("cases_fetched")
+
+            # Create PDF from case data
+            return self.attach_pdf(case_data)
+
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            self.last_error = e
+            METRICS.count("errors")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    def _case_type_value(self, form_html, case_type):
+        """Resolve a case type against the form's options through the catalog, like the browser path"""
+        scope = (urlsplit(self.base_url).netloc,)
+        tree = lxml.html.fromstring(form_html)
+        options = [[option.get("value", ""), option.text_content().strip()]
+                   for option in tree.xpath('//select[@id="case_type"]/option')]
+        options = self.catalog.update("case_type", scope, options)
+        if not options:
+            # No dropdown on this form: the portal takes the case type as typed
+            return case_type
+        return self.catalog.resolve("case_type", case_type, scope, "case type", options)[0]
+
+    def fetch_case_by_details(self, case_type, case_number, case_year):
+        """Fetch case details using case type, number, and year"""
+        try:
+            form_html = self.load_form()
+            # A bad case type fails here, before a CAPTCHA is asked for
+            case_type_value = self._case_type_value(form_html, case_type)
+            # Queue the CAPTCHA first; it is answered while the form is prepared
+            label = f"{case_type}/{case_number}/{case_year}"
+            ticket = self.request_captcha(label)
+            form_data = {
+                "case_type": case_type_value,
+                "case_no": case_number,
+                "rgyear": case_year,
+            }
+            print(f"Searching for Case: {label}")
+
+            history_div = self._search(CASE_SEARCH_PATH, form_data, "fcaptcha_code", ticket, label)
+            if history_div is None or not element_text(history_div, strip=True):
+                print("No case details found")
+                METRICS.count("empty_results")
+                return None
+
+            # Extract CNR if available
+            cnr_match = re.search(r'CNR No[.:]\s*([A-Z0-9]+)', element_text(history_div))
+            cnr_full = cnr_match.group(1) if cnr_match else f"{case_type}{case_number}{case_year}"
+
+            case_data = self.parse_case_details(history_div, cnr_full)
+
+            METRICS.count("cases_fetched")
+
+            # Create PDF from case data
+            return self.attach_pdf(case_data)
+
+        except CatalogError as e:
+            print(f"✗ {str(e)}")
+            return None
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            self.last_error = e
+            METRICS.count("errors")
+            import traceback
+            traceback.print_exc()
+            return None
+
+    def request_cause_list(self, form_data, date, label=""):
+        """Submit the cause list form (option values by select id) and return the list HTML, or None"""
+        self.load_form()
+        form_data = dict(form_data, causelist_date=date)
+        payload = self._submit(CAUSE_LIST_PATH, form_data, "fcaptcha_code", label=label)
+        if payload is None:
+            return None
+        if isinstance(payload, dict):
+            return next((v for v in payload.values() if isinstance(v, str) and "<" in v), "")
+        return payload
+
+    def download_cause_list(self, state=None, district=None, court_complex=None, date=None):
+        """Download one court complex's cause list through the form endpoint
+
+        The form takes option values, so every level has to be in the
+        catalog (--catalog-refresh reads them with the browser engine).
+        """
+        if not (state and district and court_complex):
+            print("Manual cause list selection is only available with the browser engine")
+            return None
+        try:
+            date = date or datetime.now().strftime("%d-%m-%Y")
+            resolved = self.catalog.resolve_levels((state, district, court_complex))
+            if not all(resolved):
+                message = (f"{state} → {district} → {court_complex} is not in the catalog yet "
+                           f"(run --catalog-refresh with the browser engine)")
+                print(f"✗ {message}")
+                return {"status": "error", "message": message}
+
+            form_data = {select_id: match[0] for (select_id, _), match in zip(CAUSE_LIST_LEVELS, resolved)}
+            print(f"Requesting cause list for: {state} → {district} → {court_complex} on {date}")
+
+            html = self.request_cause_list(form_data, date, label=f"{court_complex} {date}")
+            if html is None:
+                return {"status": "error", "message": "Cause list request failed"}
+            return self.save_cause_list(html, state, district, court_complex, date)
+
+        except CatalogError as e:
+            print(f"✗ {str(e)}")
+            return {"status": "error", "message": str(e)}
+        except Exception as e:
+            print(f"Error downloading cause list: {str(e)}")
+            self.last_error = e
+            return {"status": "error", "message": str(e)}
+
+    def close(self):
+        """Close the HTTP connection pool"""
+        try:
+            self.session.close()
+        except Exception:
+            pass
@@ -0,0 +1,182 @@
+"""Hearing date normalization and a persistent date -> CNR index over stored cases"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import date, datetime
+
+DEFAULT_INDEX_PATH = os.path.join("downloads", "date_index.db")
+
+DATE_RE = re.compile(r'\b(\d{1,2})[-/.](\d{1,2})[-/.](\d{4})\b|\b(\d{4})-(\d{2})-(\d{2})\b')
+
+# Keys / column headers whose dates are hearing (listing) dates
+HEARING_HEADER_RE = re.compile(r'hearing|next date|listed|business on date', re.IGNORECASE)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    cnr_number TEXT PRIMARY KEY,
+    next_hearing_date TEXT,
+    court TEXT,
+    serial_number TEXT,
+    source TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS hearing_dates (
+    hearing_date TEXT NOT NULL,
+    cnr_number TEXT NOT NULL,
+    PRIMARY KEY (hearing_date, cnr_number)
+);
+CREATE INDEX IF NOT EXISTS idx_hearing_dates_cnr ON hearing_dates (cnr_number);
+"""
+
+
+def parse_portal_date(text):
+    """First date in text as a datetime.date (dd-mm-yyyy, dd/mm/yyyy or yyyy-mm-dd)"""
+    if not text:
+        return None
+    for match in DATE_RE.finditer(str(text)):
+        try:
+            if match.group(1):
+                return date(int(match.group(3)), int(match.group(2)), int(match.group(1)))
+            return date(int(match.group(4)), int(match.group(5)), int(match.group(6)))
+        except ValueError:
+            continue
+    return None
+
+
+def case_hearing_dates(case_data):
+    """Set of datetime.date objects a case is (or was) listed on
+
+    Uses the normalized hearing_dates saved by parse_case_details; older
+    records without them fall back to the listing info and the hearing
+    fields of case_details.
+    """
+    dates = set()
+    if "hearing_dates" in case_data:
+        for value in case_data["hearing_dates"]:
+            parsed = parse_portal_date(value)
+            if parsed:
+                dates.add(parsed)
+    else:
+        for key, value in case_data.get("case_details", {}).items():
+            if HEARING_HEADER_RE.search(key):
+                parsed = parse_portal_date(value)
+                if parsed:
+                    dates.add(parsed)
+
+    next_hearing = parse_portal_date(case_data.get("listing_info", {}).get("next_hearing_date"))
+    if next_hearing:
+        dates.add(next_hearing)
+    return dates
+
+
+class DateIndex:
+    """SQLite inverted index from hearing date to the CNRs listed that day"""
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def add_case(self, case_data, source=None, commit=True):
+        """Index (or re-index) one case's hearing dates"""
+        cnr = case_data.get("cnr_number")
+        if not cnr:
+            return
+        listing_info = case_data.get("listing_info", {})
+        next_hearing = parse_portal_date(listing_info.get("next_hearing_date"))
+        dates = sorted(day.isoformat() for day in case_hearing_dates(case_data))
+        with self._lock:
+            self.conn.execute("DELETE FROM hearing_dates WHERE cnr_number = ?", (cnr,))
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO hearing_dates (hearing_date, cnr_number) VALUES (?, ?)",
+                [(day, cnr) for day in dates]
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO cases "
+                "(cnr_number, next_hearing_date, court, serial_number, source, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (cnr, next_hearing.isoformat() if next_hearing else None, listing_info.get("court"),
+                 listing_info.get("serial_number"), source, time.time())
+            )
+            if commit:
+                self.conn.commit()
+
+    def cases_on(self, day):
+        """Cases listed on a date: list of dicts with CNR, court and serial number"""
+        if isinstance(day, (date, datetime)):
+            day = day.isoformat()[:10]
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT h.cnr_number, c.next_hearing_date, c.court, c.serial_number, c.source "
+                "FROM hearing_dates h LEFT JOIN cases c ON c.cnr_number = h.cnr_number "
+                "WHERE h.hearing_date = ? ORDER BY h.cnr_number",
+                (day,)
+            ).fetchall()
+        results = []
+        for cnr, next_hearing, court, serial, source in rows:
+            # Serial number and court only describe the next listing
+            is_next = next_hearing == day
+            results.append({
+                "cnr_number": cnr,
+                "court": court if is_next else None,
+                "serial_number": serial if is_next else None,
+                "source": source,
+            })
+        return results
+
+    def next_hearings(self, cnrs):
+        """Known next hearing dates for the given CNRs, as {cnr: date}"""
+        wanted = set(cnrs)
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT cnr_number, next_hearing_date FROM cases WHERE next_hearing_date IS NOT NULL"
+            ).fetchall()
+        return {cnr: parse_portal_date(day) for cnr, day in rows if cnr in wanted}
+
+    def rebuild(self, json_files):
+        """Re-index from stored case JSON files (oldest first, so the newest wins)"""
+        json_files = sorted(json_files, key=lambda path: os.path.getmtime(path))
+        indexed = 0
+        for json_path in json_files:
+            try:
+                with open(json_path, encoding='utf-8') as f:
+                    case_data = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Skipping {json_path}: {str(e)}")
+                continue
+            if isinstance(case_data, dict) and case_data.get("cnr_number"):
+                self.add_case(case_data, source=json_path, commit=False)
+                indexed += 1
+        with self._lock:
+            self.conn.commit()
+        return indexed
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def print_listed_on(results, day):
+    """Print the cases the index has listed on a date"""
+    print("\n" + "="*50)
+    print(f"CASES LISTED ON {day}")
+    print("="*50)
+    if not results:
+        print("✗ No stored cases are listed on this date")
+        return
+    for result in results:
+        line = f"✓ {result['cnr_number']}"
+        if result["serial_number"]:
+            line += f"  Serial Number: {result['serial_number']}"
+        if result["court"]:
+            line += f"  Court Name: {result['court']}"
+        print(line)
+    print(f"\n{len(results)} cases listed on {day}")
@@ -0,0 +1,195 @@
+"""Crash-safe job journal: the state of every input of a batch, schedule or fan-out run
+
+Each run's inputs (CNRs, or court complex/day cause list jobs) are written
+to a SQLite journal as pending before any work starts. A job is marked
+in flight, with its attempt counted, before it is handed to a session, and
+done only once its result is saved; failures keep their reason. Running
+the same inputs again after a crash resumes the unfinished run: done jobs
+are skipped, and failed or interrupted ones are tried again until they
+reach the attempt limit. A run with nothing left to do is started afresh.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+DEFAULT_JOURNAL_PATH = os.path.join("downloads", "journal.db")
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+STATES = (PENDING, IN_FLIGHT, DONE, FAILED)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    run_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    reason TEXT,
+    result TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (run_id, key)
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_run_state ON jobs (run_id, state);
+"""
+
+# Jobs of a run that still need work under an attempt limit
+UNFINISHED = "(state IN ('pending', 'in_flight') OR (state = 'failed' AND attempts < ?))"
+
+
+def run_id(kind, keys):
+    """Identity of a run: the same inputs in the same order give the same run"""
+    digest = hashlib.sha256("\n".join(keys).encode("utf-8")).hexdigest()
+    return f"{kind}:{digest[:16]}"
+
+
+class JobJournal:
+    """SQLite write-ahead record of job states, shared by threads and worker processes"""
+
+    def __init__(self, path=DEFAULT_JOURNAL_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Batch worker processes write to the same file through their own connections
+        self.conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def begin(self, kind, keys, max_attempts=3, restart=False):
+        """Resume the unfinished run of these inputs, or start a new one"""
+        keys = list(dict.fromkeys(keys))
+        run = JournalRun(self, run_id(kind, keys), max_attempts)
+        with self._lock:
+            known = self.conn.execute("SELECT 1 FROM runs WHERE id = ?", (run.run_id,)).fetchone()
+            unfinished = known and self.conn.execute(
+                f"SELECT COUNT(*) FROM jobs WHERE run_id = ? AND {UNFINISHED}", (run.run_id, max_attempts)
+            ).fetchone()[0]
+            if unfinished and not restart:
+                # Jobs cut off by the crash go back to pending; their lost attempt is not held against them
+                self.conn.execute(
+                    "UPDATE jobs SET state = 'pending', attempts = MAX(attempts - 1, 0), reason = 'interrupted' "
+                    "WHERE run_id = ? AND state = 'in_flight'", (run.run_id,)
+                )
+                self.conn.commit()
+                run.resumed = True
+                return run
+
+            now = time.time()
+            self.conn.execute("DELETE FROM jobs WHERE run_id = ?", (run.run_id,))
+            self.conn.execute("INSERT OR REPLACE INTO runs (id, kind, total, started_at) VALUES (?, ?, ?, ?)",
+                              (run.run_id, kind, len(keys), now))
+            self.conn.executemany(
+                "INSERT INTO jobs (run_id, key, position, state, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(run.run_id, key, position, PENDING, now) for position, key in enumerate(keys)]
+            )
+            self.conn.commit()
+        return run
+
+    def attach(self, run_id, max_attempts=3):
+        """An existing run, e.g. from a worker process that opened its own journal"""
+        return JournalRun(self, run_id, max_attempts)
+
+    def _set(self, run_id, key, state, count_attempt=False, reason=None, result=None):
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET state = ?, attempts = attempts + ?, reason = ?, "
+                "result = COALESCE(?, result), updated_at = ? WHERE run_id = ? AND key = ?",
+                (state, 1 if count_attempt else 0, reason, result, time.time(), run_id, key)
+            )
+            self.conn.commit()
+
+    def _query(self, sql, params):
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class JournalRun:
+    """The jobs of one run in a JobJournal"""
+
+    def __init__(self, journal, run_id, max_attempts=3):
+        self.journal = journal
+        self.run_id = run_id
+        self.max_attempts = max(1, max_attempts)
+        # True when an interrupted run was picked up again
+        self.resumed = False
+
+    @property
+    def ref(self):
+        """(journal path, run id, attempt limit) for reattaching in another process"""
+        return self.journal.path, self.run_id, self.max_attempts
+
+    def todo(self):
+        """Keys still to work on, in input order: pending, interrupted, or failed with attempts left"""
+        rows = self.journal._query(
+            f"SELECT key FROM jobs WHERE run_id = ? AND {UNFINISHED} ORDER BY position",
+            (self.run_id, self.max_attempts)
+        )
+        return [row[0] for row in rows]
+
+    def retryable(self):
+        """Failed keys that have attempts left"""
+        rows = self.journal._query(
+            "SELECT key FROM jobs WHERE run_id = ? AND state = 'failed' AND attempts < ? ORDER BY position",
+            (self.run_id, self.max_attempts)
+        )
+        return [row[0] for row in rows]
+
+    def attempts(self, key):
+        """Attempts made so far on a key, across restarts"""
+        rows = self.journal._query("SELECT attempts FROM jobs WHERE run_id = ? AND key = ?", (self.run_id, key))
+        return rows[0][0] if rows else 0
+
+    def start(self, key):
+        """Mark a job in flight before it is handed to a session (counts an attempt)"""
+        self.journal._set(self.run_id, key, IN_FLIGHT, count_attempt=True)
+
+    def finish(self, key, result=None):
+        """Mark a job done once its result is saved (result: where it went)"""
+        self.journal._set(self.run_id, key, DONE, result=result)
+
+    def fail(self, key, reason):
+        self.journal._set(self.run_id, key, FAILED, reason=reason)
+
+    def done(self):
+        """{key: result} of the jobs already done"""
+        rows = self.journal._query(
+            "SELECT key, result FROM jobs WHERE run_id = ? AND state = 'done' ORDER BY position", (self.run_id,)
+        )
+        return dict(rows)
+
+    def failed(self):
+        """(key, attempts, reason) of failed jobs"""
+        return self.journal._query(
+            "SELECT key, attempts, reason FROM jobs WHERE run_id = ? AND state = 'failed' ORDER BY position",
+            (self.run_id,)
+        )
+
+    def counts(self):
+        """Number of jobs in each state"""
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(self.journal._query(
+            "SELECT state, COUNT(*) FROM jobs WHERE run_id = ? GROUP BY state", (self.run_id,)
+        ))
+        return counts
+
+    def format_summary(self):
+        counts = self.counts()
+        return (f"Journal {self.run_id}: {counts[DONE]} done, {counts[FAILED]} failed, "
+                f"{counts[PENDING] + counts[IN_FLIGHT]} unfinished")
@@ -0,0 +1,226 @@
+"""Per-stage timers and counters, summarized as percentiles and exported as JSON / Prometheus text
+
+Count, total and max of a stage are exact. Percentiles come from a fixed-size
+uniform sample of its durations (exact until a stage has more samples than
+that), so a long-running service keeps flat memory and cheap summaries.
+"""
+import functools
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+QUANTILES = (0.5, 0.95, 0.99)
+PROMETHEUS_PREFIX = "ecourts"
+# Durations kept per stage for the percentiles
+RESERVOIR_SIZE = 2048
+
+
+def percentile(sorted_values, q):
+    """Linear-interpolated quantile q (0..1) of an already sorted list"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q
+    low = math.floor(position)
+    high = math.ceil(position)
+    if low == high:
+        return sorted_values[low]
+    return sorted_values[low] + (sorted_values[high] - sorted_values[low]) * (position - low)
+
+
+class StageSamples:
+    """Running count, total and max of a stage, with a reservoir sample for percentiles"""
+
+    def __init__(self, size=RESERVOIR_SIZE):
+        self.size = size
+        self.values = []
+        self.count = 0
+        self.total = 0.0
+        self.max = None
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self.max = seconds if self.max is None else max(self.max, seconds)
+        if len(self.values) < self.size:
+            self.values.append(seconds)
+        else:
+            # Algorithm R: every sample so far stays in with the same probability
+            slot = random.randrange(self.count)
+            if slot < self.size:
+                self.values[slot] = seconds
+
+    def merge(self, data):
+        """Add the state of another StageSamples (as from to_dict)"""
+        count = self.count + data["count"]
+        values = data["values"]
+        if len(self.values) + len(values) > self.size:
+            # Keep each side in proportion to the samples it stands for
+            own = min(len(self.values), round(self.size * self.count / count))
+            values = random.sample(self.values, own) + random.sample(values, min(len(values), self.size - own))
+        else:
+            values = self.values + list(values)
+        self.values = values
+        self.count = count
+        self.total += data["total"]
+        if data["max"] is not None:
+            self.max = data["max"] if self.max is None else max(self.max, data["max"])
+
+    def to_dict(self):
+        return {"values": list(self.values), "count": self.count, "total": self.total, "max": self.max}
+
+
+class Metrics:
+    """Thread-safe registry of stage durations and event counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples = {}
+        self.counters = Counter()
+        self.started = time.time()
+
+    def observe(self, stage, seconds):
+        """Record one duration for a stage"""
+        with self._lock:
+            if stage not in self.samples:
+                self.samples[stage] = StageSamples()
+            self.samples[stage].add(seconds)
+
+    def count(self, name, amount=1):
+        """Increment a counter"""
+        with self._lock:
+            self.counters[name] += amount
+
+    @contextmanager
+    def timer(self, stage):
+        """Time the enclosed block as one sample of stage (recorded even if it raises)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def timed(self, stage):
+        """Decorator form of timer()"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def drain(self):
+        """Take (and clear) the raw samples, e.g. to ship them from a worker process"""
+        with self._lock:
+            snapshot = {"samples": {stage: samples.to_dict() for stage, samples in self.samples.items()},
+                        "counters": dict(self.counters)}
+            self.samples = {}
+            self.counters = Counter()
+        return snapshot
+
+    def merge(self, snapshot):
+        """Add samples drained from another process"""
+        if not snapshot:
+            return
+        with self._lock:
+            for stage, data in snapshot["samples"].items():
+                if stage not in self.samples:
+                    self.samples[stage] = StageSamples()
+                self.samples[stage].merge(data)
+            self.counters.update(snapshot["counters"])
+
+    def reset(self):
+        with self._lock:
+            self.samples = {}
+            self.counters = Counter()
+            self.started = time.time()
+
+    def summary(self):
+        """Per-stage count, total, mean, p50/p95/p99 and max, plus counters"""
+        with self._lock:
+            samples = {stage: (sorted(s.values), s.count, s.total, s.max) for stage, s in self.samples.items()}
+            counters = dict(self.counters)
+        elapsed = time.time() - self.started
+
+        stages = {}
+        for stage, (values, count, total, longest) in samples.items():
+            stats = {
+                "count": count,
+                "total": round(total, 4),
+                "mean": round(total / count, 4),
+            }
+            for q in QUANTILES:
+                stats[f"p{int(q * 100)}"] = round(percentile(values, q), 4)
+            stats["max"] = round(longest, 4)
+            stages[stage] = stats
+
+        cases = counters.get("cases_fetched", 0)
+        return {
+            "started": self.started,
+            "seconds": round(elapsed, 2),
+            "cases_per_minute": round(cases / elapsed * 60, 2) if elapsed > 0 else None,
+            "stages": stages,
+            "counters": counters,
+        }
+
+    def format_summary(self):
+        """Table of stage percentiles for the console"""
+        summary = self.summary()
+        lines = [f"{'stage':<28} {'n':>5} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'max s':>8}"]
+        for stage, stats in sorted(summary["stages"].items()):
+            lines.append(f"{stage:<28} {stats['count']:>5} {stats['p50']:>8.3f} {stats['p95']:>8.3f} "
+                         f"{stats['p99']:>8.3f} {stats['max']:>8.3f}")
+        if summary["counters"]:
+            lines.append("counters: " + ", ".join(f"{name}={value}"
+                                                  for name, value in sorted(summary["counters"].items())))
+        return "\n".join(lines)
+
+    def write_json(self, filepath):
+        """Write the summary as JSON"""
+        _write_atomic(filepath, json.dumps(self.summary(), indent=4))
+        return filepath
+
+    def prometheus_text(self):
+        """Summary in the Prometheus text exposition format"""
+        summary = self.summary()
+        name = f"{PROMETHEUS_PREFIX}_stage_seconds"
+        lines = [
+            f"# HELP {name} Time spent in each lookup stage.",
+            f"# TYPE {name} summary",
+        ]
+        for stage, stats in sorted(summary["stages"].items()):
+            for q in QUANTILES:
+                lines.append(f'{name}{{stage="{stage}",quantile="{q}"}} {stats[f"p{int(q * 100)}"]}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {stats["total"]}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {stats["count"]}')
+        for counter, value in sorted(summary["counters"].items()):
+            metric = f"{PROMETHEUS_PREFIX}_{counter}_total"
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {value}")
+        lines.append(f"# TYPE {PROMETHEUS_PREFIX}_run_seconds gauge")
+        lines.append(f"{PROMETHEUS_PREFIX}_run_seconds {summary['seconds']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, filepath):
+        """Write a node_exporter textfile (replaced atomically so it is never read half-written)"""
+        _write_atomic(filepath, self.prometheus_text())
+        return filepath
+
+
+def _write_atomic(filepath, text):
+    directory = os.path.dirname(filepath)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{filepath}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, filepath)
+
+
+# Process-wide registry used by the scraper, batch and scheduler
+METRICS = Metrics()
@@ -0,0 +1,312 @@
+"""Order and judgment PDFs: links from the case history, concurrent resumable downloads
+
+The order table of a case links each document through the portal's
+displayPdf('home/display_pdf&filename=...') handler. extract_orders reads
+those links while the case is parsed. OrderDownloader then fetches the
+PDFs with a pooled requests.Session that carries the scraper's session
+cookies (Selenium or HTTP engine): the display_pdf call that turns a link
+into a document URL runs one at a time, because the portal rotates its
+app token on every answer, and the file transfers run in parallel with a
+cap per host. Partial files are resumed with a Range request, and every
+finished file is hashed: a document already stored under the same
+SHA-256 is not kept twice.
+"""
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urljoin, urlsplit
+
+from ecourts_metrics import METRICS
+
+DEFAULT_ORDERS_DIR = os.path.join("downloads", "orders")
+PORTAL_URL = "https://services.ecourts.gov.in/ecourtindia_v6/"
+DEFAULT_WORKERS = 4
+DEFAULT_PER_HOST = 2
+CHUNK_SIZE = 64 * 1024
+
+DISPLAY_PDF_RE = re.compile(r'''displayPdf\(\s*['"]([^'"]+)['"]''')
+DATE_RE = re.compile(r'\d{1,2}-\d{1,2}-\d{4}')
+APP_TOKEN_RE = re.compile(r'''app_token["']?\s*(?:value=|[:=])\s*["']([0-9a-fA-F]+)["']''')
+
+APP_TOKEN_JS = "var el = document.getElementById('app_token'); return el ? el.value : null;"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    sha256 TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    stored_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS case_orders (
+    cnr_number TEXT NOT NULL,
+    order_key TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    url TEXT,
+    PRIMARY KEY (cnr_number, order_key)
+);
+"""
+
+
+def extract_orders(history_div):
+    """Orders linked from a #history_cnr element: number, date, title and displayPdf path"""
+    orders = []
+    for link in history_div.iter('a'):
+        match = DISPLAY_PDF_RE.search(link.get('onclick') or link.get('href') or "")
+        if not match:
+            continue
+        path = match.group(1)
+        row = next(link.iterancestors('tr'), None)
+        cells = [cell.text_content().strip() for cell in row.iter('td', 'th')] if row is not None else []
+        query = parse_qs(path.split("&", 1)[1]) if "&" in path else {}
+        orders.append({
+            "number": cells[0] if cells else str(len(orders) + 1),
+            "date": next((m.group(0) for m in map(DATE_RE.search, cells) if m), None),
+            "title": link.text_content().strip(),
+            "path": path,
+            "filename": query.get("filename", [None])[0],
+        })
+    return orders
+
+
+def order_key(order):
+    """Identity of an order document within its case"""
+    return order.get("filename") or order["path"]
+
+
+def order_filename(order):
+    """order_<number>_<date>.pdf, safe for any file system"""
+    parts = ["order", order.get("number") or "", (order.get("date") or "").replace("/", "-")]
+    return re.sub(r'[^A-Za-z0-9_-]+', '-', "_".join(part for part in parts if part)).strip("-") + ".pdf"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DocumentIndex:
+    """SQLite record of stored documents by checksum and of which order each one is"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def order_path(self, cnr, key):
+        """Stored file of an order already downloaded (None if not yet, or gone)"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT d.path, d.sha256 FROM case_orders o JOIN documents d ON d.sha256 = o.sha256 "
+                "WHERE o.cnr_number = ? AND o.order_key = ?", (cnr, key)
+            ).fetchone()
+        return row if row and os.path.exists(row[0]) else None
+
+    def add(self, cnr, key, url, path):
+        """Record a finished file; returns (stored path, sha256, True if it was a duplicate)"""
+        sha256 = file_sha256(path)
+        with self._lock:
+            row = self.conn.execute("SELECT path FROM documents WHERE sha256 = ?", (sha256,)).fetchone()
+            duplicate = bool(row) and os.path.exists(row[0]) and os.path.abspath(row[0]) != os.path.abspath(path)
+            if duplicate:
+                stored = row[0]
+            else:
+                stored = path
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO documents (sha256, path, size, stored_at) VALUES (?, ?, ?, ?)",
+                    (sha256, path, os.path.getsize(path), time.time())
+                )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO case_orders (cnr_number, order_key, sha256, url) VALUES (?, ?, ?, ?)",
+                (cnr, key, sha256, url)
+            )
+            self.conn.commit()
+        return stored, sha256, duplicate
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class OrderDownloader:
+    """Concurrent order PDF downloads over one pooled session with the portal cookies"""
+
+    def __init__(self, base_url=PORTAL_URL, cookies=(), app_token=None, user_agent=None,
+                 workers=DEFAULT_WORKERS, per_host=DEFAULT_PER_HOST, download_dir=DEFAULT_ORDERS_DIR, timeout=60):
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.base_url = base_url if base_url.endswith("/") else base_url + "/"
+        self.app_token = app_token
+        self.workers = max(1, workers)
+        self.per_host = max(1, per_host)
+        self.download_dir = download_dir
+        self.timeout = timeout
+        os.makedirs(download_dir, exist_ok=True)
+        self.index = DocumentIndex(os.path.join(download_dir, "documents.db"))
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.workers)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers["Referer"] = self.base_url
+        if user_agent:
+            self.session.headers["User-Agent"] = user_agent
+        for cookie in cookies:
+            self.session.cookies.set(cookie["name"], cookie["value"], domain=cookie.get("domain", ""),
+                                     path=cookie.get("path", "/"))
+
+        self._token_lock = threading.Lock()
+        self._host_limits = {}
+        self._host_lock = threading.Lock()
+
+    @classmethod
+    def from_scraper(cls, scraper, base_url=None, **kwargs):
+        """A downloader sharing a live scraper's portal session (cookies and app token)"""
+        driver = getattr(scraper, "driver", None)
+        if driver is not None:
+            if not driver.get_cookies():
+                driver.get(base_url or PORTAL_URL)
+            return cls(base_url or PORTAL_URL, driver.get_cookies(), driver.execute_script(APP_TOKEN_JS),
+                       driver.execute_script("return navigator.userAgent"), **kwargs)
+        if not scraper.session.cookies and not scraper.app_token:
+            scraper.load_form()
+        cookies = [{"name": c.name, "value": c.value, "domain": c.domain, "path": c.path}
+                   for c in scraper.session.cookies]
+        return cls(scraper.base_url, cookies, scraper.app_token, scraper.session.headers.get("User-Agent"),
+                   **kwargs)
+
+    def _host_limit(self, url):
+        host = urlsplit(url).netloc
+        with self._host_lock:
+            if host not in self._host_limits:
+                self._host_limits[host] = threading.BoundedSemaphore(self.per_host)
+            return self._host_limits[host]
+
+    def document_url(self, order):
+        """Ask the portal's display_pdf handler where the order's PDF is"""
+        # The app token changes with every answer, so these calls take turns
+        with self._token_lock:
+            data = {"ajax_req": "true"}
+            if self.app_token:
+                data["app_token"] = self.app_token
+            url = self.base_url + "?p=" + order["path"]
+            with self._host_limit(url):
+                response = self.session.post(url, data=data, headers={"X-Requested-With": "XMLHttpRequest"},
+                                             timeout=self.timeout)
+            response.raise_for_status()
+            match = APP_TOKEN_RE.search(response.text)
+            if match:
+                self.app_token = match.group(1)
+        if response.content.startswith(b"%PDF"):
+            # Served straight away: the handler URL is the document
+            return url
+        try:
+            payload = response.json()
+        except ValueError:
+            raise RuntimeError("display_pdf did not answer with a document")
+        location = payload.get("order") if isinstance(payload, dict) else None
+        if not location:
+            error = payload.get("errormsg") if isinstance(payload, dict) else None
+            raise RuntimeError(error or "no document for this order")
+        return urljoin(self.base_url, location)
+
+    def _transfer(self, url, target):
+        """Download url to target, resuming a partial file; returns True if it was resumed"""
+        part = target + ".part"
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        with self._host_limit(url):
+            with self.session.get(url, headers=headers, stream=True, timeout=self.timeout) as response:
+                if response.status_code == 416:
+                    # Nothing left to fetch: the partial file is complete
+                    resumed = True
+                else:
+                    response.raise_for_status()
+                    resumed = bool(offset) and response.status_code == 206
+                    with open(part, "ab" if resumed else "wb") as f:
+                        for chunk in response.iter_content(CHUNK_SIZE):
+                            f.write(chunk)
+        with open(part, "rb") as f:
+            if f.read(4) != b"%PDF":
+                os.remove(part)
+                raise RuntimeError("downloaded file is not a PDF")
+        return part, resumed
+
+    def download_order(self, cnr, order):
+        """Fetch one order PDF; returns a result entry"""
+        key = order_key(order)
+        result = {"cnr_number": cnr, "number": order.get("number"), "date": order.get("date")}
+        stored = self.index.order_path(cnr, key)
+        if stored:
+            result.update(status="exists", path=stored[0], sha256=stored[1])
+            return result
+        started = time.time()
+        try:
+            url = self.document_url(order)
+            target = os.path.join(self.download_dir, cnr, order_filename(order))
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            part, resumed = self._transfer(url, target)
+            os.replace(part, target)
+            path, sha256, duplicate = self.index.add(cnr, key, url, target)
+            if duplicate:
+                # The same document is already stored (e.g. under another case)
+                os.remove(target)
+                METRICS.count("orders_deduplicated")
+            else:
+                METRICS.count("orders_resumed" if resumed else "orders_downloaded")
+            status = "duplicate" if duplicate else ("resumed" if resumed else "downloaded")
+            result.update(status=status, path=path, sha256=sha256, bytes=os.path.getsize(path))
+        except Exception as e:
+            METRICS.count("order_errors")
+            result.update(status="failed", error=str(e))
+        METRICS.observe("order_download", time.time() - started)
+        return result
+
+    def download(self, cases):
+        """Fetch the orders of (cnr, orders) pairs concurrently; returns the result entries"""
+        jobs = [(cnr, order) for cnr, orders in cases for order in orders or ()]
+        if not jobs:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(jobs)),
+                                thread_name_prefix="ecourts-orders") as executor:
+            return list(executor.map(lambda job: self.download_order(*job), jobs))
+
+    def download_case(self, case_data):
+        """Fetch a case's orders and note each stored file in case_data["orders"]"""
+        orders = case_data.get("orders") or []
+        results = self.download(((case_data.get("cnr_number"), orders),))
+        for order, result in zip(orders, results):
+            if result.get("path"):
+                order["local_path"] = result["path"]
+                order["sha256"] = result["sha256"]
+        return results
+
+    def close(self):
+        self.session.close()
+        self.index.close()
+
+
+def print_order_results(results):
+    """Print what happened to each order document"""
+    print("\n" + "="*50)
+    print(f"ORDERS - {len(results)} documents")
+    print("="*50)
+    for result in results:
+        label = f"Order {result['number'] or '?'} ({result['date'] or 'no date'})"
+        if result["status"] == "failed":
+            print(f"✗ {label}: {result['error']}")
+        else:
+            print(f"✓ {label}: {result['status']} {result['path']}")
@@ -0,0 +1,448 @@
+"""Reusable PDF template for case reports and a process pool to render them"""
+import glob
+import json
+import os
+import textwrap
+import time
+from xml.sax.saxutils import escape
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib import colors
+
+from ecourts_metrics import METRICS
+from ecourts_causelist import iter_cause_list_rows
+
+# Cause list rows per Table: about one A4 page, so no table is split more than once
+CAUSE_LIST_CHUNK_ROWS = 30
+# Flowables generated ahead of the layout engine
+STORY_LOOKAHEAD = 4
+
+
+def clean_text(text, width):
+    """Collapse whitespace and wrap text longer than width"""
+    text = ' '.join(str(text).split())
+    if len(text) > width:
+        # Paragraph treats the newlines as spaces; wrapping only splits very long words
+        text = '\n'.join(textwrap.wrap(text, width=width))
+    return text
+
+
+def _grid_style(header_color, body_color):
+    """Table style shared by the case details and listing tables"""
+    return TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor(header_color)),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 9),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor(body_color)),
+        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
+        ('FONTSIZE', (0, 1), (-1, -1), 8),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 4),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+        ('TOPPADDING', (0, 0), (-1, -1), 3),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+    ])
+
+
+class CasePDFTemplate:
+    """Styles for the case report, built once and reused for every PDF"""
+
+    def __init__(self):
+        styles = getSampleStyleSheet()
+
+        self.title_style = ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=14,
+            spaceAfter=20,
+            alignment=1,
+            textColor=colors.darkblue,
+            fontName='Helvetica-Bold'
+        )
+
+        self.heading_style = ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=11,
+            spaceAfter=8,
+            spaceBefore=12,
+            textColor=colors.darkblue,
+            fontName='Helvetica-Bold'
+        )
+
+        # Style for table content with word wrap
+        self.table_style = ParagraphStyle(
+            'TableStyle',
+            parent=styles['Normal'],
+            fontSize=8,
+            leading=10,
+            wordWrap='LTR',
+            fontName='Helvetica'
+        )
+
+        self.bold_table_style = ParagraphStyle(
+            'BoldTableStyle',
+            parent=self.table_style,
+            fontName='Helvetica-Bold'
+        )
+
+        self.footer_style = ParagraphStyle(
+            'FooterStyle',
+            parent=styles['Italic'],
+            fontSize=7,
+            textColor=colors.grey,
+            alignment=1
+        )
+
+        self.details_table_style = _grid_style('#2c3e50', '#f8f9fa')
+        self.listing_table_style = _grid_style('#34495e', '#ecf0f1')
+
+    def build_story(self, case_data):
+        """Flowables for one case report"""
+        story = []
+
+        # Title
+        story.append(Paragraph("eCourts India - Case Details", self.title_style))
+        story.append(Spacer(1, 0.1*inch))
+
+        # Case Information Section
+        story.append(Paragraph("Case Information", self.heading_style))
+        story.append(Paragraph(f"<b>CNR Number:</b> {case_data.get('cnr_number', 'N/A')}", self.table_style))
+        story.append(Paragraph(f"<b>Search Date:</b> {case_data.get('search_date', 'N/A')}", self.table_style))
+        story.append(Spacer(1, 0.05*inch))
+
+        # Case Details Table
+        case_details = case_data.get('case_details', {})
+        if case_details:
+            story.append(Paragraph("Case Details", self.heading_style))
+
+            table_data = [[
+                Paragraph('<b>Field</b>', self.bold_table_style),
+                Paragraph('<b>Value</b>', self.bold_table_style)
+            ]]
+            for key, value in case_details.items():
+                if key and value:
+                    table_data.append([
+                        Paragraph(clean_text(key, 30), self.table_style),
+                        Paragraph(clean_text(value, 50), self.table_style)
+                    ])
+
+            if len(table_data) > 1:
+                case_table = Table(table_data, colWidths=[1.8*inch, 4.5*inch], repeatRows=1)
+                case_table.setStyle(self.details_table_style)
+                story.append(case_table)
+                story.append(Spacer(1, 0.1*inch))
+
+        # Listing Information
+        listing_info = case_data.get('listing_info', {})
+        if listing_info and any(listing_info.values()):
+            story.append(Paragraph("Hearing & Court Information", self.heading_style))
+
+            listing_data = [[
+                Paragraph('<b>Information</b>', self.bold_table_style),
+                Paragraph('<b>Details</b>', self.bold_table_style)
+            ]]
+            for key, value in listing_info.items():
+                if value:
+                    formatted_key = key.replace('_', ' ').title()
+                    listing_data.append([
+                        Paragraph(clean_text(formatted_key, 25), self.table_style),
+                        Paragraph(clean_text(value, 40), self.table_style)
+                    ])
+
+            if len(listing_data) > 1:
+                listing_table = Table(listing_data, colWidths=[2*inch, 4.3*inch], repeatRows=1)
+                listing_table.setStyle(self.listing_table_style)
+                story.append(listing_table)
+                story.append(Spacer(1, 0.1*inch))
+
+        # Additional Notes
+        story.append(Paragraph("Additional Information", self.heading_style))
+        notes = [
+            "• This document was automatically generated from eCourts India portal",
+            f"• Generated on: {datetime.now().strftime('%Y-%m-%d at %H:%M:%S')}",
+            "• For official purposes, please verify with the original court records",
+            "• Document ID: " + case_data.get('cnr_number', 'N/A')
+        ]
+        for note in notes:
+            story.append(Paragraph(note, self.table_style))
+            story.append(Spacer(1, 0.02*inch))
+
+        # Footer
+        story.append(Spacer(1, 0.1*inch))
+        story.append(Paragraph("<i>Confidential - Generated by eCourts Scraper System</i>", self.footer_style))
+        return story
+
+    def render(self, case_data, filepath):
+        """Write the case report to filepath"""
+        doc = SimpleDocTemplate(
+            filepath,
+            pagesize=A4,
+            topMargin=0.5*inch,
+            bottomMargin=0.5*inch,
+            leftMargin=0.4*inch,
+            rightMargin=0.4*inch
+        )
+        doc.build(self.build_story(case_data))
+        return filepath
+
+
+# One template per process, created on first use
+_template = None
+
+
+def get_template():
+    """Return this process's shared CasePDFTemplate"""
+    global _template
+    if _template is None:
+        _template = CasePDFTemplate()
+    return _template
+
+
+class LazyStory(list):
+    """Story that pulls flowables from an iterator as the layout engine consumes them
+
+    doc.build() takes flowables off the front of its list and checks the
+    list's length before each one, so topping the list up there keeps
+    only a few flowables alive however long the document is.
+    """
+
+    def __init__(self, flowables, lookahead=STORY_LOOKAHEAD):
+        super().__init__()
+        self._source = iter(flowables)
+        self._lookahead = lookahead
+
+    def __len__(self):
+        while self._source is not None and list.__len__(self) < self._lookahead:
+            flowable = next(self._source, None)
+            if flowable is None:
+                self._source = None
+            else:
+                self.append(flowable)
+        return list.__len__(self)
+
+
+class CauseListPDFTemplate:
+    """Cause list PDF layout: rows streamed into page-sized tables
+
+    The paragraph styles, the table style and the header row are built
+    once and shared by every table of every cause list.
+    """
+
+    col_widths = [0.45*inch, 1.5*inch, 1.35*inch, 2.6*inch, 1.5*inch]
+
+    def __init__(self, case_template=None):
+        case_template = case_template or get_template()
+        self.title_style = case_template.title_style
+        self.text_style = case_template.table_style
+        self.footer_style = case_template.footer_style
+        self.court_style = ParagraphStyle(
+            'CourtHeading',
+            parent=case_template.heading_style,
+            keepWithNext=1
+        )
+        self.rows_table_style = _grid_style('#2c3e50', '#f8f9fa')
+        self.header_row = [
+            Paragraph(f'<b>{label}</b>', case_template.bold_table_style)
+            for label in ("Sr.", "Case Number", "CNR", "Parties", "Advocate")
+        ]
+
+    def _table(self, rows):
+        table = Table([self.header_row] + rows, colWidths=self.col_widths, repeatRows=1)
+        table.setStyle(self.rows_table_style)
+        return table
+
+    def _row(self, row):
+        # Short fields stay plain strings; only the long ones need a wrapping Paragraph
+        return [
+            row.serial_number,
+            clean_text(row.case_number, 24),
+            row.cnr_number or "",
+            Paragraph(escape(clean_text(row.parties, 60)), self.text_style),
+            Paragraph(escape(clean_text(row.advocate, 30)), self.text_style)
+        ]
+
+    def iter_flowables(self, cause_list_data, rows, chunk_rows=CAUSE_LIST_CHUNK_ROWS):
+        """Flowables for a cause list, generated as the rows are read"""
+        yield Paragraph("eCourts India - Cause List", self.title_style)
+        yield Spacer(1, 0.1*inch)
+        for label, key in (("State", "state"), ("District", "district"),
+                           ("Court Complex", "court_complex"), ("Date", "date"), ("URL", "url")):
+            if cause_list_data.get(key):
+                yield Paragraph(f"<b>{label}:</b> {escape(str(cause_list_data[key]))}", self.text_style)
+        yield Paragraph(f"<b>Generated on:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", self.text_style)
+        yield Spacer(1, 0.1*inch)
+
+        # One table per chunk of rows, and a heading whenever the court changes
+        court, chunk, count = None, [], 0
+        for row in rows:
+            if row.court != court or not count:
+                if chunk:
+                    yield self._table(chunk)
+                    chunk = []
+                court = row.court
+                if court:
+                    yield Paragraph(escape(court), self.court_style)
+            chunk.append(self._row(row))
+            count += 1
+            if len(chunk) >= chunk_rows:
+                yield self._table(chunk)
+                chunk = []
+        if chunk:
+            yield self._table(chunk)
+
+        yield Spacer(1, 0.1*inch)
+        if count:
+            yield Paragraph(f"<b>Cases listed:</b> {count}", self.text_style)
+        else:
+            yield Paragraph("No case rows could be read from this cause list page.", self.text_style)
+        yield Paragraph(
+            "<i>Note: This is an automatically generated document from the eCourts portal. "
+            "For official purposes, please refer to the original website.</i>",
+            self.footer_style
+        )
+
+    def render(self, cause_list_data, filepath):
+        """Write the cause list to filepath, one page of rows in memory at a time"""
+        doc = SimpleDocTemplate(
+            filepath,
+            pagesize=A4,
+            topMargin=0.5*inch,
+            bottomMargin=0.5*inch,
+            leftMargin=0.4*inch,
+            rightMargin=0.4*inch
+        )
+        rows = iter_cause_list_rows(cause_list_data.get("content"),
+                                    default_court=cause_list_data.get("court_complex"))
+        doc.build(LazyStory(self.iter_flowables(cause_list_data, rows)))
+        return filepath
+
+
+_cause_list_template = None
+
+
+def get_cause_list_template():
+    """Return this process's shared CauseListPDFTemplate"""
+    global _cause_list_template
+    if _cause_list_template is None:
+        _cause_list_template = CauseListPDFTemplate()
+    return _cause_list_template
+
+
+@METRICS.timed("cause_list_pdf")
+def render_cause_list_pdf(cause_list_data, filepath):
+    """Write the parsed rows of a cause list page to a PDF; returns its path"""
+    return get_cause_list_template().render(cause_list_data, filepath)
+
+
+def case_pdf_path(case_data, download_dir):
+    """File name for a case report: case_<CNR>_<timestamp>.pdf"""
+    cnr = case_data.get('cnr_number', 'unknown_case')
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    return os.path.join(download_dir, f"case_{cnr}_{timestamp}.pdf")
+
+
+@METRICS.timed("pdf")
+def render_case_pdf(case_data, download_dir):
+    """Create the PDF for one case; returns its path or None on failure"""
+    try:
+        if not case_data:
+            return None
+        filepath = get_template().render(case_data, case_pdf_path(case_data, download_dir))
+        print(f"✓ PDF created successfully: {filepath}")
+        return filepath
+    except Exception as e:
+        print(f"Error creating PDF: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return None
+
+
+class PDFRenderPool:
+    """Renders case PDFs in worker processes so fetching never waits on reportlab"""
+
+    def __init__(self, workers=None, download_dir=None):
+        self.download_dir = download_dir or os.path.join(os.getcwd(), "downloads")
+        os.makedirs(self.download_dir, exist_ok=True)
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def submit(self, case_data):
+        """Queue a case for rendering; returns a future resolving to the PDF path"""
+        # Queue wait plus render time, as seen from the fetching process
+        submitted = time.perf_counter()
+        future = self.executor.submit(render_case_pdf, case_data, self.download_dir)
+        future.add_done_callback(lambda f: METRICS.observe("pdf_pool", time.perf_counter() - submitted))
+        return future
+
+    def shutdown(self, wait=True):
+        self.executor.shutdown(wait=wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+
+def find_case_json_files(paths):
+    """Expand files, directories and globs into case_*.json files"""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(glob.glob(os.path.join(path, "case_*.json"))))
+        elif any(ch in path for ch in "*?["):
+            files.extend(sorted(glob.glob(path)))
+        else:
+            files.append(path)
+    return files
+
+
+def render_pending_pdfs(paths, workers=None, download_dir=None, force=False):
+    """Render PDFs in bulk from stored case JSON files
+
+    Only cases saved with --pdf-later (or without a PDF) are rendered unless
+    force is set. Each JSON file is updated with the new pdf_path.
+    """
+    pending = []
+    for json_path in find_case_json_files(paths):
+        try:
+            with open(json_path, encoding='utf-8') as f:
+                case_data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {json_path}: {str(e)}")
+            continue
+        if force or case_data.get("pdf_pending") or not case_data.get("pdf_created"):
+            pending.append((json_path, case_data))
+
+    if not pending:
+        print("No cases waiting for a PDF")
+        return []
+
+    print(f"Rendering {len(pending)} PDFs...")
+    rendered = []
+    with PDFRenderPool(workers, download_dir) as pool:
+        futures = {pool.submit(case_data): (json_path, case_data) for json_path, case_data in pending}
+        for future in as_completed(futures):
+            json_path, case_data = futures[future]
+            pdf_path = future.result()
+            if not pdf_path:
+                continue
+            case_data["pdf_created"] = True
+            case_data["pdf_path"] = pdf_path
+            case_data.pop("pdf_pending", None)
+            with open(json_path, 'w', encoding='utf-8') as f:
+                json.dump(case_data, f, ensure_ascii=False, indent=4)
+            rendered.append(pdf_path)
+
+    print(f"✓ Rendered {len(rendered)}/{len(pending)} PDFs")
+    return rendered
@@ -0,0 +1,188 @@
+"""Slim in-memory case record returned by parse_case_details
+
+A CaseRecord keeps the parsed fields in __slots__ instead of a per-case
+dict, never stores plain_text (it is derived from the HTML when asked
+for), and can move its raw #history_cnr HTML to a spool file so that a
+record waiting for its PDF or its turn to be saved holds only the parsed
+fields. It still reads and writes like the case_data dict the rest of the
+scraper expects, and to_dict() gives the plain dict for JSON.
+"""
+import hashlib
+import os
+import sys
+from collections.abc import MutableMapping
+
+# Parsed fields, in the order they appear in saved JSON
+CASE_FIELDS = ("cnr_number", "search_date", "available", "case_details", "hearings", "orders",
+               "listing_info", "hearing_dates")
+HTML_FIELDS = ("raw_html", "plain_text")
+
+_MISSING = object()
+
+
+def intern_key(key):
+    """Share one string object for a field name repeated across thousands of cases"""
+    return sys.intern(key)
+
+
+class CaseRecord(MutableMapping):
+    """Case data with fixed slots for the parsed fields and dict-style access to everything"""
+
+    __slots__ = CASE_FIELDS + ("_html", "_html_path", "extra")
+
+    def __init__(self, cnr_number, search_date=None, available=True):
+        self.cnr_number = cnr_number
+        self.search_date = search_date
+        self.available = available
+        self.case_details = {}
+        self.hearings = []
+        self.orders = []
+        self.listing_info = {}
+        self.hearing_dates = []
+        self._html = None
+        self._html_path = None
+        # Anything else set later (pdf_path, pdf_created, cached_at, ...)
+        self.extra = None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Record from saved case data (fields missing there stay missing)"""
+        record = cls(data.get("cnr_number"))
+        for key in CASE_FIELDS:
+            if key not in data:
+                delattr(record, key)
+        for key, value in data.items():
+            record[key] = value
+        return record
+
+    # -- raw HTML -------------------------------------------------------------
+
+    @property
+    def raw_html(self):
+        """The #history_cnr HTML, read back from the spool file if it was spilled"""
+        if self._html is not None:
+            return self._html
+        if self._html_path is not None:
+            with open(self._html_path, encoding="utf-8") as f:
+                return f.read()
+        return None
+
+    @property
+    def plain_text(self):
+        """Stripped text of the history fragment, derived from the HTML on demand"""
+        html = self.raw_html
+        if not html:
+            return None
+        from ecourts_scraper import element_text, load_history_fragment
+        history_div = load_history_fragment(html)
+        return element_text(history_div, strip=True) if history_div is not None else None
+
+    @property
+    def has_html(self):
+        return self._html is not None or self._html_path is not None
+
+    def spill_html(self, spool_dir):
+        """Move the HTML to <spool_dir>/<sha256>.html and keep only the path"""
+        if self._html is None:
+            return self._html_path
+        os.makedirs(spool_dir, exist_ok=True)
+        data = self._html.encode("utf-8")
+        path = os.path.join(spool_dir, hashlib.sha256(data).hexdigest() + ".html")
+        if not os.path.exists(path):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self._html = None
+        self._html_path = path
+        return path
+
+    def drop_html(self, remove_spool=False):
+        """Forget the HTML (and optionally delete its spool file)"""
+        if remove_spool and self._html_path is not None:
+            try:
+                os.remove(self._html_path)
+            except OSError:
+                pass
+        self._html = None
+        self._html_path = None
+
+    # -- mapping interface ----------------------------------------------------
+
+    def __getitem__(self, key):
+        if key in CASE_FIELDS:
+            value = getattr(self, key, _MISSING)
+        elif key in HTML_FIELDS:
+            value = getattr(self, key) if self.has_html else _MISSING
+        else:
+            value = self.extra.get(key, _MISSING) if self.extra else _MISSING
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in CASE_FIELDS:
+            setattr(self, key, value)
+        elif key == "raw_html":
+            self._html = value
+            self._html_path = None
+        elif key == "plain_text":
+            # Always derived from the HTML
+            pass
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[intern_key(key)] = value
+
+    def __delitem__(self, key):
+        if key in CASE_FIELDS:
+            if not hasattr(self, key):
+                raise KeyError(key)
+            delattr(self, key)
+        elif key in HTML_FIELDS:
+            if not self.has_html:
+                raise KeyError(key)
+            self.drop_html()
+        elif self.extra and key in self.extra:
+            del self.extra[key]
+        else:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for key in CASE_FIELDS:
+            if hasattr(self, key):
+                yield key
+        if self.has_html:
+            yield from HTML_FIELDS
+        if self.extra:
+            yield from list(self.extra)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        if key in CASE_FIELDS:
+            return hasattr(self, key)
+        if key in HTML_FIELDS:
+            return self.has_html
+        return bool(self.extra) and key in self.extra
+
+    def __repr__(self):
+        return f"CaseRecord({self.cnr_number!r}, {len(self.case_details)} details)"
+
+    def to_dict(self, with_html=True):
+        """Plain dict in the saved JSON layout"""
+        data = {key: getattr(self, key) for key in CASE_FIELDS if hasattr(self, key)}
+        if with_html and self.has_html:
+            data["raw_html"] = self.raw_html
+            data["plain_text"] = self.plain_text
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+
+def json_default(obj):
+    """json.dump hook: serialize case records as their dicts"""
+    if isinstance(obj, CaseRecord):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,356 @@
+"""Nightly watchlist scheduler: asyncio orchestration of blocking scraper sessions
+
+Each fetch runs in a worker thread that owns its own scraper session; the
+event loop only decides what runs when. Concurrency is capped globally and
+per court establishment, failed cases are retried with jittered exponential
+backoff, and cases with the nearest known hearing date go first.
+"""
+import asyncio
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from functools import partial
+
+from ecourts_scraper import ECourtsScraper, create_scraper, save_case, save_to_file
+from ecourts_index import DateIndex, parse_portal_date
+from ecourts_captcha import CaptchaBroker
+from ecourts_metrics import METRICS
+from ecourts_supervisor import SupervisedScraper, DEFAULT_RECYCLE_AFTER, DEFAULT_MEMORY_LIMIT
+
+DEFAULT_BACKOFF_BASE = 5        # seconds before the first retry
+DEFAULT_BACKOFF_CAP = 300       # longest wait between retries
+
+
+class ReportLines:
+    """Morning report lines of a run, added as each case is saved"""
+
+    def __init__(self, check_date):
+        self.check_date = check_date
+        self.total = 0
+        self.listed = []
+        self.not_listed = []
+        self.failed = []
+        self.deltas = []
+        self.unchanged = 0
+
+
+def court_key(cnr):
+    """Court establishment of a CNR: state, district and establishment code"""
+    return cnr[:6]
+
+
+def backoff_delay(attempt, base=DEFAULT_BACKOFF_BASE, cap=DEFAULT_BACKOFF_CAP):
+    """Jittered exponential backoff for the given (1-based) failed attempt"""
+    return min(cap, base * 2 ** (attempt - 1)) * random.uniform(0.5, 1.5)
+
+
+class WatchlistScheduler:
+    """Runs a watchlist of CNRs with concurrency limits, backoff and deadline ordering"""
+
+    def __init__(self, workers=2, per_court=1, max_attempts=3, engine="browser", base_url=None,
+                 headless=False, pdf_mode="inline", cache=None, max_age=None, refresh=False,
+                 output_dir=".", backoff_base=DEFAULT_BACKOFF_BASE, backoff_cap=DEFAULT_BACKOFF_CAP,
+                 captcha_broker=None, profile="standard", store=None, journal=None,
+                 recycle_after=DEFAULT_RECYCLE_AFTER, memory_limit=DEFAULT_MEMORY_LIMIT, changes=None):
+        self.workers = max(1, workers)
+        self.per_court = max(1, per_court)
+        self.max_attempts = max(1, max_attempts)
+        self.engine = engine
+        self.base_url = base_url
+        self.headless = headless
+        self.profile = profile
+        self.pdf_mode = pdf_mode
+        self.cache = cache
+        self.max_age = max_age
+        self.refresh = refresh
+        self.output_dir = output_dir
+        # Deduplicated snapshots instead of one JSON file per case (see ecourts_store)
+        self.store = store
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        # All sessions share one CAPTCHA queue (a console operator by default)
+        self.captcha_broker = captcha_broker
+        # Journal run (ecourts_journal): attempts and outcomes survive a crash
+        self.journal = journal
+        # Sessions are restarted after this many cases or past this many MB (ecourts_supervisor)
+        self.recycle_after = recycle_after
+        self.memory_limit = memory_limit
+        # ChangeTracker (ecourts_changes): unchanged cases skip the PDF and the save
+        self.changes = changes
+
+        self._local = threading.local()
+        self._scrapers = []
+        self._scrapers_lock = threading.Lock()
+
+    # -- worker thread side -------------------------------------------------
+
+    def _scraper(self):
+        """This thread's supervised scraper session, created on first use"""
+        scraper = getattr(self._local, "scraper", None)
+        if scraper is None:
+            scraper = SupervisedScraper(
+                partial(create_scraper, self.engine, headless=self.headless, captcha_broker=self.captcha_broker,
+                        base_url=self.base_url, pdf_mode=self.pdf_mode, profile=self.profile,
+                        changes=self.changes),
+                recycle_after=self.recycle_after, memory_limit=self.memory_limit
+            )
+            self._local.scraper = scraper
+            with self._scrapers_lock:
+                self._scrapers.append(scraper)
+        return scraper
+
+    def _fetch(self, cnr, attempt):
+        """Blocking fetch, run inside the thread pool"""
+        if self.journal is not None:
+            self.journal.start(cnr)
+        try:
+            with METRICS.timer("lookup"):
+                case_data = self._scraper().fetch_case_by_cnr(cnr)
+            if not case_data and self.journal is not None:
+                self.journal.fail(cnr, "no case details returned")
+            return case_data
+        except Exception as e:
+            print(f"Error fetching {cnr}: {str(e)}")
+            METRICS.count("worker_errors")
+            if self.journal is not None:
+                self.journal.fail(cnr, f"worker error: {str(e)}")
+            # Start this thread over with a fresh session next time
+            scraper = self._local.scraper
+            self._local.scraper = None
+            if scraper is not None:
+                scraper.close()
+            return None
+
+    def _close_scrapers(self):
+        with self._scrapers_lock:
+            for scraper in self._scrapers:
+                scraper.close()
+            self._scrapers = []
+
+    # -- event loop side ----------------------------------------------------
+
+    def order_by_deadline(self, cnrs):
+        """Cases with the nearest known hearing first; unknown ones after them"""
+        date_index = DateIndex()
+        try:
+            known = date_index.next_hearings(cnrs)
+        finally:
+            date_index.close()
+        today = date.today()
+
+        def deadline(cnr):
+            day = known.get(cnr)
+            if day is None or day < today:
+                return (1, date.max)
+            return (0, day)
+
+        return sorted(cnrs, key=deadline)
+
+    async def _run_case(self, cnr, loop, executor, global_limit, court_limits, save):
+        """Fetch one case with retries, then save it; returns a report entry"""
+        court_limit = court_limits.setdefault(court_key(cnr), asyncio.Semaphore(self.per_court))
+        started = time.time()
+
+        if self.cache is not None and not self.refresh:
+            case_data = self.cache.get(cnr, self.max_age)
+            if case_data:
+                return await save({"cnr_number": cnr, "case_data": case_data, "attempts": 0,
+                                   "cached": True, "seconds": 0.0})
+
+        # Attempts made before a restart count towards the limit
+        attempt = self.journal.attempts(cnr) if self.journal is not None else 0
+        case_data = None
+        while attempt < self.max_attempts:
+            attempt += 1
+            # The court's slot first, so a case waiting on a busy court holds no global slot
+            async with court_limit, global_limit:
+                case_data = await loop.run_in_executor(executor, self._fetch, cnr, attempt)
+            if case_data:
+                break
+            if attempt < self.max_attempts:
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                print(f"Retrying {cnr} in {delay:.0f}s ({attempt}/{self.max_attempts} failed)")
+                METRICS.count("retries")
+                await asyncio.sleep(delay)
+
+        return await save({"cnr_number": cnr, "case_data": case_data, "attempts": attempt,
+                           "cached": False, "seconds": round(time.time() - started, 2)})
+
+    async def run_async(self, cnrs, lines):
+        """Run every case, saving each as it completes; its report line goes to lines"""
+        loop = asyncio.get_running_loop()
+        global_limit = asyncio.Semaphore(self.workers)
+        court_limits = {}
+        executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ecourts")
+        # One writer thread: saves stay serialized, and the event loop keeps scheduling meanwhile
+        writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ecourts-writer")
+        date_index = DateIndex()
+
+        async def save(entry):
+            return await loop.run_in_executor(writer, self._save_entry, entry, lines, date_index)
+
+        try:
+            # Tasks are created in deadline order; the FIFO semaphores keep that order
+            tasks = [
+                asyncio.ensure_future(self._run_case(cnr, loop, executor, global_limit, court_limits, save))
+                for cnr in self.order_by_deadline(cnrs)
+            ]
+            for done, task in enumerate(asyncio.as_completed(tasks), 1):
+                entry = await task
+                status = "✓" if entry["case_data"] else "✗ failed"
+                if entry["cached"]:
+                    status += " (cached)"
+                print(f"[{done}/{len(tasks)}] {entry['cnr_number']}: {status}")
+        finally:
+            await loop.run_in_executor(executor, self._close_scrapers)
+            executor.shutdown(wait=True)
+            writer.shutdown(wait=True)
+            date_index.close()
+
+    def run(self, cnrs, check_date=None):
+        """Run the watchlist and write the morning report"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        started = time.time()
+        own_broker = self.captcha_broker is None
+        if own_broker:
+            self.captcha_broker = CaptchaBroker()
+        done_before = {}
+        if self.journal is not None:
+            # Cases saved before an interrupted run stopped are not fetched again
+            done_before = self.journal.done()
+            cnrs = self.journal.todo()
+            if self.journal.resumed:
+                print(f"✓ Resuming interrupted run: {len(done_before)} cases already done")
+        lines = ReportLines(check_date or date.today())
+        try:
+            asyncio.run(self.run_async(cnrs, lines))
+        finally:
+            print(self.captcha_broker.format_summary())
+            if own_broker:
+                self.captcha_broker.close()
+                self.captcha_broker = None
+        return self.write_report(lines, started, done_before)
+
+    # -- saving and reporting ----------------------------------------------
+
+    def _save_entry(self, entry, lines, date_index):
+        """Save a finished case and mark it done, keeping only its report line
+
+        Runs on the writer thread as soon as the case's task has its result,
+        so a crash later in the run loses nothing that was fetched.
+        """
+        case_data = entry["case_data"]
+        cnr = entry["cnr_number"]
+        lines.total += 1
+        if not case_data:
+            lines.failed.append({"cnr_number": cnr, "attempts": entry["attempts"]})
+            return entry
+
+        location = "cache"
+        if not entry["cached"]:
+            if self.cache is not None:
+                self.cache.put(cnr, case_data)
+            change = self.changes.check(case_data, self.store) if self.changes is not None else None
+            if change is not None and self.changes.unchanged(change):
+                # Same as the last saved snapshot: nothing to write or index
+                location = change.location
+                lines.unchanged += 1
+            else:
+                if self.pdf_mode == "later":
+                    case_data["pdf_pending"] = True
+                location = save_case(case_data, self.output_dir, self.store)
+                date_index.add_case(case_data, location)
+            if self.changes is not None:
+                delta = self.changes.record(case_data, location, change)
+                if delta is not None:
+                    lines.deltas.append(delta)
+        if self.journal is not None:
+            self.journal.finish(cnr, location)
+
+        listing_info = case_data.get("listing_info", {})
+        line = {
+            "cnr_number": cnr,
+            "next_hearing_date": listing_info.get("next_hearing_date"),
+            "serial_number": listing_info.get("serial_number"),
+            "court": listing_info.get("court"),
+            "attempts": entry["attempts"],
+            "cached": entry["cached"],
+        }
+        if ECourtsScraper.check_case_listing(case_data, lines.check_date):
+            lines.listed.append(line)
+        else:
+            lines.not_listed.append(line)
+        # The case itself is not kept; the caller only needs its status
+        return dict(entry, case_data=bool(case_data))
+
+    def write_report(self, lines, started, done_before=None):
+        """Write one summary report for the run
+
+        done_before maps the CNRs an interrupted run already saved to where
+        they went; they are listed as resumed.
+        """
+        check_date = lines.check_date
+        listed, not_listed = lines.listed, lines.not_listed
+
+        # Upcoming hearings first
+        not_listed.sort(key=lambda line: parse_portal_date(line["next_hearing_date"]) or date.max)
+
+        report = {
+            "generated": datetime.now().isoformat(),
+            "check_date": str(check_date),
+            "seconds": round(time.time() - started, 2),
+            "total": lines.total,
+            "listed": listed,
+            "not_listed": not_listed,
+            "failed": lines.failed,
+            "changes": lines.deltas,
+            "unchanged": lines.unchanged,
+            "resumed": [{"cnr_number": cnr, "saved_as": location} for cnr, location in (done_before or {}).items()],
+            "metrics": METRICS.summary(),
+        }
+        filename = os.path.join(self.output_dir, f"morning_report_{check_date.strftime('%Y%m%d')}.json")
+        save_to_file(report, filename)
+        print_morning_report(report)
+        return report
+
+
+def print_morning_report(report):
+    """Print the summary of a scheduled run"""
+    print("\n" + "="*60)
+    print(f"MORNING REPORT - cases listed on {report['check_date']}")
+    print("="*60)
+    for line in report["listed"]:
+        print(f"✓ {line['cnr_number']}  Serial Number: {line['serial_number'] or 'N/A'}  "
+              f"Court Name: {line['court'] or 'N/A'}")
+    if not report["listed"]:
+        print("No watched cases are listed on this date")
+
+    if report["not_listed"]:
+        print("\nUpcoming hearings:")
+        for line in report["not_listed"]:
+            print(f"  {line['cnr_number']}: {line['next_hearing_date'] or 'unknown'}")
+
+    if report["failed"]:
+        print("\nFailed after retries:")
+        for line in report["failed"]:
+            print(f"✗ {line['cnr_number']} ({line['attempts']} attempts)")
+
+    changed = [delta for delta in report.get("changes", ()) if delta["status"] == "changed"]
+    if changed:
+        print("\nChanged since the last run:")
+        for delta in changed:
+            fields = [key.split(".", 1)[-1] for key in delta.get("changed", ())]
+            fields += [key[len("new_"):].replace("_", " ") for key in delta if key.startswith("new_")]
+            print(f"  {delta['cnr_number']}: {', '.join(fields) or 'history only'}")
+
+    if report.get("resumed"):
+        print(f"\n{len(report['resumed'])} cases were saved before the run was interrupted "
+              f"(not in the lists above)")
+
+    print(f"\n{len(report['listed'])} listed, {len(report['not_listed'])} not listed, "
+          f"{len(report['failed'])} failed in {report['seconds']:.0f}s")
+    if report.get("unchanged"):
+        print(f"{report['unchanged']} cases unchanged since the last run (not saved again)")
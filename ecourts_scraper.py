@@ -1,62 +1,143 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait, Select
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-from bs4 import BeautifulSoup
+import lxml.html
 import json
 import argparse
 from datetime import datetime, timedelta
 import time
 import os
-import requests
 import re
-from reportlab.lib.pagesizes import A4, letter
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.lib import colors
-from reportlab.pdfgen import canvas
 import textwrap
+from urllib.parse import urlsplit
+
+from ecourts_waits import WaitEngine, CAPTCHA_SELECTORS
+from ecourts_captcha import PromptTicket, CaptchaTimeout
+from ecourts_metrics import METRICS
+from ecourts_driver import PROFILES, CacheSlot, build_chrome_options, start_chrome
+from ecourts_cache import CaseCache, CachedFetcher, DEFAULT_CACHE_PATH, DEFAULT_TTL
+from ecourts_causelist import CauseListIndex, iter_cause_list_rows, cause_list_path, cause_list_pdf_name
+from ecourts_store import DEFAULT_STORE_PATH
+from ecourts_journal import DEFAULT_JOURNAL_PATH
+from ecourts_orders import extract_orders, OrderDownloader, print_order_results
+from ecourts_record import CaseRecord, intern_key, json_default
+from ecourts_catalog import (OptionCatalog, CatalogError, CAUSE_LIST_LEVELS,
+                             OPTIONS_JS, SELECT_VALUES_JS, print_catalog_matches)
+from ecourts_index import DateIndex, DEFAULT_INDEX_PATH, case_hearing_dates, parse_portal_date, HEARING_HEADER_RE
+
+# Browser stack, imported by load_selenium() when the first browser session starts;
+# --help, cache hits, the HTTP engine and the index queries never load it
+webdriver = By = WebDriverWait = Select = EC = None
+
+
+def load_selenium():
+    """Import selenium on first use and bind the names the browser code uses"""
+    global webdriver, By, WebDriverWait, Select, EC
+    if webdriver is None:
+        from selenium import webdriver
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait, Select
+        from selenium.webdriver.support import expected_conditions as EC
+
+CAUSE_LIST_URL = "https://services.ecourts.gov.in/ecourtindia_v6/?p=cause_list/index"
+
+# Returns just the #history_cnr markup instead of the whole page source
+HISTORY_FRAGMENT_JS = """
+var el = document.getElementById('history_cnr');
+return el ? el.outerHTML : null;
+"""
 
 class ECourtsScraper:
-    def __init__(self, headless=False):
-        options = webdriver.ChromeOptions()
-        if headless:
-            options.add_argument("--headless")
+    def __init__(self, headless=False, captcha_prompt=None, wait_timeouts=None, pdf_mode="inline",
+                 captcha_broker=None, profile="standard", catalog=None, changes=None, captcha_timeout=None):
+        # Callable returning the CAPTCHA text; defaults to reading the console
+        self.captcha_prompt = captcha_prompt
+        # Shared CAPTCHA queue (ecourts_captcha); takes precedence over captcha_prompt
+        self.captcha_broker = captcha_broker
+        # Seconds to wait for a CAPTCHA answer before the lookup fails (None waits forever)
+        self.captcha_timeout = captcha_timeout
+        self.captcha_waiting_since = None
+        # "inline" renders PDFs while fetching, "later" defers them, "none" skips them
+        self.pdf_mode = pdf_mode
+        # Known dropdown option values (ecourts_catalog), so names resolve before the browser is used
+        self.catalog = catalog or OptionCatalog()
+        # Fingerprints of the last saved snapshots (ecourts_changes): unchanged cases keep their PDF
+        self.changes = changes
+        # Exception behind the last failed fetch (read by the session supervisor)
+        self.last_error = None
         
+        load_selenium()
         self.download_dir = os.path.join(os.getcwd(), "downloads")
-        prefs = {
-            "download.default_directory": self.download_dir,
-            "download.prompt_for_download": False,
-        }
-        options.add_experimental_option("prefs", prefs)
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--no-sandbox")
-        
-        self.driver = webdriver.Chrome(
-            service=Service(ChromeDriverManager().install()), 
-            options=options
+        # "lean" blocks images, fonts, media and trackers and reuses a disk cache
+        self.profile = profile
+        self.cache_slot = CacheSlot() if profile == "lean" else None
+        options = build_chrome_options(
+            headless, self.download_dir, profile, self.cache_slot.path if self.cache_slot else None
         )
+        
+        with METRICS.timer("driver_startup"):
+            # Cached chromedriver path: no webdriver_manager network check per run
+            try:
+                self.driver = start_chrome(options, profile)
+            except Exception:
+                if self.cache_slot:
+                    self.cache_slot.release()
+                raise
         self.wait = WebDriverWait(self.driver, 25)
+        # Event-driven waits with per-step timeouts and timing records
+        self.waits = WaitEngine(self.driver, wait_timeouts)
         
         # Create downloads folder
         os.makedirs("downloads", exist_ok=True)
     
-    def submit_captcha(self):
-        """Handle CAPTCHA submission with retry logic"""
+    def captcha_image(self):
+        """PNG bytes of the CAPTCHA currently shown, or None"""
+        try:
+            return self.driver.find_element(By.CSS_SELECTOR, CAPTCHA_SELECTORS).screenshot_as_png
+        except Exception:
+            return None
+    
+    def request_captcha(self, label="", retry_of=None):
+        """Hand the current CAPTCHA to the broker; returns a ticket to collect the answer from
+        
+        Without a broker the ticket just asks captcha_prompt (or the console)
+        when the answer is collected.
+        """
+        if self.captcha_broker is None:
+            return PromptTicket(self.captcha_prompt or (lambda: input("Enter CAPTCHA: ")))
+        return self.captcha_broker.submit(self.captcha_image(), label, retry_of=retry_of)
+    
+    def wait_for_captcha(self, ticket):
+        """Collect a ticket's answer; raises CaptchaTimeout when none comes within captcha_timeout"""
+        self.captcha_waiting_since = time.time()
+        try:
+            with METRICS.timer("captcha_wait"):
+                answer = ticket.result(self.captcha_timeout)
+        finally:
+            self.captcha_waiting_since = None
+        if answer is None:
+            METRICS.count("captcha_timeouts")
+            # Nobody should answer a challenge the session gave up on
+            if self.captcha_broker is not None and hasattr(self.captcha_broker, "cancel"):
+                self.captcha_broker.cancel(ticket)
+            raise CaptchaTimeout(f"no CAPTCHA answer within {self.captcha_timeout:g}s")
+        return answer
+    
+    def submit_captcha(self, ticket=None, label=""):
+        """Handle CAPTCHA submission with retry logic
+        
+        ticket is a CAPTCHA request made earlier with request_captcha, so the
+        answer could be worked on while the form was being filled.
+        """
         for attempt in range(3):
             try:
-                # Wait for CAPTCHA image to load
-                time.sleep(2)
-                captcha_text = input("Enter CAPTCHA: ")
+                if ticket is None:
+                    # Wait for CAPTCHA image to load
+                    self.waits.captcha_loaded()
+                    ticket = self.request_captcha(label)
+                captcha_text = self.wait_for_captcha(ticket)
                 captcha_field = self.wait.until(
                     EC.element_to_be_clickable((By.ID, "fcaptcha_code"))
                 )
                 captcha_field.clear()
                 captcha_field.send_keys(captcha_text)
-                time.sleep(1)
                 
                 # Click search button
                 submit_button = self.wait.until(
@@ -65,8 +146,8 @@ class ECourtsScraper:
                 submit_button.click()
                 print(f"Attempt {attempt + 1}: Submitted CAPTCHA")
                 
-                # Wait for page transition
-                time.sleep(5)
+                # Wait until the portal shows either an error or the results
+                self.waits.submission_settled()
                 
                 # Check for visible error alerts
                 try:
@@ -85,8 +166,11 @@ class ECourtsScraper:
                     
                     if has_error and attempt < 2:
                         print("Invalid CAPTCHA, retrying...")
+                        METRICS.count("captcha_retries")
                         self.driver.execute_script("refreshCaptcha();")
-                        time.sleep(2)
+                        # The new image goes to the front of the CAPTCHA queue
+                        self.waits.captcha_loaded()
+                        ticket = self.request_captcha(label, retry_of=ticket)
                         continue
                     
                     print("CAPTCHA accepted! Loading results...")
@@ -96,8 +180,14 @@ class ECourtsScraper:
                     print("CAPTCHA submitted! Proceeding...")
                     return True
                     
+            except CaptchaTimeout as e:
+                print(f"✗ {str(e)}")
+                self.last_error = e
+                return False
             except Exception as e:
                 print(f"CAPTCHA error: {str(e)}")
+                self.last_error = e
+                ticket = None
                 if attempt < 2:
                     time.sleep(1)
                     continue
@@ -105,12 +195,16 @@ class ECourtsScraper:
         
         return False
     
+    @METRICS.timed("wait_for_results")
     def wait_for_results(self):
         """Wait for results to load"""
         print("Waiting for case details to load...")
-        time.sleep(5)
+        if self.waits.results_loaded():
+            print("Results loaded successfully!")
+            return True
         
-        for check_attempt in range(5):
+        # Fall back to checking each container once more
+        for check_attempt in range(2):
             try:
                 # Check multiple possible result containers
                 selectors = ["#history_cnr", ".case-details", ".result-container", ".table-responsive"]
@@ -126,12 +220,12 @@ class ECourtsScraper:
                     except:
                         continue
                 
-                print(f"Loading... ({check_attempt + 1}/5)")
-                time.sleep(2)
+                print(f"Loading... ({check_attempt + 1}/2)")
+                time.sleep(1)
                 
             except Exception:
-                print(f"Checking... ({check_attempt + 1}/5)")
-                time.sleep(2)
+                print(f"Checking... ({check_attempt + 1}/2)")
+                time.sleep(1)
         
         return False
     
@@ -139,8 +233,13 @@ class ECourtsScraper:
         """Fetch case details using CNR number"""
         try:
             url = "https://services.ecourts.gov.in/ecourtindia_v6/"
-            self.driver.get(url)
-            time.sleep(3)
+            with METRICS.timer("page_load"):
+                self.driver.get(url)
+                self.waits.page_ready()
+            
+            # Queue the CAPTCHA now; it is answered while the form is filled in
+            self.waits.captcha_loaded()
+            ticket = self.request_captcha(cnr_full)
             
             # Enter CNR
             search_field = self.wait.until(
@@ -153,7 +252,7 @@ class ECourtsScraper:
             print("Please enter the CAPTCHA visible on screen.")
             
             # Submit CAPTCHA
-            if not self.submit_captcha():
+            if not self.submit_captcha(ticket, cnr_full):
                 return None
             
             # Wait for results
@@ -161,28 +260,25 @@ class ECourtsScraper:
                 print("Failed to load results")
                 return None
             
-            # Parse results
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            history_div = soup.find('div', {'id': 'history_cnr'})
+            # Parse results (only the #history_cnr fragment crosses the wire)
+            history_div = load_history_fragment(self.get_history_html())
             
-            if not history_div or not history_div.get_text(strip=True):
+            if history_div is None or not element_text(history_div, strip=True):
                 print("No case details found")
+                METRICS.count("empty_results")
                 return None
             
             case_data = self.parse_case_details(history_div, cnr_full)
             
-            # Create PDF from case data
-            pdf_path = self.create_case_pdf(case_data)
-            if pdf_path:
-                case_data["pdf_created"] = True
-                case_data["pdf_path"] = pdf_path
-            else:
-                case_data["pdf_created"] = False
+            METRICS.count("cases_fetched")
             
-            return case_data
+            # Create PDF from case data
+            return self.attach_pdf(case_data)
             
         except Exception as e:
             print(f"Error: {str(e)}")
+            self.last_error = e
+            METRICS.count("errors")
             import traceback
             traceback.print_exc()
             return None
@@ -191,26 +287,30 @@ class ECourtsScraper:
         """Fetch case details using case type, number, and year"""
         try:
             url = "https://services.ecourts.gov.in/ecourtindia_v6/"
-            self.driver.get(url)
-            time.sleep(3)
+            # Case types are catalogued per portal host
+            scope = (urlsplit(url).netloc,)
+            try:
+                # A bad case type fails here, before the page is loaded
+                case_type_option = self.catalog.resolve("case_type", case_type, scope, "case type")
+            except CatalogError as e:
+                print(f"✗ {str(e)}")
+                return None
             
-            # Select case type
-            case_type_dropdown = self.wait.until(
-                EC.presence_of_element_located((By.ID, "case_type"))
-            )
-            select = Select(case_type_dropdown)
+            with METRICS.timer("page_load"):
+                self.driver.get(url)
+                self.waits.page_ready()
             
-            # Try to find matching case type
-            case_type_found = False
-            for option in select.options:
-                if case_type.upper() in option.text.upper() or option.get_attribute("value") == case_type:
-                    select.select_by_visible_text(option.text)
-                    case_type_found = True
-                    break
+            # Queue the CAPTCHA now; it is answered while the form is filled in
+            label = f"{case_type}/{case_number}/{case_year}"
+            self.waits.captcha_loaded()
+            ticket = self.request_captcha(label)
             
-            if not case_type_found:
-                print(f"Case type '{case_type}' not found. Using first available option.")
-                select.select_by_index(1)
+            # Select case type by value (the options are read in one call when not catalogued)
+            self.waits.dropdown_populated("case_type")
+            if case_type_option is None:
+                options = self.read_options("case_type", scope)
+                case_type_option = self.catalog.resolve("case_type", case_type, scope, "case type", options)
+            self.select_values([("case_type",) + tuple(case_type_option)])
             
             # Enter case number
             case_no_field = self.wait.until(
@@ -230,7 +330,7 @@ class ECourtsScraper:
             print("Please enter the CAPTCHA visible on screen.")
             
             # Submit CAPTCHA
-            if not self.submit_captcha():
+            if not self.submit_captcha(ticket, label):
                 return None
             
             # Wait for results
@@ -238,109 +338,118 @@ class ECourtsScraper:
                 print("Failed to load results")
                 return None
             
-            # Parse results
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            history_div = soup.find('div', {'id': 'history_cnr'})
+            # Parse results (only the #history_cnr fragment crosses the wire)
+            history_div = load_history_fragment(self.get_history_html())
             
-            if not history_div or not history_div.get_text(strip=True):
+            if history_div is None or not element_text(history_div, strip=True):
                 print("No case details found")
+                METRICS.count("empty_results")
                 return None
             
             # Extract CNR if available
-            cnr_match = re.search(r'CNR No[.:]\s*([A-Z0-9]+)', history_div.get_text())
+            cnr_match = re.search(r'CNR No[.:]\s*([A-Z0-9]+)', element_text(history_div))
             cnr_full = cnr_match.group(1) if cnr_match else f"{case_type}{case_number}{case_year}"
             
             case_data = self.parse_case_details(history_div, cnr_full)
             
-            # Create PDF from case data
-            pdf_path = self.create_case_pdf(case_data)
-            if pdf_path:
-                case_data["pdf_created"] = True
-                case_data["pdf_path"] = pdf_path
-            else:
-                case_data["pdf_created"] = False
+            METRICS.count("cases_fetched")
             
-            return case_data
+            # Create PDF from case data
+            return self.attach_pdf(case_data)
             
+        except CatalogError as e:
+            print(f"✗ {str(e)}")
+            return None
         except Exception as e:
             print(f"Error: {str(e)}")
+            self.last_error = e
+            METRICS.count("errors")
             import traceback
             traceback.print_exc()
             return None
     
+    def read_options(self, select_id, parents=(), save=True):
+        """Read a dropdown's [value, text] options in one call and update the catalog"""
+        options = self.driver.execute_script(OPTIONS_JS, select_id)
+        return self.catalog.update(select_id, parents, options, save)
+    
+    def select_values(self, picks, fire_all=False, reset=()):
+        """Select (id, value, text) picks by value in one call"""
+        missing = self.driver.execute_script(SELECT_VALUES_JS, [list(pick) for pick in picks], fire_all, list(reset))
+        if missing:
+            raise RuntimeError(f"Form fields not found: {', '.join(missing)}")
+    
+    def get_history_html(self):
+        """Return the outerHTML of #history_cnr from the browser, or None"""
+        try:
+            return self.driver.execute_script(HISTORY_FRAGMENT_JS)
+        except Exception:
+            return None
+    
+    @METRICS.timed("parse")
     def parse_case_details(self, history_div, cnr_full):
-        """Parse case details from HTML"""
-        case_data = {
-            "cnr_number": cnr_full,
-            "search_date": str(datetime.now().date()),
-            "available": True,
-            "case_details": {},
-            "hearings": [],
-            "orders": [],
-            "listing_info": {}
-        }
+        """Parse case details from the #history_cnr fragment
         
-        # Extract tables
-        tables = history_div.find_all('table')
-        
-        for table in tables:
-            rows = table.find_all('tr')
-            for row in rows:
-                cols = row.find_all(['td', 'th'])
-                if len(cols) >= 2:
-                    key = cols[0].get_text(strip=True).replace(':', '').strip()
-                    value = cols[1].get_text(strip=True)
-                    if key and value:
-                        # Clean up the value - remove extra spaces and fix formatting
-                        value = re.sub(r'\s+', ' ', value).strip()
-                        case_data["case_details"][key] = value
+        history_div may be an lxml element, the fragment's HTML, or a
+        BeautifulSoup tag.
+        """
+        if isinstance(history_div, str):
+            raw_html = history_div
+            history_div = load_history_fragment(raw_html)
+        elif isinstance(history_div, lxml.html.HtmlElement):
+            raw_html = lxml.html.tostring(history_div, encoding="unicode")
+        else:
+            raw_html = str(history_div)
+            history_div = load_history_fragment(raw_html)
+        
+        # Slim record: slots instead of a dict, plain_text derived on demand
+        case_data = CaseRecord(cnr_full, str(datetime.now().date()))
+        
+        hearing_dates = set()
+        # Hearing date columns of history tables, found from their header row
+        date_columns = {}
+        
+        # Walk every table row once
+        for row in history_div.iter('tr'):
+            cols = [col for col in row.iter('td', 'th')]
+            if len(cols) >= 2:
+                key = element_text(cols[0], strip=True).replace(':', '').strip()
+                value = element_text(cols[1], strip=True)
+                if key and value:
+                    # Clean up the value - remove extra spaces and fix formatting
+                    value = re.sub(r'\s+', ' ', value).strip()
+                    # The same few labels repeat in every case: share one string each
+                    case_data["case_details"][intern_key(key)] = value
+                    if HEARING_HEADER_RE.search(key):
+                        hearing_dates.add(parse_portal_date(value))
+            
+            if len(cols) > 2:
+                table = next(row.iterancestors('table'), None)
+                texts = [element_text(col, strip=True) for col in cols]
+                headers = [i for i, text in enumerate(texts) if HEARING_HEADER_RE.search(text)]
+                if headers and not any(parse_portal_date(text) for text in texts):
+                    date_columns[table] = headers
+                else:
+                    for i in date_columns.get(table, ()):
+                        if i < len(texts):
+                            hearing_dates.add(parse_portal_date(texts[i]))
         
         # Extract hearing information more accurately
-        text_content = history_div.get_text().lower()
-        
-        # Look for next hearing date pattern
-        hearing_patterns = [
-            r'next hearing date[:\s]*([0-9]{1,2}-[0-9]{1,2}-[0-9]{4})',
-            r'next date[:\s]*([0-9]{1,2}-[0-9]{1,2}-[0-9]{4})',
-            r'hearing date[:\s]*([0-9]{1,2}-[0-9]{1,2}-[0-9]{4})',
-            r'listed on[:\s]*([0-9]{1,2}-[0-9]{1,2}-[0-9]{4})'
-        ]
-        
-        for pattern in hearing_patterns:
-            matches = re.findall(pattern, text_content, re.IGNORECASE)
-            if matches:
-                case_data["listing_info"]["next_hearing_date"] = matches[0]
-                break
+        text_content = element_text(history_div).lower()
         
-        # Extract court information
-        court_info_patterns = [
-            r'court[:\s]*([^\n]+)',
-            r'before[:\s]*([^\n]+)',
-            r'judge[:\s]*([^\n]+)'
-        ]
-        
-        for pattern in court_info_patterns:
-            matches = re.findall(pattern, text_content, re.IGNORECASE)
-            if matches:
-                case_data["listing_info"]["court"] = matches[0].strip()
-                break
+        # Next hearing date, court and serial number in a single scan
+        case_data["listing_info"].update(extract_listing_info(text_content))
+        hearing_dates.add(parse_portal_date(case_data["listing_info"].get("next_hearing_date")))
         
-        # Extract serial number if available
-        serial_patterns = [
-            r'serial no[.:]\s*([^\s]+)',
-            r'sl no[.:]\s*([^\s]+)',
-            r'sr no[.:]\s*([^\s]+)'
-        ]
-        
-        for pattern in serial_patterns:
-            matches = re.findall(pattern, text_content, re.IGNORECASE)
-            if matches:
-                case_data["listing_info"]["serial_number"] = matches[0]
-                break
+        # Order and judgment documents linked from the order table
+        case_data["orders"] = extract_orders(history_div)
         
-        # Store raw HTML for further processing
-        case_data["raw_html"] = str(history_div)
-        case_data["plain_text"] = history_div.get_text(strip=True)
+        # Every date the case was listed on, normalized to YYYY-MM-DD
+        hearing_dates.discard(None)
+        case_data["hearing_dates"] = sorted(day.isoformat() for day in hearing_dates)
+        
+        # Store raw HTML for further processing (plain_text is derived from it)
+        case_data["raw_html"] = raw_html
         
         return case_data
     
@@ -353,269 +462,67 @@ class ECourtsScraper:
     
     def create_case_pdf(self, case_data):
         """Create a professional PDF from case data with proper text wrapping"""
-        try:
-            if not case_data:
-                return None
-            
-            # Generate filename
-            cnr = case_data.get('cnr_number', 'unknown_case')
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"case_{cnr}_{timestamp}.pdf"
-            filepath = os.path.join(self.download_dir, filename)
-            
-            # Create PDF document with larger margins
-            doc = SimpleDocTemplate(
-                filepath, 
-                pagesize=A4, 
-                topMargin=0.5*inch,
-                bottomMargin=0.5*inch,
-                leftMargin=0.4*inch,
-                rightMargin=0.4*inch
-            )
-            styles = getSampleStyleSheet()
-            
-            # Custom styles with better formatting
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Heading1'],
-                fontSize=14,
-                spaceAfter=20,
-                alignment=1,
-                textColor=colors.darkblue,
-                fontName='Helvetica-Bold'
-            )
-            
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading2'],
-                fontSize=11,
-                spaceAfter=8,
-                spaceBefore=12,
-                textColor=colors.darkblue,
-                fontName='Helvetica-Bold'
-            )
-            
-            # Style for table content with word wrap
-            table_style = ParagraphStyle(
-                'TableStyle',
-                parent=styles['Normal'],
-                fontSize=8,
-                leading=10,
-                wordWrap='LTR',  # Enable word wrap
-                fontName='Helvetica'
-            )
-            
-            bold_table_style = ParagraphStyle(
-                'BoldTableStyle',
-                parent=table_style,
-                fontName='Helvetica-Bold'
-            )
-            
-            # Build story (content)
-            story = []
-            
-            # Title
-            title = Paragraph("eCourts India - Case Details", title_style)
-            story.append(title)
-            story.append(Spacer(1, 0.1*inch))
-            
-            # Case Information Section
-            case_info_heading = Paragraph("Case Information", heading_style)
-            story.append(case_info_heading)
-            
-            # CNR and Search Date
-            story.append(Paragraph(f"<b>CNR Number:</b> {case_data.get('cnr_number', 'N/A')}", table_style))
-            story.append(Paragraph(f"<b>Search Date:</b> {case_data.get('search_date', 'N/A')}", table_style))
-            story.append(Spacer(1, 0.05*inch))
-            
-            # Case Details Table with proper text wrapping
-            case_details = case_data.get('case_details', {})
-            if case_details:
-                details_heading = Paragraph("Case Details", heading_style)
-                story.append(details_heading)
-                
-                # Create table data with wrapped text
-                table_data = []
-                
-                # Header row
-                header_row = [
-                    Paragraph('<b>Field</b>', bold_table_style),
-                    Paragraph('<b>Value</b>', bold_table_style)
-                ]
-                table_data.append(header_row)
-                
-                # Data rows with text wrapping
-                for key, value in case_details.items():
-                    if key and value:
-                        # Clean and wrap the text
-                        clean_key = re.sub(r'\s+', ' ', str(key)).strip()
-                        clean_value = re.sub(r'\s+', ' ', str(value)).strip()
-                        
-                        # Wrap long values
-                        wrapped_key = self.wrap_text(clean_key, 30)
-                        wrapped_value = self.wrap_text(clean_value, 50)
-                        
-                        key_para = Paragraph(wrapped_key, table_style)
-                        value_para = Paragraph(wrapped_value, table_style)
-                        
-                        table_data.append([key_para, value_para])
-                
-                if len(table_data) > 1:
-                    # Create table with dynamic row heights
-                    case_table = Table(
-                        table_data, 
-                        colWidths=[1.8*inch, 4.5*inch],
-                        repeatRows=1
-                    )
-                    
-                    # Table style with better formatting for wrapped text
-                    case_table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#2c3e50')),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 9),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8f9fa')),
-                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                        ('FONTSIZE', (0, 1), (-1, -1), 8),
-                        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                        ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                        ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                        ('TOPPADDING', (0, 0), (-1, -1), 3),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-                    ]))
-                    
-                    story.append(case_table)
-                    story.append(Spacer(1, 0.1*inch))
-            
-            # Listing Information with better formatting
-            listing_info = case_data.get('listing_info', {})
-            if listing_info and any(listing_info.values()):
-                listing_heading = Paragraph("Hearing & Court Information", heading_style)
-                story.append(listing_heading)
-                
-                listing_data = []
-                listing_data.append([
-                    Paragraph('<b>Information</b>', bold_table_style),
-                    Paragraph('<b>Details</b>', bold_table_style)
-                ])
-                
-                for key, value in listing_info.items():
-                    if value:
-                        formatted_key = key.replace('_', ' ').title()
-                        wrapped_key = self.wrap_text(formatted_key, 25)
-                        wrapped_value = self.wrap_text(value, 40)
-                        
-                        key_para = Paragraph(wrapped_key, table_style)
-                        value_para = Paragraph(wrapped_value, table_style)
-                        
-                        listing_data.append([key_para, value_para])
-                
-                if len(listing_data) > 1:
-                    listing_table = Table(
-                        listing_data, 
-                        colWidths=[2*inch, 4.3*inch],
-                        repeatRows=1
-                    )
-                    listing_table.setStyle(TableStyle([
-                        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#34495e')),
-                        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-                        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-                        ('FONTSIZE', (0, 0), (-1, 0), 9),
-                        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-                        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#ecf0f1')),
-                        ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-                        ('FONTSIZE', (0, 1), (-1, -1), 8),
-                        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-                        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                        ('LEFTPADDING', (0, 0), (-1, -1), 4),
-                        ('RIGHTPADDING', (0, 0), (-1, -1), 4),
-                        ('TOPPADDING', (0, 0), (-1, -1), 3),
-                        ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
-                    ]))
-                    story.append(listing_table)
-                    story.append(Spacer(1, 0.1*inch))
-            
-            # Additional Notes
-            notes_heading = Paragraph("Additional Information", heading_style)
-            story.append(notes_heading)
-            
-            notes = [
-                "• This document was automatically generated from eCourts India portal",
-                f"• Generated on: {datetime.now().strftime('%Y-%m-%d at %H:%M:%S')}",
-                "• For official purposes, please verify with the original court records",
-                "• Document ID: " + case_data.get('cnr_number', 'N/A')
-            ]
-            
-            for note in notes:
-                story.append(Paragraph(note, table_style))
-                story.append(Spacer(1, 0.02*inch))
-            
-            # Footer
-            story.append(Spacer(1, 0.1*inch))
-            footer = Paragraph(
-                "<i>Confidential - Generated by eCourts Scraper System</i>",
-                ParagraphStyle(
-                    'FooterStyle',
-                    parent=styles['Italic'],
-                    fontSize=7,
-                    textColor=colors.grey,
-                    alignment=1
-                )
-            )
-            story.append(footer)
-            
-            # Build PDF
-            doc.build(story)
-            print(f"✓ PDF created successfully: {filepath}")
-            return filepath
-            
-        except Exception as e:
-            print(f"Error creating PDF: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        # reportlab is only imported once a PDF is actually needed
+        from ecourts_pdf import render_case_pdf
+        return render_case_pdf(case_data, self.download_dir)
+    
+    def unchanged_pdf(self, case_data):
+        """PDF of the last saved snapshot if the case has not changed since, else None"""
+        if self.changes is None:
             return None
+        change = self.changes.check(case_data)
+        if self.changes.unchanged(change) and change.pdf_path and os.path.exists(change.pdf_path):
+            print(f"✓ Case unchanged, keeping its PDF: {change.pdf_path}")
+            METRICS.count("pdfs_reused")
+            return change.pdf_path
+        return None
     
-    def check_case_listing(self, case_data, check_date):
+    def attach_pdf(self, case_data):
+        """Create the case PDF now, or mark it for later, according to pdf_mode"""
+        if self.pdf_mode == "inline":
+            pdf_path = self.unchanged_pdf(case_data) or self.create_case_pdf(case_data)
+            if pdf_path:
+                case_data["pdf_created"] = True
+                case_data["pdf_path"] = pdf_path
+            else:
+                case_data["pdf_created"] = False
+        else:
+            case_data["pdf_created"] = False
+            if self.pdf_mode == "later":
+                # Rendered in bulk afterwards with --render-pdfs
+                case_data["pdf_pending"] = True
+        return case_data
+    
+    @staticmethod
+    def check_case_listing(case_data, check_date):
         """Check if case is listed on specific date"""
         if not case_data:
             return False
         
-        check_date_str = check_date.strftime("%d-%m-%Y")
-        check_date_short = check_date.strftime("%d-%m")
-        
-        # Check in listing info
-        next_hearing = case_data.get("listing_info", {}).get("next_hearing_date", "")
-        if check_date_str in next_hearing or check_date_short in next_hearing:
-            return True
-        
-        # Check in case details
-        for key, value in case_data.get("case_details", {}).items():
-            if "date" in key.lower() or "hearing" in key.lower():
-                if check_date_str in value or check_date_short in value:
-                    return True
-        
-        # Check in raw text
-        raw_text = case_data.get("raw_html", "").lower()
-        if check_date_str in raw_text or check_date_short in raw_text:
-            return True
-        
-        return False
+        # Compare real dates, so 18-10 of another year no longer matches
+        if isinstance(check_date, datetime):
+            check_date = check_date.date()
+        return check_date in case_hearing_dates(case_data)
     
     def download_cause_list(self, state=None, district=None, court_complex=None, date=None):
         """Download cause list for a specific date"""
         try:
+            resolved = None
+            if state and district and court_complex:
+                # Bad names fail here, before the portal is loaded
+                try:
+                    resolved = self.catalog.resolve_levels((state, district, court_complex))
+                except CatalogError as e:
+                    print(f"✗ {str(e)}")
+                    return {"status": "error", "message": str(e)}
+            
             # Navigate to cause list page
-            cause_list_url = "https://services.ecourts.gov.in/ecourtindia_v6/?p=cause_list/index"
-            self.driver.get(cause_list_url)
-            time.sleep(3)
+            self.driver.get(CAUSE_LIST_URL)
+            self.waits.page_ready()
             
             if state and district and court_complex:
                 # Automated cause list selection
-                return self._automate_cause_list(state, district, court_complex, date)
+                return self._automate_cause_list(state, district, court_complex, date, resolved)
             else:
                 # Manual mode
                 print("\n" + "="*60)
@@ -633,12 +540,15 @@ class ECourtsScraper:
                     "title": "eCourts Cause List",
                     "content": self.driver.page_source
                 }
+                index = CauseListIndex(iter_cause_list_rows(cause_list_data["content"]), date)
+                print(f"✓ Parsed {len(index)} cases from the cause list")
                 
                 pdf_path = self.create_cause_list_pdf(cause_list_data)
                 if pdf_path:
                     return {
                         "status": "success",
                         "pdf_path": pdf_path,
+                        "cases_found": len(index),
                         "message": "Cause list PDF created successfully"
                     }
                 else:
@@ -649,50 +559,24 @@ class ECourtsScraper:
             
         except Exception as e:
             print(f"Error downloading cause list: {str(e)}")
+            self.last_error = e
             return None
     
-    def create_cause_list_pdf(self, cause_list_data):
-        """Create PDF from cause list page"""
+    def create_cause_list_pdf(self, cause_list_data, filename=None):
+        """Create PDF from cause list page (filename: one per court and day, else timestamped)"""
+        # reportlab is only imported once a PDF is actually needed
+        from ecourts_pdf import render_cause_list_pdf
         try:
             # Generate filename
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"cause_list_{timestamp}.pdf"
+            if not filename:
+                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+                filename = f"cause_list_{timestamp}.pdf"
             filepath = os.path.join(self.download_dir, filename)
+            os.makedirs(self.download_dir, exist_ok=True)
             
-            # Create PDF document
-            doc = SimpleDocTemplate(filepath, pagesize=A4)
-            styles = getSampleStyleSheet()
-            
-            story = []
-            
-            # Title
-            title_style = ParagraphStyle(
-                'TitleStyle',
-                parent=styles['Heading1'],
-                fontSize=16,
-                spaceAfter=30,
-                alignment=1,
-                textColor=colors.darkblue
-            )
-            
-            title = Paragraph("eCourts India - Cause List", title_style)
-            story.append(title)
-            story.append(Spacer(1, 0.2*inch))
-            
-            # Basic info
-            story.append(Paragraph(f"<b>Generated on:</b> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
-            story.append(Paragraph(f"<b>URL:</b> {cause_list_data.get('url', 'N/A')}", styles['Normal']))
-            story.append(Spacer(1, 0.2*inch))
-            
-            # Note
-            note = Paragraph(
-                "<i>Note: This is an automatically generated document from the eCourts portal. "
-                "For official purposes, please refer to the original website.</i>",
-                styles['Italic']
-            )
-            story.append(note)
-            
-            doc.build(story)
+            # The page's rows are streamed into page-sized tables; a finished file only appears whole
+            render_cause_list_pdf(cause_list_data, filepath + ".part")
+            os.replace(filepath + ".part", filepath)
             print(f"✓ Cause list PDF created: {filepath}")
             return filepath
             
@@ -700,7 +584,7 @@ class ECourtsScraper:
             print(f"Error creating cause list PDF: {str(e)}")
             return None
     
-    def _automate_cause_list(self, state, district, court_complex, date=None):
+    def _automate_cause_list(self, state, district, court_complex, date=None, resolved=None):
         """Automate cause list form filling"""
         try:
             if not date:
@@ -708,26 +592,24 @@ class ECourtsScraper:
             
             print(f"Automating cause list for: {state} → {district} → {court_complex} on {date}")
             
-            # Select state
-            state_select = Select(self.wait.until(
-                EC.presence_of_element_located((By.ID, "state_code"))
-            ))
-            state_select.select_by_visible_text(state)
-            time.sleep(2)
-            
-            # Select district
-            district_select = Select(self.wait.until(
-                EC.presence_of_element_located((By.ID, "dist_code"))
-            ))
-            district_select.select_by_visible_text(district)
-            time.sleep(2)
-            
-            # Select court complex
-            complex_select = Select(self.wait.until(
-                EC.presence_of_element_located((By.ID, "court_complex_code"))
-            ))
-            complex_select.select_by_visible_text(court_complex)
-            time.sleep(2)
+            names = (state, district, court_complex)
+            if resolved is None:
+                resolved = self.catalog.resolve_levels(names)
+            if all(resolved):
+                # Fresh catalog: state, district and court complex in one call, no cascade waits
+                self.select_values([
+                    (select_id,) + tuple(match) for (select_id, _), match in zip(CAUSE_LIST_LEVELS, resolved)
+                ])
+            else:
+                # Walk the cascade, reading the levels the catalog does not know
+                parents = ()
+                for (select_id, label), name, match in zip(CAUSE_LIST_LEVELS, names, resolved):
+                    self.waits.dropdown_populated(select_id)
+                    if match is None:
+                        options = self.read_options(select_id, parents)
+                        match = self.catalog.resolve(select_id, name, parents, label, options)
+                    self.select_values([(select_id,) + tuple(match)], fire_all=True)
+                    parents += (match[0],)
             
             # Set date
             date_field = self.driver.find_element(By.ID, "search_date")
@@ -737,55 +619,308 @@ class ECourtsScraper:
             # Submit form
             submit_btn = self.driver.find_element(By.ID, "submit1")
             submit_btn.click()
-            time.sleep(5)
+            self.waits.dom_quiet()
             
             print(f"✓ Cause list generated for {court_complex} on {date}")
             
-            # Create PDF from the cause list page
-            cause_list_data = {
-                "type": "cause_list",
-                "state": state,
-                "district": district,
-                "court_complex": court_complex,
-                "date": date,
-                "content": self.driver.page_source
-            }
-            
-            pdf_path = self.create_cause_list_pdf(cause_list_data)
-            
-            return {
-                "status": "success",
-                "state": state,
-                "district": district,
-                "court_complex": court_complex,
-                "date": date,
-                "pdf_created": pdf_path is not None,
-                "pdf_path": pdf_path
-            }
+            return self.save_cause_list(self.driver.page_source, state, district, court_complex, date)
             
         except Exception as e:
             print(f"Error automating cause list: {str(e)}")
+            self.last_error = e
             return {
                 "status": "error",
                 "message": str(e)
             }
     
+    def save_cause_list(self, html, state, district, court_complex, date):
+        """Parse a cause list page, store its rows for the court and day, and create the PDF"""
+        cause_list_data = {
+            "type": "cause_list",
+            "state": state,
+            "district": district,
+            "court_complex": court_complex,
+            "date": date,
+            "content": html
+        }
+        
+        # Parse the rows and keep them for watchlist checks
+        index = CauseListIndex(
+            iter_cause_list_rows(cause_list_data["content"], default_court=court_complex), date
+        )
+        rows_path = index.save(
+            cause_list_path(state, district, court_complex, date),
+            state=state, district=district, court_complex=court_complex
+        )
+        print(f"✓ Parsed {len(index)} cases from the cause list: {rows_path}")
+        
+        # Create PDF from the cause list page, named after the court and day like the rows file
+        pdf_path = None
+        if self.pdf_mode != "none":
+            pdf_path = self.create_cause_list_pdf(
+                cause_list_data, cause_list_pdf_name(state, district, court_complex, date)
+            )
+        
+        return {
+            "status": "success",
+            "state": state,
+            "district": district,
+            "court_complex": court_complex,
+            "date": date,
+            "cases_found": len(index),
+            "rows_path": rows_path,
+            "pdf_created": pdf_path is not None,
+            "pdf_path": pdf_path
+        }
+
+    def refresh_catalog(self, state=None, district=None):
+        """Read state, district and court complex options from the cause list form into the catalog"""
+        try:
+            self.driver.get(CAUSE_LIST_URL)
+            self.waits.page_ready()
+            self.waits.dropdown_populated("state_code")
+            states = self.read_options("state_code", save=False)
+            if state:
+                states = [self.catalog.resolve("state_code", state, (), "state", states)]
+
+            complexes = 0
+            for state_value, state_name in states:
+                # Emptying the children first lets the waits see the newly loaded options
+                self.select_values([("state_code", state_value, state_name)], True, ["dist_code", "court_complex_code"])
+                self.waits.dropdown_populated("dist_code")
+                districts = self.read_options("dist_code", (state_value,), save=False)
+                if district:
+                    districts = [self.catalog.resolve("dist_code", district, (state_value,), "district", districts)]
+                for dist_value, dist_name in districts:
+                    self.select_values([("dist_code", dist_value, dist_name)], True, ["court_complex_code"])
+                    self.waits.dropdown_populated("court_complex_code")
+                    complexes += len(self.read_options("court_complex_code", (state_value, dist_value), save=False))
+                self.catalog.save()
+                print(f"✓ {state_name}: {len(districts)} districts")
+
+            print(f"✓ Catalog refreshed: {len(states)} states, {complexes} court complexes ({self.catalog.path})")
+            return complexes
+
+        except CatalogError as e:
+            print(f"✗ {str(e)}")
+            return None
+        except Exception as e:
+            print(f"Error refreshing catalog: {str(e)}")
+            return None
+
     def close(self):
         """Close the browser"""
         try:
             self.driver.quit()
         except:
             pass
+        if getattr(self, "cache_slot", None):
+            self.cache_slot.release()
+
+# Listing fields and their patterns, most specific first
+LISTING_PATTERNS = [
+    ("next_hearing_date", [
+        r'next hearing date[:\s]*([0-9]{1,2}-[0-9]{1,2}-[0-9]{4})',
+        r'next date[:\s]*([0-9]{1,2}-[0-9]{1,2}-[0-9]{4})',
+        r'hearing date[:\s]*([0-9]{1,2}-[0-9]{1,2}-[0-9]{4})',
+        r'listed on[:\s]*([0-9]{1,2}-[0-9]{1,2}-[0-9]{4})'
+    ]),
+    ("court", [
+        r'court[:\s]*([^\n]+)',
+        r'before[:\s]*([^\n]+)',
+        r'judge[:\s]*([^\n]+)'
+    ]),
+    ("serial_number", [
+        r'serial no[.:]\s*([^\s]+)',
+        r'sl no[.:]\s*([^\s]+)',
+        r'sr no[.:]\s*([^\s]+)'
+    ]),
+]
 
+class ListingExtractor:
+    """Single-pass extractor for the listing_info fields
+    
+    Every pattern starts with a literal keyword ("next date", "court",
+    "serial no", ...). One compiled alternation of the keywords still being
+    looked for walks the text left to right; at each keyword hit only that
+    pattern is tried, anchored at the hit. Once a field has a match, its
+    keywords of equal or lower priority drop out of the scan, and the scan
+    stops as soon as every field has a match from its first pattern.
+    
+    The result is the same as trying each field's patterns in order with
+    re.findall and keeping the first match of the first pattern that hits.
+    The keyword scan is case-sensitive, so pass lowercased text (as
+    parse_case_details does).
+    """
+    
+    def __init__(self, field_patterns=LISTING_PATTERNS):
+        self.fields = [field for field, _ in field_patterns]
+        self.entries = []
+        self.keyword_index = {}
+        for field, patterns in field_patterns:
+            for priority, pattern in enumerate(patterns):
+                keyword = re.match(r'[a-z ]+', pattern).group()
+                self.keyword_index[keyword] = len(self.entries)
+                self.entries.append((field, priority, keyword, re.compile(pattern, re.IGNORECASE)))
+        self._scanners = {}
+    
+    def _scanner(self, wanted):
+        """Compiled keyword alternation for the entries still wanted"""
+        scanner = self._scanners.get(wanted)
+        if scanner is None:
+            # Plain literals without groups or flags keep sre's fast prefix search
+            alternatives = '|'.join(re.escape(self.entries[index][2]) for index in wanted)
+            scanner = self._scanners[wanted] = re.compile(alternatives)
+        return scanner
+    
+    def extract(self, text_content):
+        """Return {field: value} for next_hearing_date, court and serial_number"""
+        best = {}
+        wanted = tuple(range(len(self.entries)))
+        pos = 0
+        while wanted:
+            hit = self._scanner(wanted).search(text_content, pos)
+            if not hit:
+                break
+            field, priority, _, pattern = self.entries[self.keyword_index[hit.group()]]
+            match = pattern.match(text_content, hit.start())
+            if match:
+                best[field] = match.group(1)
+                wanted = tuple(
+                    index for index in wanted
+                    if self.entries[index][0] != field or self.entries[index][1] < priority
+                )
+            pos = hit.start() + 1
+        
+        listing_info = {}
+        for field in self.fields:
+            if field in best:
+                listing_info[field] = best[field].strip() if field == "court" else best[field]
+        return listing_info
+
+_listing_extractor = ListingExtractor()
+
+def extract_listing_info(text_content):
+    """Find next hearing date, court and serial number in one pass"""
+    return _listing_extractor.extract(text_content)
+
+def load_history_fragment(html):
+    """Parse an HTML fragment with lxml and return its #history_cnr element"""
+    if not html or not html.strip():
+        return None
+    root = lxml.html.fromstring(html)
+    if root.get('id') == 'history_cnr':
+        return root
+    history_div = root.find('.//div[@id="history_cnr"]')
+    if history_div is None and root.find('.//table') is not None:
+        # Fragment carries only the tables; treat it as the history itself
+        return root
+    return history_div
+
+def element_text(element, strip=False):
+    """Text of an lxml element (same result as BeautifulSoup's get_text)"""
+    if strip:
+        return ''.join(text.strip() for text in element.itertext())
+    return ''.join(element.itertext())
+
+@METRICS.timed("save")
 def save_to_file(data, filename):
     """Save data to file"""
     with open(filename, 'w', encoding='utf-8') as f:
         if filename.endswith('.json'):
-            json.dump(data, f, ensure_ascii=False, indent=4)
+            json.dump(data, f, ensure_ascii=False, indent=4, default=json_default)
         else:
             f.write(str(data))
     print(f"✓ Data saved to {filename}")
 
+def save_case(case_data, output_dir=".", store=None):
+    """Save a fetched case to the result store, or as case_<CNR>_<time>.json; returns where it went"""
+    if store is not None:
+        with METRICS.timer("save"):
+            snapshot_id, is_new = store.put(case_data)
+        status = "new snapshot" if is_new else "unchanged"
+        print(f"✓ Case stored in {store.path} ({status})")
+        return f"{store.path}#{snapshot_id}"
+    cnr = case_data.get('cnr_number', 'case')
+    filename = os.path.join(output_dir, f"case_{cnr}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    save_to_file(case_data, filename)
+    return filename
+
+def create_scraper(engine="browser", headless=False, captcha_prompt=None, base_url=None, pdf_mode="inline",
+                   captcha_broker=None, profile="standard", catalog=None, changes=None, captcha_timeout=None):
+    """Create a scraper for the chosen fetch engine ('browser' or 'http')"""
+    if engine == "http":
+        from ecourts_http import HTTPScraper, BASE_URL
+        return HTTPScraper(base_url=base_url or BASE_URL, captcha_prompt=captcha_prompt, pdf_mode=pdf_mode,
+                           captcha_broker=captcha_broker, catalog=catalog, changes=changes,
+                           captcha_timeout=captcha_timeout)
+    return ECourtsScraper(headless=headless, captcha_prompt=captcha_prompt, pdf_mode=pdf_mode,
+                          captcha_broker=captcha_broker, profile=profile, catalog=catalog, changes=changes,
+                          captcha_timeout=captcha_timeout)
+
+def open_cache(args):
+    """Open the case cache selected on the command line (None with --no-cache)"""
+    if args.no_cache:
+        return None
+    return CaseCache(args.cache_path, ttl=args.cache_ttl * 3600)
+
+def open_store(args):
+    """Open the result store selected with --store (None: one JSON file per case)"""
+    if not args.store:
+        return None
+    from ecourts_store import ResultStore
+    return ResultStore(args.store)
+
+def open_journal(args):
+    """Open the job journal of batch, scheduled and fan-out runs (None with --no-journal)"""
+    if args.no_journal:
+        return None
+    from ecourts_journal import JobJournal
+    return JobJournal(args.journal_path)
+
+def open_changes(args):
+    """Open the change tracker of batch and scheduled runs (None with --save-unchanged)"""
+    if args.save_unchanged:
+        return None
+    from ecourts_changes import ChangeTracker
+    return ChangeTracker()
+
+def open_captcha_broker(args, required=False):
+    """CAPTCHA broker selected on the command line
+    
+    Single searches keep the plain console prompt unless a web queue or a
+    solver was asked for; batch and scheduled runs always share one broker.
+    """
+    if not required and args.captcha_operator == "console" and not args.captcha_solver:
+        return None
+    from ecourts_captcha import create_broker
+    return create_broker(args.captcha_operator, args.captcha_solver or (), args.captcha_port)
+
+def write_metrics(args, show=False):
+    """Print the stage timings and write the files asked for with --metrics / --metrics-textfile"""
+    if show:
+        print("\n" + METRICS.format_summary())
+    if args.metrics:
+        print(f"✓ Metrics saved to {METRICS.write_json(args.metrics)}")
+    if args.metrics_textfile:
+        print(f"✓ Prometheus metrics saved to {METRICS.write_prometheus(args.metrics_textfile)}")
+
+def index_case(case_data, source=None, index_path=DEFAULT_INDEX_PATH):
+    """Add a saved case to the date index"""
+    index = DateIndex(index_path)
+    try:
+        index.add_case(case_data, source)
+    finally:
+        index.close()
+
+def get_check_date(args):
+    """Return the (date, label) selected by --today / --tomorrow"""
+    if args.today:
+        return datetime.now().date(), "today"
+    if args.tomorrow:
+        return (datetime.now() + timedelta(days=1)).date(), "tomorrow"
+    return None, ""
+
 def main():
     parser = argparse.ArgumentParser(
         description="eCourts Scraper - Fetch case details and generate PDFs",
@@ -806,6 +941,61 @@ Examples:
   
   # Download cause list automatically and generate PDF
   python ecourts_scraper.py --causelist --state "Maharashtra" --district "Mumbai" --court "City Civil Court"
+  
+  # Check a whole watchlist against tomorrow's cause list with a single download
+  python ecourts_scraper.py --causelist --tomorrow --state "Maharashtra" --district "Mumbai" --court "City Civil Court" --watchlist cnrs.txt
+  
+  # Check a file of CNRs (one per line) over 4 browser sessions
+  python ecourts_scraper.py --tomorrow --batch cnrs.txt --workers 4
+  
+  # Read the CNRs from stdin instead
+  cat cnrs.txt | python ecourts_scraper.py --today --batch -
+  
+  # Re-fetch even if the case was looked up recently (default cache: 6 hours)
+  python ecourts_scraper.py --tomorrow --refresh MHAU030151912016
+  
+  # Fetch a batch without PDFs, then render them all in parallel afterwards
+  python ecourts_scraper.py --batch cnrs.txt --pdf-later --output-dir results
+  python ecourts_scraper.py --render-pdfs results
+  
+  # Which of our stored cases are listed on a given day (instant, no browser)
+  python ecourts_scraper.py --listed-on 2026-10-18
+  python ecourts_scraper.py --reindex . results --listed-on 2026-10-18
+  
+  # Skip the browser and call the portal's endpoints directly
+  python ecourts_scraper.py --engine http --today MHAU030151912016
+  
+  # Answer the CAPTCHAs of all batch sessions from one browser tab
+  python ecourts_scraper.py --batch cnrs.txt --workers 4 --captcha-operator web
+  
+  # Export per-stage timings for tuning and dashboards
+  python ecourts_scraper.py --batch cnrs.txt --metrics run_metrics.json --metrics-textfile /var/lib/node_exporter/ecourts.prom
+  
+  # Nightly run over a watchlist: 3 sessions, 1 per court, report for tomorrow
+  python ecourts_scraper.py --schedule cnrs.txt --workers 3 --per-court 1
+  
+  # Watch the batch browsers with the full page (no request blocking)
+  python ecourts_scraper.py --batch cnrs.txt --show-browser --profile standard
+  
+  # Keep nightly results as deduplicated snapshots, then export the latest of each case
+  python ecourts_scraper.py --schedule cnrs.txt --store
+  python ecourts_scraper.py --store-export cases.jsonl.gz
+  
+  # Refresh the court codes for one state, then check a name before using it
+  python ecourts_scraper.py --catalog-refresh --state "Maharashtra"
+  python ecourts_scraper.py --catalog-find "city civil"
+  
+  # Every court complex of two districts for the next 5 working days, 4 sessions
+  python ecourts_scraper.py --fanout --state "Maharashtra" --district "Mumbai;Pune" --days 5 --workers 4
+  
+  # After a crash, the same command resumes the batch; --restart starts it over
+  python ecourts_scraper.py --batch cnrs.txt --workers 4 --max-attempts 3
+  
+  # Serve lookups from 3 warm sessions (answer CAPTCHAs at http://127.0.0.1:8090/)
+  python ecourts_scraper.py --serve 8790 --workers 3 --no-pdf --captcha-operator web
+  
+  # Also fetch the case's order and judgment PDFs, 4 at a time
+  python ecourts_scraper.py MHAU030151912016 --orders --workers 4
         """
     )
     
@@ -836,6 +1026,309 @@ Examples:
         "--court",
         help="Court complex name for cause list"
     )
+    parser.add_argument(
+        "--catalog-refresh",
+        action="store_true",
+        help="Read the state, district and court complex codes from the portal into the local catalog "
+             "(only the given --state/--district if set)"
+    )
+    parser.add_argument(
+        "--catalog-find",
+        metavar="TEXT",
+        help="Look up a state, district, court complex or case type name in the local catalog"
+    )
+    parser.add_argument(
+        "--watchlist",
+        metavar="FILE",
+        help="With --causelist: check these CNRs / TYPE/NUMBER/YEAR cases against the cause list"
+    )
+    parser.add_argument(
+        "--listed-on",
+        metavar="DATE",
+        help="List stored cases with a hearing on DATE (YYYY-MM-DD) from the date index"
+    )
+    parser.add_argument(
+        "--reindex",
+        nargs="+",
+        metavar="PATH",
+        help="Rebuild the date index from stored case JSON files or directories"
+    )
+    parser.add_argument(
+        "--engine",
+        choices=["browser", "http"],
+        default="browser",
+        help="Fetch engine: Chrome via Selenium, or direct HTTP requests (default: browser)"
+    )
+    parser.add_argument(
+        "--profile",
+        choices=list(PROFILES),
+        help="Browser profile: 'lean' blocks images, fonts, media and trackers and reuses a disk cache "
+             "(default: lean for --batch and --schedule, standard otherwise)"
+    )
+    headless_group = parser.add_mutually_exclusive_group()
+    headless_group.add_argument(
+        "--headless",
+        action="store_true",
+        default=None,
+        help="Run Chrome without a window (default for --batch and --schedule)"
+    )
+    headless_group.add_argument(
+        "--show-browser",
+        dest="headless",
+        action="store_false",
+        help="Show the Chrome window (default for single searches)"
+    )
+    parser.add_argument(
+        "--base-url",
+        help="Portal base URL for the http engine (e.g. a local stand-in server)"
+    )
+    parser.add_argument(
+        "--captcha-operator",
+        choices=["console", "web"],
+        default="console",
+        help="Where CAPTCHAs are answered: console prompts or a local web queue (default: console)"
+    )
+    parser.add_argument(
+        "--captcha-port",
+        type=int,
+        default=8090,
+        help="Port of the web CAPTCHA queue (default: 8090)"
+    )
+    parser.add_argument(
+        "--captcha-solver",
+        action="append",
+        metavar="SPEC",
+        help="Offline CAPTCHA solver tried before the operator: fixed:TEXT or module:ClassName (repeatable)"
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="Write per-stage timings (p50/p95/p99) and counters as JSON at the end of the run"
+    )
+    parser.add_argument(
+        "--metrics-textfile",
+        metavar="FILE",
+        help="Also write the metrics as a Prometheus textfile (node_exporter textfile collector)"
+    )
+    parser.add_argument(
+        "--max-age",
+        type=float,
+        metavar="HOURS",
+        help="Accept cached case data up to this many hours old for this run"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached case data and fetch fresh results (the cache is still updated)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Neither read nor write the case cache"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=DEFAULT_TTL / 3600,
+        metavar="HOURS",
+        help=f"How long cached case data stays fresh (default: {DEFAULT_TTL // 3600} hours)"
+    )
+    parser.add_argument(
+        "--cache-path",
+        default=DEFAULT_CACHE_PATH,
+        help="SQLite file for the case cache (default: downloads/case_cache.db)"
+    )
+    pdf_group = parser.add_mutually_exclusive_group()
+    pdf_group.add_argument(
+        "--no-pdf",
+        action="store_true",
+        help="Do not create case PDFs"
+    )
+    pdf_group.add_argument(
+        "--pdf-later",
+        action="store_true",
+        help="Save case JSON now and render the PDFs afterwards with --render-pdfs"
+    )
+    parser.add_argument(
+        "--store",
+        nargs="?",
+        const=DEFAULT_STORE_PATH,
+        metavar="FILE",
+        help="Save cases as deduplicated snapshots in a SQLite result store instead of case_*.json files "
+             "(default file: downloads/case_store.db)"
+    )
+    parser.add_argument(
+        "--store-import",
+        nargs="+",
+        metavar="PATH",
+        help="Load stored case_*.json files or directories into the result store, then exit"
+    )
+    parser.add_argument(
+        "--store-export",
+        metavar="FILE",
+        help="Export the latest snapshot of every case as JSON lines (.gz to compress), then exit"
+    )
+    parser.add_argument(
+        "--all-snapshots",
+        action="store_true",
+        help="With --store-export: every stored snapshot, not just the latest per case"
+    )
+    parser.add_argument(
+        "--with-html",
+        action="store_true",
+        help="With --store-export: include raw_html and plain_text"
+    )
+    parser.add_argument(
+        "--store-compact",
+        action="store_true",
+        help="Remove unreferenced HTML blobs and reclaim space in the result store, then exit"
+    )
+    parser.add_argument(
+        "--keep",
+        type=int,
+        metavar="N",
+        help="With --store-compact: keep only the newest N snapshots per case"
+    )
+    parser.add_argument(
+        "--render-pdfs",
+        nargs="+",
+        metavar="PATH",
+        help="Render PDFs in bulk from stored case JSON files or directories, then exit"
+    )
+    parser.add_argument(
+        "--pdf-workers",
+        type=int,
+        help="Processes used to render PDFs in batch and --render-pdfs mode (default: CPU count)"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="FILE",
+        help="File with one CNR per line ('-' reads stdin); runs the batch mode"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="Number of parallel browser sessions for --batch (default: up to 4) and --schedule (default: 2), "
+             "or of order downloads with --orders (default: 4)"
+    )
+    parser.add_argument(
+        "--recycle-after",
+        type=int,
+        default=25,
+        help="Restart each pooled browser session after this many cases (default: 25)"
+    )
+    parser.add_argument(
+        "--memory-limit",
+        type=int,
+        default=1536,
+        metavar="MB",
+        help="Restart a pooled browser session once Chrome and chromedriver use more than this "
+             "(default: 1536; 0 turns the check off)"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="With --batch: write each result out and drop it (per-case summary as JSON lines), "
+             "so memory stays flat on very long batches"
+    )
+    parser.add_argument(
+        "--schedule",
+        metavar="FILE",
+        help="Run a watchlist of CNRs on the asyncio scheduler and write a morning report"
+    )
+    parser.add_argument(
+        "--per-court",
+        type=int,
+        default=1,
+        help="With --schedule: parallel sessions allowed per court establishment (default: 1)"
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=3,
+        help="With --batch, --schedule and --fanout: tries per case or cause list, counted across "
+             "interrupted runs (default: 3)"
+    )
+    parser.add_argument(
+        "--orders",
+        action="store_true",
+        help="Also download the case's order/judgment PDFs to downloads/orders/<CNR>/"
+    )
+    parser.add_argument(
+        "--save-unchanged",
+        action="store_true",
+        help="With --batch and --schedule: render and save every case, even if it has not changed "
+             "since the last run"
+    )
+    parser.add_argument(
+        "--journal-path",
+        default=DEFAULT_JOURNAL_PATH,
+        help=f"Job journal that lets interrupted --batch, --schedule and --fanout runs resume "
+             f"(default: {DEFAULT_JOURNAL_PATH})"
+    )
+    parser.add_argument(
+        "--no-journal",
+        action="store_true",
+        help="Do not record job states (an interrupted run starts over)"
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="Start over even if the journal holds an interrupted run of the same inputs"
+    )
+    parser.add_argument(
+        "--fanout",
+        action="store_true",
+        help="Download the cause lists of every court complex in --state (optionally only the given "
+             "--district/--court names, separated by ';') for --days working days"
+    )
+    parser.add_argument(
+        "--days",
+        type=int,
+        default=1,
+        help="With --fanout: working days (Sundays skipped) from today, or from tomorrow with --tomorrow "
+             "(default: 1)"
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=2,
+        help="With --fanout: parallel sessions allowed on the portal host; with --orders: parallel "
+             "downloads per host (default: 2)"
+    )
+    parser.add_argument(
+        "--serve",
+        nargs="?",
+        type=int,
+        const=8790,
+        metavar="PORT",
+        help="Run as a local JSON API backed by --workers warm sessions (default port: 8790)"
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=100,
+        help="With --serve: requests allowed to wait for a session before new ones get 503 (default: 100)"
+    )
+    parser.add_argument(
+        "--request-timeout",
+        type=float,
+        default=120,
+        metavar="SECONDS",
+        help="With --serve: how long a request waits for its result before it gets 504 (default: 120)"
+    )
+    parser.add_argument(
+        "--captcha-timeout",
+        type=float,
+        metavar="SECONDS",
+        help="With --serve: fail a lookup whose CAPTCHA is not answered in time, freeing its session "
+             "(default: the request timeout)"
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=".",
+        help="Directory for the JSON results written by --batch, --schedule and --fanout (default: current)"
+    )
     parser.add_argument(
         "cnr_number", 
         nargs="?", 
@@ -858,25 +1351,306 @@ Examples:
     print("Note: Make sure you have installed required packages:")
     print("pip install reportlab")
     
+    pdf_mode = "none" if args.no_pdf else ("later" if args.pdf_later else "inline")
+    
+    # Unattended runs default to a lean, headless browser
+    unattended = bool(args.batch or args.schedule or args.fanout or args.serve)
+    profile = args.profile or ("lean" if unattended else "standard")
+    headless = unattended if args.headless is None else args.headless
+    
+    # Date index queries (no browser needed)
+    if args.reindex:
+        from ecourts_pdf import find_case_json_files
+        index = DateIndex()
+        try:
+            indexed = index.rebuild(find_case_json_files(args.reindex))
+        finally:
+            index.close()
+        print(f"✓ Indexed hearing dates of {indexed} stored cases")
+        if not args.listed_on:
+            return
+    
+    if args.listed_on:
+        from ecourts_index import print_listed_on
+        day = parse_portal_date(args.listed_on)
+        if not day:
+            print(f"✗ Could not read date '{args.listed_on}' (use YYYY-MM-DD or DD-MM-YYYY)")
+            return
+        index = DateIndex()
+        try:
+            print_listed_on(index.cases_on(day), day)
+        finally:
+            index.close()
+        return
+    
+    # Result store maintenance
+    if args.store_import or args.store_export or args.store_compact:
+        from ecourts_store import ResultStore, print_store_stats
+        from ecourts_pdf import find_case_json_files
+        store = ResultStore(args.store or DEFAULT_STORE_PATH)
+        try:
+            if args.store_import:
+                read, added = store.import_files(find_case_json_files(args.store_import))
+                print(f"✓ Imported {read} case files ({added} new snapshots)")
+            if args.store_compact:
+                removed = store.compact(keep=args.keep)
+                print(f"✓ Compacted: {removed['snapshots_removed']} snapshots and "
+                      f"{removed['blobs_removed']} HTML blobs removed")
+            if args.store_export:
+                count = store.export(args.store_export, all_snapshots=args.all_snapshots,
+                                     with_html=args.with_html)
+                print(f"✓ Exported {count} snapshots to {args.store_export}")
+            print_store_stats(store.stats(), store.path)
+        finally:
+            store.close()
+        return
+    
+    # Option catalog lookups and refresh
+    if args.catalog_find:
+        catalog = OptionCatalog()
+        print_catalog_matches(catalog.find(args.catalog_find), args.catalog_find)
+        return
+    
+    if args.catalog_refresh:
+        scraper = ECourtsScraper(headless=headless, profile=profile)
+        try:
+            scraper.refresh_catalog(args.state, args.district)
+        finally:
+            scraper.close()
+        return
+    
+    # Bulk PDF rendering from stored JSON
+    if args.render_pdfs:
+        from ecourts_pdf import render_pending_pdfs
+        render_pending_pdfs(args.render_pdfs, workers=args.pdf_workers)
+        return
+    
+    # Batch mode
+    if args.batch:
+        from ecourts_batch import read_cnrs, run_batch
+        
+        check_date, date_label = get_check_date(args)
+        cnrs = read_cnrs(args.batch)
+        if not cnrs:
+            print("✗ No CNR numbers found in batch input")
+            return
+        captcha_broker = open_captcha_broker(args, required=True)
+        store = open_store(args)
+        journal = open_journal(args)
+        changes = open_changes(args)
+        try:
+            run_batch(
+                cnrs,
+                workers=args.workers,
+                recycle_after=args.recycle_after,
+                memory_limit=args.memory_limit,
+                check_date=check_date,
+                date_label=date_label,
+                output_dir=args.output_dir,
+                headless=headless,
+                engine=args.engine,
+                base_url=args.base_url,
+                cache=open_cache(args),
+                max_age=args.max_age * 3600 if args.max_age is not None else None,
+                refresh=args.refresh,
+                pdf_mode=pdf_mode,
+                pdf_workers=args.pdf_workers,
+                captcha_broker=captcha_broker,
+                profile=profile,
+                store=store,
+                stream=args.stream,
+                journal=journal.begin("case", cnrs, args.max_attempts, args.restart) if journal else None,
+                changes=changes
+            )
+        finally:
+            captcha_broker.close()
+            if store is not None:
+                store.close()
+            if journal is not None:
+                journal.close()
+            if changes is not None:
+                changes.close()
+            write_metrics(args, show=True)
+        return
+    
+    # Scheduled watchlist run
+    if args.schedule:
+        from ecourts_batch import read_cnrs
+        from ecourts_scheduler import WatchlistScheduler
+        
+        check_date, _ = get_check_date(args)
+        cnrs = read_cnrs(args.schedule)
+        if not cnrs:
+            print("✗ No CNR numbers found in watchlist")
+            return
+        cache = open_cache(args)
+        captcha_broker = open_captcha_broker(args, required=True)
+        store = open_store(args)
+        journal = open_journal(args)
+        changes = open_changes(args)
+        try:
+            WatchlistScheduler(
+                workers=args.workers or 2,
+                per_court=args.per_court,
+                max_attempts=args.max_attempts,
+                engine=args.engine,
+                base_url=args.base_url,
+                headless=headless,
+                profile=profile,
+                pdf_mode=pdf_mode,
+                cache=cache,
+                max_age=args.max_age * 3600 if args.max_age is not None else None,
+                refresh=args.refresh,
+                output_dir=args.output_dir,
+                captcha_broker=captcha_broker,
+                store=store,
+                journal=journal.begin("schedule", cnrs, args.max_attempts, args.restart) if journal else None,
+                recycle_after=args.recycle_after,
+                memory_limit=args.memory_limit,
+                changes=changes
+            ).run(cnrs, check_date or (datetime.now() + timedelta(days=1)).date())
+        finally:
+            captcha_broker.close()
+            if cache is not None:
+                cache.close()
+            if store is not None:
+                store.close()
+            if journal is not None:
+                journal.close()
+            if changes is not None:
+                changes.close()
+            write_metrics(args, show=True)
+        return
+    
+    # Service mode: warm sessions behind a local JSON API
+    if args.serve:
+        from ecourts_service import ScraperService, serve
+        
+        cache = open_cache(args)
+        captcha_broker = open_captcha_broker(args, required=True)
+        store = open_store(args)
+        try:
+            serve(ScraperService(
+                workers=args.workers or 2,
+                engine=args.engine,
+                base_url=args.base_url,
+                headless=headless,
+                profile=profile,
+                pdf_mode=pdf_mode,
+                captcha_broker=captcha_broker,
+                cache=cache,
+                max_age=args.max_age * 3600 if args.max_age is not None else None,
+                refresh=args.refresh,
+                store=store,
+                queue_size=args.queue_size,
+                request_timeout=args.request_timeout,
+                captcha_timeout=args.captcha_timeout,
+                recycle_after=args.recycle_after,
+                memory_limit=args.memory_limit
+            ), port=args.serve)
+        finally:
+            captcha_broker.close()
+            if cache is not None:
+                cache.close()
+            if store is not None:
+                store.close()
+            write_metrics(args, show=True)
+        return
+    
+    # Cause list fan-out over court complexes and dates
+    if args.fanout:
+        from ecourts_fanout import CauseListFanout, split_names
+        
+        if not args.state:
+            print("✗ --fanout needs --state (and optionally --district / --court)")
+            return
+        check_date, _ = get_check_date(args)
+        captcha_broker = open_captcha_broker(args, required=True)
+        journal = open_journal(args)
+        try:
+            CauseListFanout(
+                workers=args.workers or 2,
+                per_host=args.per_host,
+                max_attempts=args.max_attempts,
+                engine=args.engine,
+                base_url=args.base_url,
+                headless=headless,
+                profile=profile,
+                pdf_mode=pdf_mode,
+                journal=journal,
+                restart=args.restart,
+                refresh=args.refresh,
+                captcha_broker=captcha_broker,
+                recycle_after=args.recycle_after,
+                memory_limit=args.memory_limit
+            ).run(
+                split_names(args.state),
+                split_names(args.district),
+                split_names(args.court),
+                start=check_date,
+                days=args.days,
+                report_dir=args.output_dir
+            )
+        finally:
+            captcha_broker.close()
+            if journal is not None:
+                journal.close()
+            write_metrics(args, show=True)
+        return
+    
     # Cause list mode
     if args.causelist:
+        from ecourts_batch import read_cnrs
+        from ecourts_causelist import print_watchlist_report
+        
+        check_date, date_label = get_check_date(args)
+        list_date = (check_date or datetime.now().date()).strftime("%d-%m-%Y")
+        date_label = date_label or "today"
+        watchlist = read_cnrs(args.watchlist) if args.watchlist else None
+        automated = args.state and args.district and args.court
+        
+        # One download per court per day: reuse an already parsed cause list
+        if watchlist and automated and not args.refresh:
+            rows_path = cause_list_path(args.state, args.district, args.court, list_date)
+            if os.path.exists(rows_path):
+                print(f"✓ Using cause list downloaded earlier: {rows_path}")
+                results = CauseListIndex.load(rows_path).check_watchlist(watchlist)
+                print_watchlist_report(results, date_label)
+                save_to_file(results, "watchlist_result.json")
+                return
+        
         scraper = ECourtsScraper()
         try:
-            if args.state and args.district and args.court:
-                result = scraper.download_cause_list(args.state, args.district, args.court)
+            if automated:
+                result = scraper.download_cause_list(args.state, args.district, args.court, list_date)
             else:
                 result = scraper.download_cause_list()
             
             if result:
                 save_to_file(result, "cause_list_result.json")
+            
+            if watchlist and result and result.get("rows_path"):
+                results = CauseListIndex.load(result["rows_path"]).check_watchlist(watchlist)
+                print_watchlist_report(results, date_label)
+                save_to_file(results, "watchlist_result.json")
+            elif watchlist:
+                print("✗ Watchlist check needs an automated cause list (--state, --district, --court)")
         finally:
             print("\nPress Enter to close browser...")
             input()
             scraper.close()
+            write_metrics(args)
         return
     
-    # Case search mode
-    scraper = ECourtsScraper()
+    # Case search mode (the scraper is only started on a cache miss)
+    captcha_broker = open_captcha_broker(args)
+    fetcher = CachedFetcher(
+        lambda: create_scraper(args.engine, headless=headless, base_url=args.base_url, pdf_mode=pdf_mode,
+                               captcha_broker=captcha_broker, profile=profile),
+        cache=open_cache(args),
+        max_age=args.max_age * 3600 if args.max_age is not None else None,
+        refresh=args.refresh
+    )
     try:
         case_data = None
         
@@ -884,10 +1658,10 @@ Examples:
         if args.cnr_number and len(args.cnr_number) == 16 and not args.number:
             # Full CNR provided
             cnr_full = args.cnr_number
-            case_data = scraper.fetch_case_by_cnr(cnr_full)
+            case_data = fetcher.fetch_case_by_cnr(cnr_full)
         elif args.cnr_number and args.number and args.year:
             # Separate components provided
-            case_data = scraper.fetch_case_by_details(args.cnr_number, args.number, args.year)
+            case_data = fetcher.fetch_case_by_details(args.cnr_number, args.number, args.year)
         else:
             print("Error: Please provide either:")
             print("  1. Full 16-digit CNR: MHAU030151912016")
@@ -895,6 +1669,10 @@ Examples:
             parser.print_help()
             return
         
+        scraper = fetcher.scraper
+        if scraper and scraper.waits:
+            print(scraper.waits.format_summary())
+        
         # Process results
         if case_data:
             print("\n" + "="*50)
@@ -906,18 +1684,11 @@ Examples:
                 print(f"{key}: {value}")
             
             # Determine check date
-            check_date = None
-            date_label = ""
-            if args.today:
-                check_date = datetime.now().date()
-                date_label = "today"
-            elif args.tomorrow:
-                check_date = (datetime.now() + timedelta(days=1)).date()
-                date_label = "tomorrow"
+            check_date, date_label = get_check_date(args)
             
             # Check if listed on specific date
             if check_date:
-                is_listed = scraper.check_case_listing(case_data, check_date)
+                is_listed = ECourtsScraper.check_case_listing(case_data, check_date)
                 
                 print("\n" + "="*50)
                 print(f"LISTING CHECK FOR {date_label.upper()} ({check_date})")
@@ -942,21 +1713,43 @@ Examples:
             if pdf_created:
                 pdf_path = case_data.get("pdf_path", "")
                 print(f"✓ PDF Created: {pdf_path}")
+            elif case_data.get("pdf_pending"):
+                print("PDF deferred: run with --render-pdfs to create it")
+            elif pdf_mode == "none":
+                print("PDF skipped (--no-pdf)")
             else:
                 print("✗ PDF creation failed")
             
+            # Order and judgment PDFs, through the same portal session
+            if args.orders:
+                # A cached case opened no session; the HTTP engine gets the portal cookies without a browser
+                session = fetcher.session(lambda: create_scraper("http", base_url=args.base_url, pdf_mode="none",
+                                                                 captcha_broker=captcha_broker))
+                downloader = OrderDownloader.from_scraper(session, workers=args.workers or 4, per_host=args.per_host)
+                try:
+                    print_order_results(downloader.download_case(case_data))
+                finally:
+                    downloader.close()
+            
             # Save results
-            cnr = case_data.get('cnr_number', 'case')
-            filename = f"case_{cnr}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            save_to_file(case_data, filename)
+            store = open_store(args)
+            try:
+                index_case(case_data, save_case(case_data, store=store))
+            finally:
+                if store is not None:
+                    store.close()
             
         else:
             print("✗ Failed to fetch case details")
     
     finally:
-        print("\nPress Enter to close browser...")
-        input()
-        scraper.close()
+        if fetcher.scraper and fetcher.scraper.driver:
+            print("\nPress Enter to close browser...")
+            input()
+        fetcher.close()
+        if captcha_broker is not None:
+            captcha_broker.close()
+        write_metrics(args)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,425 @@
+"""Long-running service: a pool of warm scraper sessions behind a local JSON API
+
+Each worker thread starts its session when the service starts (and again
+right after the supervisor recycles it), then takes API requests from a
+bounded queue, so a lookup costs only the portal round trip. Fresh cases
+are answered from the case cache without queueing. Every request has a
+timeout; one that is still waiting in the queue when it expires is
+dropped before a session picks it up.
+
+Endpoints (all answer JSON):
+    GET  /case/<CNR>[?date=YYYY-MM-DD]              case details (and listing check)
+    GET  /case?type=RCS&number=1519&year=2016       lookup by type/number/year
+    GET  /listing/<CNR>?date=YYYY-MM-DD             is the case listed on that day
+    POST /cause-list  {"state", "district", "court_complex", "date"}
+    GET  /health                                    session pool status
+    GET  /queue                                     queue depth and request counters
+Lookups take ?refresh=1 to skip the cache and ?timeout=SECONDS.
+"""
+import json
+import queue
+import signal
+import threading
+import time
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from datetime import date, datetime
+from functools import partial
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from ecourts_scraper import ECourtsScraper, create_scraper, save_case
+from ecourts_cache import details_key
+from ecourts_index import parse_portal_date
+from ecourts_record import CaseRecord, json_default
+from ecourts_metrics import METRICS
+from ecourts_supervisor import SupervisedScraper, DEFAULT_RECYCLE_AFTER, DEFAULT_MEMORY_LIMIT
+
+DEFAULT_SERVICE_PORT = 8790
+DEFAULT_QUEUE_SIZE = 100
+DEFAULT_REQUEST_TIMEOUT = 120   # seconds an API call waits for its result
+
+
+class ServiceBusy(Exception):
+    """The request queue is full"""
+
+
+class ServiceRequest:
+    """One queued API call and the future its caller waits on"""
+
+    def __init__(self, kind, args):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.args = args
+        self.future = Future()
+        self.queued_at = time.time()
+
+
+class ScraperService:
+    """Warm session pool fed by a bounded request queue"""
+
+    def __init__(self, workers=2, engine="browser", base_url=None, headless=True, profile="lean",
+                 pdf_mode="none", captcha_broker=None, cache=None, max_age=None, refresh=False, store=None,
+                 queue_size=DEFAULT_QUEUE_SIZE, request_timeout=DEFAULT_REQUEST_TIMEOUT, captcha_timeout=None,
+                 recycle_after=DEFAULT_RECYCLE_AFTER, memory_limit=DEFAULT_MEMORY_LIMIT):
+        self.workers = max(1, workers)
+        self.engine = engine
+        self.base_url = base_url
+        self.headless = headless
+        self.profile = profile
+        self.pdf_mode = pdf_mode
+        self.captcha_broker = captcha_broker
+        self.cache = cache
+        self.max_age = max_age
+        # Always ask the portal (answers still go into the cache)
+        self.refresh = refresh
+        # Deduplicated snapshots of every fetched case (see ecourts_store)
+        self.store = store
+        self.queue_size = queue_size
+        self.request_timeout = request_timeout
+        # A CAPTCHA nobody answers fails its lookup instead of holding the session forever
+        self.captcha_timeout = captcha_timeout or request_timeout
+        self.recycle_after = recycle_after
+        self.memory_limit = memory_limit
+
+        self.requests = queue.Queue(maxsize=queue_size)
+        self.started_at = None
+        self._threads = []
+        self._ready = set()
+        # Each worker's SupervisedScraper, to see which sessions wait on a CAPTCHA
+        self._sessions = {}
+        self._busy = 0
+        self._counters = {"completed": 0, "failed": 0, "timeouts": 0, "rejected": 0, "cache_hits": 0}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+
+    # -- session pool -------------------------------------------------------
+
+    def start(self):
+        """Start the worker threads; each one opens its session straight away"""
+        self.started_at = time.time()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, args=(index,), name=f"ecourts-service-{index}",
+                                      daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _warm(self, index, scraper):
+        """Make sure the worker's session is running (again, after a recycle); False when stopping"""
+        if self._stop.is_set():
+            return False
+        if scraper.scraper is not None:
+            return True
+        with self._lock:
+            self._ready.discard(index)
+        while not self._stop.is_set():
+            try:
+                with METRICS.timer("driver_startup"):
+                    scraper.session()
+                with self._lock:
+                    self._ready.add(index)
+                return True
+            except Exception as e:
+                print(f"✗ Session {index} failed to start: {str(e)}")
+                METRICS.count("worker_errors")
+                self._stop.wait(5)
+        return False
+
+    def _worker(self, index):
+        """Keep a warm session and serve queued requests with it"""
+        # Restarted by count, memory use or WebDriver failure (ecourts_supervisor)
+        scraper = SupervisedScraper(
+            partial(create_scraper, self.engine, headless=self.headless, captcha_broker=self.captcha_broker,
+                    base_url=self.base_url, pdf_mode=self.pdf_mode, profile=self.profile,
+                    captcha_timeout=self.captcha_timeout),
+            recycle_after=self.recycle_after, memory_limit=self.memory_limit, label=f" {index}"
+        )
+        with self._lock:
+            self._sessions[index] = scraper
+        while self._warm(index, scraper):
+            try:
+                request = self.requests.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if request is None:
+                break
+            # False when the caller already gave up on it
+            if not request.future.set_running_or_notify_cancel():
+                continue
+            METRICS.observe("queue_wait", time.time() - request.queued_at)
+            with self._lock:
+                self._busy += 1
+            try:
+                request.future.set_result(self._handle(scraper, request))
+            except Exception as e:
+                request.future.set_exception(e)
+                METRICS.count("worker_errors")
+                # Start over with a fresh session
+                scraper.recycle("session_error")
+            finally:
+                with self._lock:
+                    self._busy -= 1
+        scraper.close()
+        with self._lock:
+            self._ready.discard(index)
+            self._sessions.pop(index, None)
+
+    def _handle(self, scraper, request):
+        """Run one request on a session (worker thread)"""
+        args = request.args
+        if request.kind == "cause_list":
+            with METRICS.timer("cause_list"):
+                return scraper.download_cause_list(args["state"], args["district"], args["court_complex"],
+                                                   args.get("date"))
+        with METRICS.timer("lookup"):
+            if request.kind == "cnr":
+                case_data = scraper.fetch_case_by_cnr(args["cnr"])
+            else:
+                case_data = scraper.fetch_case_by_details(args["case_type"], args["case_number"], args["case_year"])
+        if case_data:
+            if self.cache is not None:
+                self.cache.put(request.args["key"], case_data)
+            if self.store is not None:
+                save_case(case_data, store=self.store)
+        return case_data
+
+    # -- request side -------------------------------------------------------
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def submit(self, kind, timeout=None, **args):
+        """Queue a request and wait for its result
+
+        Raises ServiceBusy when the queue is full and TimeoutError when no
+        result came within the timeout.
+        """
+        request = ServiceRequest(kind, args)
+        try:
+            self.requests.put_nowait(request)
+        except queue.Full:
+            self._count("rejected")
+            raise ServiceBusy(f"request queue is full ({self.queue_size} waiting)")
+        try:
+            result = request.future.result(timeout or self.request_timeout)
+        except FutureTimeout:
+            # Dropped if still queued; a request already running finishes unseen
+            request.future.cancel()
+            self._count("timeouts")
+            raise TimeoutError(f"no result within {timeout or self.request_timeout:g}s (request {request.id})")
+        except Exception:
+            self._count("failed")
+            raise
+        self._count("completed")
+        return result
+
+    def lookup(self, kind, refresh=False, timeout=None, **args):
+        """Case data for a CNR or type/number/year lookup, from the cache when fresh"""
+        key = args["cnr"] if kind == "cnr" else details_key(args["case_type"], args["case_number"],
+                                                             args["case_year"])
+        if self.cache is not None and not (refresh or self.refresh):
+            case_data = self.cache.get(key, self.max_age)
+            if case_data:
+                self._count("cache_hits")
+                return case_data
+        return self.submit(kind, timeout, key=key, **args)
+
+    def waiting_on_captcha(self):
+        """Workers whose session is blocked on an unanswered CAPTCHA"""
+        with self._lock:
+            sessions = dict(self._sessions)
+        return {index for index, supervisor in sessions.items()
+                if getattr(supervisor.scraper, "captcha_waiting_since", None) is not None}
+
+    def health(self):
+        waiting = self.waiting_on_captcha()
+        with self._lock:
+            ready = len(self._ready - waiting)
+        if ready:
+            status = "ok"
+        elif self._stop.is_set():
+            status = "stopped"
+        else:
+            status = "waiting_captcha" if waiting else "starting"
+        return {
+            "status": status,
+            "engine": self.engine,
+            "workers": self.workers,
+            "ready": ready,
+            "waiting_captcha": len(waiting),
+            "uptime_seconds": round(time.time() - self.started_at, 1) if self.started_at else 0,
+        }
+
+    def queue_status(self):
+        with self._lock:
+            status = dict(self._counters, busy=self._busy)
+        status.update(depth=self.requests.qsize(), capacity=self.queue_size)
+        if self.captcha_broker is not None:
+            status["captchas_waiting"] = len(self.captcha_broker.pending())
+        return status
+
+    def stop(self):
+        """Stop taking requests and close every session"""
+        self._stop.set()
+        # Fail whatever is still queued
+        while True:
+            try:
+                request = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None and request.future.set_running_or_notify_cancel():
+                request.future.set_exception(RuntimeError("service stopped"))
+        # Wake every worker so it closes its session
+        for _ in self._threads:
+            try:
+                self.requests.put_nowait(None)
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(timeout=30)
+        self._threads = []
+
+
+def case_response(case_data, check_date=None):
+    """JSON body for a case: the parsed fields (no HTML) and an optional listing check"""
+    if isinstance(case_data, CaseRecord):
+        body = case_data.to_dict(with_html=False)
+    else:
+        body = {k: v for k, v in case_data.items() if k not in ("raw_html", "plain_text")}
+    if check_date:
+        body["check_date"] = str(check_date)
+        body["listed"] = ECourtsScraper.check_case_listing(case_data, check_date)
+    return body
+
+
+def make_handler(service):
+    """Request handler class bound to a service"""
+
+    class Handler(BaseHTTPRequestHandler):
+        server_version = "eCourtsService/1.0"
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False, default=json_default).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _run(self, call):
+            """Answer with call()'s (status, payload), mapping service errors to HTTP codes"""
+            try:
+                status, payload = call()
+            except ServiceBusy as e:
+                status, payload = 503, {"error": str(e)}
+            except TimeoutError as e:
+                status, payload = 504, {"error": str(e)}
+            except ValueError as e:
+                status, payload = 400, {"error": str(e)}
+            except Exception as e:
+                status, payload = 500, {"error": str(e)}
+            self._send(status, payload)
+
+        def do_GET(self):
+            parts = urlsplit(self.path)
+            params = {k: v[0] for k, v in parse_qs(parts.query).items()}
+            path = parts.path.rstrip("/")
+            if path == "/health":
+                self._send(200, service.health())
+            elif path == "/queue":
+                self._send(200, service.queue_status())
+            elif path == "/case":
+                self._run(lambda: self._case("details", params, case_type=params.get("type"),
+                                             case_number=params.get("number"), case_year=params.get("year")))
+            elif path.startswith("/case/"):
+                self._run(lambda: self._case("cnr", params, cnr=path[len("/case/"):].upper()))
+            elif path.startswith("/listing/"):
+                if "date" not in params:
+                    self._send(400, {"error": "date is required (YYYY-MM-DD or DD-MM-YYYY)"})
+                else:
+                    self._run(lambda: self._case("cnr", params, listing_only=True,
+                                                 cnr=path[len("/listing/"):].upper()))
+            else:
+                self._send(404, {"error": "unknown endpoint"})
+
+        def do_POST(self):
+            path = urlsplit(self.path).path.rstrip("/")
+            if path != "/cause-list":
+                self._send(404, {"error": "unknown endpoint"})
+                return
+            self._run(self._cause_list)
+
+        def _case(self, kind, params, listing_only=False, **args):
+            if not all(args.values()):
+                raise ValueError("give a 16-character CNR, or type, number and year")
+            check_date = None
+            if params.get("date"):
+                check_date = parse_portal_date(params["date"])
+                if not check_date:
+                    raise ValueError(f"could not read date '{params['date']}'")
+            timeout = float(params["timeout"]) if params.get("timeout") else None
+            case_data = service.lookup(kind, refresh=params.get("refresh") in ("1", "true"), timeout=timeout,
+                                       **args)
+            if not case_data:
+                return 404, {"error": "no case details found", **args}
+            if listing_only:
+                listing_info = case_data.get("listing_info", {})
+                return 200, {
+                    "cnr_number": case_data.get("cnr_number"),
+                    "check_date": str(check_date),
+                    "listed": ECourtsScraper.check_case_listing(case_data, check_date),
+                    "next_hearing_date": listing_info.get("next_hearing_date"),
+                    "serial_number": listing_info.get("serial_number"),
+                    "court": listing_info.get("court"),
+                }
+            return 200, case_response(case_data, check_date)
+
+        def _cause_list(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                raise ValueError("body must be JSON")
+            names = {key: body.get(key) for key in ("state", "district", "court_complex")}
+            if not all(names.values()):
+                raise ValueError("state, district and court_complex are required")
+            list_date = body.get("date") or date.today().strftime("%d-%m-%Y")
+            day = parse_portal_date(list_date)
+            if not day:
+                raise ValueError(f"could not read date '{list_date}'")
+            result = service.submit("cause_list", body.get("timeout"), date=day.strftime("%d-%m-%Y"), **names)
+            if not result:
+                return 502, {"error": "cause list download failed"}
+            return (200 if result.get("status") == "success" else 502), result
+
+    return Handler
+
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def serve(service, port=DEFAULT_SERVICE_PORT, host="127.0.0.1"):
+    """Run the API until interrupted (Ctrl+C or SIGTERM)"""
+    # A service manager stops us with SIGTERM; shut down as cleanly as on Ctrl+C
+    signal.signal(signal.SIGTERM, _interrupt)
+    server = ThreadingHTTPServer((host, port), make_handler(service))
+    server.daemon_threads = True
+    service.start()
+    print("\n" + "="*60)
+    print(f"SERVICE MODE - http://{host}:{server.server_address[1]}/ ({service.workers} warm sessions)")
+    print("="*60)
+    print("Endpoints: /case/<CNR>, /case?type=&number=&year=, /listing/<CNR>?date=, "
+          "POST /cause-list, /health, /queue")
+    print(f"Started {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}; press Ctrl+C to stop")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping service...")
+    finally:
+        server.server_close()
+        service.stop()
@@ -0,0 +1,237 @@
+"""Local stand-in for services.ecourts.gov.in that serves recorded portal responses
+
+Fixture layout (default: ./fixtures):
+    cnr/<CNR>.html                      #history_cnr fragment for a CNR search
+    case/<TYPE>_<NUMBER>_<YEAR>.html    #history_cnr fragment for a case search
+    cause_list/<STATE>-<DISTRICT>-<COMPLEX>-<DD-MM-YYYY>.html
+                                        cause list page for one court complex and day
+    orders/...                          order PDFs, named as in the displayPdf links
+                                        (served with Range support for resume tests)
+
+Usage:
+    python ecourts_standin.py --port 8000
+    python ecourts_scraper.py --engine http --base-url http://127.0.0.1:8000/ MHAU030151912016
+"""
+import argparse
+import base64
+import json
+import os
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+DEFAULT_CAPTCHA_ANSWER = "ABCDE"
+
+# Route of the cause list form post, relative to the base URL
+CAUSE_LIST_ROUTE = "cause_list/submitCauseList"
+# Route the displayPdf() links of the order table post to
+DISPLAY_PDF_ROUTE = "home/display_pdf"
+RANGE_RE = re.compile(r'bytes=(\d+)-')
+
+# 1x1 PNG served as the CAPTCHA image
+CAPTCHA_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
+
+FORM_PAGE = """<!DOCTYPE html>
+<html><head><title>eCourts Services (stand-in)</title></head>
+<body>
+<form id="cnr_form">
+<input type="hidden" id="app_token" name="app_token" value="{token}">
+<input type="text" id="cino" name="cino">
+<select id="case_type" name="case_type">
+<option value="">Select Case Type</option>
+<option value="1">RCS - Regular Civil Suit</option>
+<option value="2">RCA - Regular Civil Appeal</option>
+<option value="3">SCC - Summary Criminal Case</option>
+</select>
+<input type="text" id="case_no" name="case_no">
+<input type="text" id="rgyear" name="rgyear">
+<img id="captcha_image" src="vendor/securimage/securimage_show.php">
+<input type="text" id="fcaptcha_code" name="fcaptcha_code">
+<button id="searchbtn" type="button">Search</button>
+</form>
+<div id="history_cnr"></div>
+</body></html>
+"""
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    """Answers the handful of endpoints the scrapers use"""
+
+    server_version = "eCourtsStandin/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send(self, status, body, content_type):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload):
+        payload["app_token"] = self.server.new_token()
+        self._send(200, json.dumps(payload), "application/json")
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if parts.path.endswith("securimage_show.php"):
+            self._send(200, CAPTCHA_PNG, "image/png")
+        elif parts.path in ("", "/") and not parts.query:
+            self._send(200, FORM_PAGE.format(token=self.server.new_token()), "text/html; charset=utf-8")
+        elif parts.path.startswith("/orders/"):
+            self._send_document(parts.path.lstrip("/"))
+        else:
+            self._send(404, "Not found", "text/plain")
+
+    def _send_document(self, relative_path):
+        """Serve an order PDF, honouring 'Range: bytes=N-' like the portal's web server"""
+        data = self.server.load_document(relative_path)
+        if data is None:
+            self._send(404, "Not found", "text/plain")
+            return
+        match = RANGE_RE.match(self.headers.get("Range", ""))
+        start = int(match.group(1)) if match else 0
+        if start >= len(data) and match:
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{len(data)}")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = data[start:]
+        self.send_response(206 if match else 200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Accept-Ranges", "bytes")
+        if match:
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode("utf-8")).items()}
+        query = parse_qs(urlsplit(self.path).query)
+        route = query.get("p", [""])[0].strip("/")
+
+        if route == DISPLAY_PDF_ROUTE:
+            # Answers with where the PDF is, like the portal; no CAPTCHA on this call
+            relative_path = query.get("filename", [""])[0].lstrip("/")
+            if self.server.load_document(relative_path) is None:
+                self._send_json({"status": 0, "errormsg": "Order not found"})
+            else:
+                self._send_json({"status": 1, "order": relative_path})
+            return
+        if route == "cnr_status/searchByCNR":
+            fixture = os.path.join("cnr", f"{form.get('cino', '').upper()}.html")
+        elif route == "casestatus/submit_case_no":
+            fixture = os.path.join(
+                "case", f"{form.get('case_type', '')}_{form.get('case_no', '')}_{form.get('rgyear', '')}.html"
+            )
+        elif route == CAUSE_LIST_ROUTE:
+            fixture = os.path.join("cause_list", cause_list_fixture_name(
+                form.get("state_code", ""), form.get("dist_code", ""),
+                form.get("court_complex_code", ""), form.get("causelist_date", "")
+            ))
+        else:
+            self._send(404, "Not found", "text/plain")
+            return
+
+        if form.get("fcaptcha_code", "") != self.server.captcha_answer:
+            self._send_json({"status": 0, "errormsg": "Invalid Captcha"})
+            return
+
+        html = self.server.load_fixture(fixture)
+        if html is None:
+            self._send_json({"status": 0, "errormsg": "This Case Code does not exists"})
+            return
+        self._send_json({"status": 1, "casetype_list": html})
+
+
+def cause_list_fixture_name(state, district, court_complex, date):
+    """Fixture file for a cause list, e.g. MH-Aurangabad-District-Court-18-10-2026.html"""
+    parts = (state, district, court_complex, date)
+    return "-".join(re.sub(r'[^A-Za-z0-9]+', '-', part).strip('-') for part in parts) + ".html"
+
+
+class StandinServer(ThreadingHTTPServer):
+    """Threaded HTTP server holding the fixture directory and CAPTCHA answer"""
+
+    daemon_threads = True
+
+    def __init__(self, address, fixtures_dir=DEFAULT_FIXTURES_DIR,
+                 captcha_answer=DEFAULT_CAPTCHA_ANSWER, verbose=False):
+        super().__init__(address, StandinHandler)
+        self.fixtures_dir = fixtures_dir
+        self.captcha_answer = captcha_answer
+        self.verbose = verbose
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def new_token(self):
+        return uuid.uuid4().hex
+
+    def load_fixture(self, relative_path):
+        """Read (and memoize) a recorded response, or None if missing"""
+        with self._lock:
+            if relative_path not in self._cache:
+                path = os.path.join(self.fixtures_dir, relative_path)
+                if not os.path.isfile(path):
+                    return None
+                with open(path, encoding="utf-8") as f:
+                    self._cache[relative_path] = f.read()
+            return self._cache[relative_path]
+
+    def load_document(self, relative_path):
+        """Bytes of a binary fixture (e.g. an order PDF), or None if missing or outside the fixtures"""
+        root = os.path.abspath(self.fixtures_dir)
+        path = os.path.abspath(os.path.join(root, relative_path))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            return None
+        with open(path, "rb") as f:
+            return f.read()
+
+
+def start_standin_server(fixtures_dir=DEFAULT_FIXTURES_DIR, port=0,
+                         captcha_answer=DEFAULT_CAPTCHA_ANSWER, host="127.0.0.1"):
+    """Start a stand-in server on a background thread and return it"""
+    server = StandinServer((host, port), fixtures_dir, captcha_answer)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the eCourts portal")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000)")
+    parser.add_argument("--fixtures", default=DEFAULT_FIXTURES_DIR, help="Recorded responses directory")
+    parser.add_argument("--captcha", default=DEFAULT_CAPTCHA_ANSWER, help="CAPTCHA answer the server accepts")
+    args = parser.parse_args()
+
+    server = StandinServer((args.host, args.port), args.fixtures, args.captcha, verbose=True)
+    print(f"✓ Stand-in portal serving {args.fixtures} at {server.base_url}")
+    print(f"CAPTCHA answer: {args.captcha}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
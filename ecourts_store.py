@@ -0,0 +1,283 @@
+"""Deduplicated case result store: one row per distinct snapshot, raw HTML content-addressed
+
+Every fetch of a case used to become a pretty-printed case_<CNR>_<time>.json
+carrying its full raw_html and plain_text. Here a snapshot is stored once:
+fetching an unchanged case only bumps its last_seen time and fetch count,
+and the #history_cnr HTML is kept zlib-compressed under its SHA-256 so
+identical histories share one blob. plain_text is not stored at all; it is
+rebuilt from the HTML when a snapshot is loaded with its HTML.
+"""
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from ecourts_record import CaseRecord, json_default
+
+DEFAULT_STORE_PATH = os.path.join("downloads", "case_store.db")
+
+# Fields that change on every fetch without the case changing
+VOLATILE_FIELDS = ("search_date", "cached_at", "pdf_created", "pdf_path", "pdf_pending")
+# Fields kept out of the snapshot record (the HTML goes to the blob table)
+BULKY_FIELDS = ("raw_html", "plain_text")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    cnr_number TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    html_hash TEXT,
+    record BLOB NOT NULL,
+    fetched_at REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    seen_count INTEGER NOT NULL DEFAULT 1,
+    UNIQUE (cnr_number, content_hash)
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_cnr_fetched ON snapshots (cnr_number, fetched_at);
+CREATE INDEX IF NOT EXISTS idx_snapshots_fetched ON snapshots (fetched_at);
+"""
+
+
+def _digest(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def _pack(text):
+    return zlib.compress(text.encode("utf-8"), 6)
+
+
+def _unpack(data):
+    return zlib.decompress(data).decode("utf-8")
+
+
+def content_hash(case_data):
+    """Hash of everything that identifies a snapshot (parsed fields and the HTML)"""
+    stable = {k: case_data[k] for k in case_data.keys() if k not in VOLATILE_FIELDS and k not in BULKY_FIELDS}
+    if case_data.get("raw_html"):
+        stable["raw_html"] = _digest(case_data["raw_html"].encode("utf-8"))
+    return _digest(json.dumps(stable, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+
+
+def _open_export(filepath):
+    if filepath.endswith(".gz"):
+        return gzip.open(filepath, "wt", encoding="utf-8")
+    return open(filepath, "w", encoding="utf-8")
+
+
+class ResultStore:
+    """SQLite store of case snapshots, deduplicated per CNR, with compressed HTML blobs"""
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def _put_blob(self, text):
+        """Store text under its hash (once) and return the hash"""
+        data = text.encode("utf-8")
+        digest = _digest(data)
+        self.conn.execute(
+            "INSERT OR IGNORE INTO blobs (hash, size, data) VALUES (?, ?, ?)",
+            (digest, len(data), zlib.compress(data, 6))
+        )
+        return digest
+
+    def put(self, case_data, fetched_at=None, commit=True):
+        """Record one fetch of a case; returns (snapshot id, True if the snapshot is new)"""
+        cnr = case_data.get("cnr_number")
+        if not cnr:
+            raise ValueError("case data has no cnr_number")
+        fetched_at = fetched_at or time.time()
+        digest = content_hash(case_data)
+        record = {k: case_data[k] for k in case_data.keys() if k not in BULKY_FIELDS}
+        packed = _pack(json.dumps(record, ensure_ascii=False, separators=(",", ":")))
+
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT id FROM snapshots WHERE cnr_number = ? AND content_hash = ?", (cnr, digest)
+            ).fetchone()
+            if row:
+                # Same snapshot again: keep the newest volatile fields (e.g. pdf_path)
+                self.conn.execute(
+                    "UPDATE snapshots SET record = ?, last_seen = MAX(last_seen, ?), seen_count = seen_count + 1 "
+                    "WHERE id = ?",
+                    (packed, fetched_at, row[0])
+                )
+                snapshot_id, is_new = row[0], False
+            else:
+                html_hash = self._put_blob(case_data["raw_html"]) if case_data.get("raw_html") else None
+                cursor = self.conn.execute(
+                    "INSERT INTO snapshots (cnr_number, content_hash, html_hash, record, fetched_at, last_seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (cnr, digest, html_hash, packed, fetched_at, fetched_at)
+                )
+                snapshot_id, is_new = cursor.lastrowid, True
+            if commit:
+                self.conn.commit()
+        return snapshot_id, is_new
+
+    def commit(self):
+        with self._lock:
+            self.conn.commit()
+
+    def _load(self, row, with_html=False):
+        """Case data from a (record, html_hash, fetched_at, last_seen, seen_count) row"""
+        record, html_hash, fetched_at, last_seen, seen_count = row
+        case_data = CaseRecord.from_dict(json.loads(_unpack(record)))
+        case_data["fetched_at"] = fetched_at
+        case_data["last_seen"] = last_seen
+        case_data["seen_count"] = seen_count
+        if with_html and html_hash:
+            # plain_text comes back with it, derived from the HTML
+            case_data["raw_html"] = self.html(html_hash)
+        return case_data
+
+    def html(self, html_hash):
+        """Raw #history_cnr HTML stored under a hash"""
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM blobs WHERE hash = ?", (html_hash,)).fetchone()
+        return _unpack(row[0]) if row else None
+
+    def latest(self, cnr, with_html=False):
+        """Most recently seen snapshot of a case (None if never stored)"""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT record, html_hash, fetched_at, last_seen, seen_count FROM snapshots "
+                "WHERE cnr_number = ? ORDER BY last_seen DESC, id DESC LIMIT 1", (cnr,)
+            ).fetchone()
+        return self._load(row, with_html) if row else None
+
+    def history(self, cnr):
+        """Every stored snapshot of a case, oldest first, without the HTML"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT record, html_hash, fetched_at, last_seen, seen_count FROM snapshots "
+                "WHERE cnr_number = ? ORDER BY fetched_at, id", (cnr,)
+            ).fetchall()
+        return [self._load(row) for row in rows]
+
+    def iter_snapshots(self, all_snapshots=False, since=None, with_html=False):
+        """Yield stored case data: the latest snapshot per CNR, or every snapshot"""
+        query = "SELECT record, html_hash, fetched_at, last_seen, seen_count FROM snapshots s"
+        conditions, params = [], []
+        if not all_snapshots:
+            conditions.append(
+                "id = (SELECT id FROM snapshots WHERE cnr_number = s.cnr_number "
+                "ORDER BY last_seen DESC, id DESC LIMIT 1)"
+            )
+        if since is not None:
+            conditions.append("last_seen >= ?")
+            params.append(since)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY cnr_number, fetched_at"
+        with self._lock:
+            cursor = self.conn.execute(query, params)
+        # Page through the result so a bulk export never holds every snapshot
+        while True:
+            with self._lock:
+                rows = cursor.fetchmany(500)
+            if not rows:
+                break
+            for row in rows:
+                yield self._load(row, with_html)
+
+    def export(self, filepath, all_snapshots=False, since=None, with_html=False):
+        """Write snapshots as JSON lines (gzip-compressed for a .gz path); returns the count"""
+        directory = os.path.dirname(filepath)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        count = 0
+        with _open_export(filepath) as f:
+            for case_data in self.iter_snapshots(all_snapshots, since, with_html):
+                f.write(json.dumps(case_data, ensure_ascii=False, default=json_default) + "\n")
+                count += 1
+        return count
+
+    def import_files(self, json_paths):
+        """Load case_*.json files saved by earlier runs; returns (files read, new snapshots)"""
+        read = added = 0
+        for json_path in json_paths:
+            try:
+                with open(json_path, encoding="utf-8") as f:
+                    case_data = json.load(f)
+                fetched_at = os.path.getmtime(json_path)
+            except (OSError, ValueError) as e:
+                print(f"Skipping {json_path}: {str(e)}")
+                continue
+            if not isinstance(case_data, dict) or not case_data.get("cnr_number"):
+                continue
+            read += 1
+            if self.put(case_data, fetched_at, commit=False)[1]:
+                added += 1
+        self.commit()
+        return read, added
+
+    def compact(self, keep=None):
+        """Drop snapshots beyond the newest `keep` per CNR and unreferenced blobs, then VACUUM"""
+        with self._lock:
+            removed = 0
+            if keep:
+                removed = self.conn.execute(
+                    "DELETE FROM snapshots WHERE id IN ("
+                    "SELECT id FROM (SELECT id, ROW_NUMBER() OVER ("
+                    "PARTITION BY cnr_number ORDER BY last_seen DESC, id DESC) AS n FROM snapshots) "
+                    "WHERE n > ?)", (keep,)
+                ).rowcount
+            blobs = self.conn.execute(
+                "DELETE FROM blobs WHERE hash NOT IN "
+                "(SELECT html_hash FROM snapshots WHERE html_hash IS NOT NULL)"
+            ).rowcount
+            self.conn.commit()
+            self.conn.execute("VACUUM")
+        return {"snapshots_removed": removed, "blobs_removed": blobs}
+
+    def stats(self):
+        """Counts and sizes of what is stored"""
+        with self._lock:
+            cases, snapshots, fetches = self.conn.execute(
+                "SELECT COUNT(DISTINCT cnr_number), COUNT(*), COALESCE(SUM(seen_count), 0) FROM snapshots"
+            ).fetchone()
+            blobs, html_bytes, stored_bytes = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(LENGTH(data)), 0) FROM blobs"
+            ).fetchone()
+        return {
+            "cases": cases,
+            "snapshots": snapshots,
+            "fetches": fetches,
+            "html_blobs": blobs,
+            "html_bytes": html_bytes,
+            "html_stored_bytes": stored_bytes,
+            "file_bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+        }
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+def print_store_stats(stats, path):
+    """Print the summary of a result store"""
+    print("\n" + "="*50)
+    print(f"RESULT STORE - {path}")
+    print("="*50)
+    print(f"Cases: {stats['cases']}")
+    print(f"Snapshots: {stats['snapshots']} (from {stats['fetches']} fetches)")
+    print(f"HTML blobs: {stats['html_blobs']} "
+          f"({stats['html_bytes'] / 1024:.0f} KB, {stats['html_stored_bytes'] / 1024:.0f} KB compressed)")
+    print(f"File size: {stats['file_bytes'] / 1024:.0f} KB")
@@ -0,0 +1,224 @@
+"""Supervised scraper sessions: recycling and a memory watchdog for long runs
+
+A Chrome session reused for hundreds of searches keeps growing, and a
+crashed renderer only shows up as an exception that the fetch methods
+print before returning None, after which the dead driver would be used
+again. SupervisedScraper wraps the session of one worker and replaces it:
+
+    - after `recycle_after` cases,
+    - when Chrome and chromedriver together use more than `memory_limit` MB
+      (the RSS of the whole chromedriver process tree),
+    - when a fetch failed because the WebDriver session itself broke.
+
+A fetch cut off by a broken session is run again on the fresh one, so the
+caller only sees the result. Sessions without a browser (the HTTP engine)
+are only recycled by count.
+"""
+import os
+import time
+
+from ecourts_metrics import METRICS
+
+DEFAULT_RECYCLE_AFTER = 25
+DEFAULT_MEMORY_LIMIT = 1536     # MB for chromedriver, Chrome and its renderers
+DEFAULT_SESSION_RETRIES = 2     # fresh sessions tried for one fetch
+
+# WebDriver errors that mean the session is gone, not that the page misbehaved
+DEAD_SESSION_MARKERS = (
+    "invalid session id", "no such session", "session deleted", "tab crashed",
+    "chrome not reachable", "disconnected", "target window already closed",
+    "no such window", "session not created", "connection refused", "max retries exceeded",
+)
+
+
+def is_session_error(error):
+    """True when an exception from a fetch means the browser session died"""
+    if error is None:
+        return False
+    if isinstance(error, (ConnectionError, BrokenPipeError)):
+        return True
+    if type(error).__name__ in ("InvalidSessionIdException", "NoSuchWindowException"):
+        return True
+    message = str(error).lower()
+    return any(marker in message for marker in DEAD_SESSION_MARKERS)
+
+
+def _children_map():
+    """{parent pid: [child pids]} from /proc"""
+    children = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", encoding="utf-8") as f:
+                # The command name may contain spaces; fields after it are fixed
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    return children
+
+
+def _rss_bytes(pid):
+    try:
+        with open(f"/proc/{pid}/statm", encoding="utf-8") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def process_tree_rss(root_pid):
+    """Resident memory in bytes of a process and all its descendants (None when unknown)"""
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            root = psutil.Process(root_pid)
+            processes = [root] + root.children(recursive=True)
+        except psutil.Error:
+            return None
+        total = 0
+        for process in processes:
+            try:
+                total += process.memory_info().rss
+            except psutil.Error:
+                pass
+        return total
+
+    if not os.path.isdir("/proc"):
+        return None
+    children = _children_map()
+    total, todo = 0, [root_pid]
+    while todo:
+        pid = todo.pop()
+        total += _rss_bytes(pid)
+        todo.extend(children.get(pid, ()))
+    return total
+
+
+def driver_pid(scraper):
+    """Process id of the session's chromedriver, or None for browserless sessions"""
+    driver = getattr(scraper, "driver", None)
+    process = getattr(getattr(driver, "service", None), "process", None)
+    return getattr(process, "pid", None)
+
+
+def session_alive(scraper):
+    """Ask the browser for a trivial answer; False when the session no longer responds"""
+    driver = getattr(scraper, "driver", None)
+    if driver is None:
+        return True
+    try:
+        driver.execute_script("return 1")
+        return True
+    except Exception:
+        return False
+
+
+class SupervisedScraper:
+    """One worker's scraper session, replaced by count, memory use or WebDriver failure
+
+    factory() creates a new session; it is called lazily, so a supervisor
+    costs nothing until its first fetch.
+    """
+
+    def __init__(self, factory, recycle_after=DEFAULT_RECYCLE_AFTER, memory_limit=DEFAULT_MEMORY_LIMIT,
+                 session_retries=DEFAULT_SESSION_RETRIES, label=""):
+        self.factory = factory
+        self.recycle_after = recycle_after or None
+        self.memory_limit = memory_limit * 1024 * 1024 if memory_limit else None
+        self.session_retries = session_retries
+        self.label = label
+        self.scraper = None
+        # Cases handled by the current session, and sessions started so far
+        self.cases = 0
+        self.sessions = 0
+        self.recycles = {"count": 0, "memory": 0, "session_error": 0}
+        self.peak_rss = 0
+
+    def session(self):
+        """The current session, started on first use"""
+        if self.scraper is None:
+            self.scraper = self.factory()
+            self.sessions += 1
+            self.cases = 0
+        return self.scraper
+
+    def memory_use(self):
+        """RSS in bytes of the session's chromedriver process tree (None when unknown)"""
+        pid = driver_pid(self.scraper) if self.scraper is not None else None
+        if pid is None:
+            return None
+        rss = process_tree_rss(pid)
+        if rss:
+            self.peak_rss = max(self.peak_rss, rss)
+        return rss
+
+    def recycle(self, reason):
+        """Close the current session; the next fetch starts a fresh one"""
+        if self.scraper is None:
+            return
+        self.recycles[reason] += 1
+        METRICS.count(f"session_recycles_{reason}")
+        started = time.time()
+        self.scraper.close()
+        self.scraper = None
+        METRICS.observe("session_recycle", time.time() - started)
+
+    def _after_case(self):
+        """Recycle once the session has done its share or grown too large"""
+        self.cases += 1
+        if self.recycle_after and self.cases >= self.recycle_after:
+            self.recycle("count")
+            return
+        if self.memory_limit:
+            rss = self.memory_use()
+            if rss and rss > self.memory_limit:
+                print(f"⟳ Session{self.label} uses {rss / 1024 / 1024:.0f} MB "
+                      f"(limit {self.memory_limit // 1024 // 1024} MB), restarting it")
+                self.recycle("memory")
+
+    def _call(self, method, description, *args):
+        """Run a scraper method, on fresh sessions again while the session is what failed"""
+        result = None
+        for attempt in range(self.session_retries + 1):
+            scraper = self.session()
+            scraper.last_error = None
+            try:
+                result = getattr(scraper, method)(*args)
+                error = getattr(scraper, "last_error", None)
+            except Exception as e:
+                result, error = None, e
+            failed = not result or (isinstance(result, dict) and result.get("status") == "error")
+            if not failed or not (is_session_error(error) or not session_alive(scraper)):
+                self._after_case()
+                return result
+            print(f"⟳ Session{self.label} broke during {description} ({str(error or 'not responding')[:80]})")
+            self.recycle("session_error")
+            if attempt < self.session_retries:
+                print(f"  Retrying {description} on a fresh session")
+                METRICS.count("session_retries")
+        return result
+
+    def fetch_case_by_cnr(self, cnr_full):
+        return self._call("fetch_case_by_cnr", cnr_full, cnr_full)
+
+    def fetch_case_by_details(self, case_type, case_number, case_year):
+        return self._call("fetch_case_by_details", f"{case_type}/{case_number}/{case_year}",
+                          case_type, case_number, case_year)
+
+    def download_cause_list(self, state=None, district=None, court_complex=None, date=None):
+        return self._call("download_cause_list", f"the {court_complex} cause list",
+                          state, district, court_complex, date)
+
+    def format_summary(self):
+        peak = f", peak {self.peak_rss / 1024 / 1024:.0f} MB" if self.peak_rss else ""
+        return (f"{self.sessions} sessions; recycled {self.recycles['count']} by count, "
+                f"{self.recycles['memory']} by memory, {self.recycles['session_error']} after errors{peak}")
+
+    def close(self):
+        if self.scraper is not None:
+            self.scraper.close()
+            self.scraper = None
@@ -0,0 +1,195 @@
+"""Event-driven waits for the eCourts portal, replacing fixed time.sleep calls"""
+import time
+
+from ecourts_metrics import METRICS
+
+# Default timeout (seconds) for each named step
+STEP_TIMEOUTS = {
+    "page_ready": 20,
+    "captcha_loaded": 10,
+    "dropdown_populated": 15,
+    "submission_settled": 20,
+    "results_loaded": 20,
+    "dom_quiet": 15,
+}
+
+# Containers that may hold the case history after a search
+RESULT_SELECTORS = "#history_cnr, .case-details, .result-container, .table-responsive"
+
+ERROR_SELECTORS = ".alert-danger, .alert-danger-cust, .error"
+
+CAPTCHA_SELECTORS = "#captcha_image, img[src*='securimage']"
+
+PAGE_READY_JS = "return document.readyState === 'complete';"
+
+CAPTCHA_LOADED_JS = """
+var img = document.querySelector(arguments[0]);
+return !!(img && img.complete && img.naturalWidth > 0);
+"""
+
+DROPDOWN_POPULATED_JS = """
+var select = document.getElementById(arguments[0]);
+return !!(select && !select.disabled && select.options.length >= arguments[1]);
+"""
+
+SUBMISSION_SETTLED_JS = """
+var alerts = document.querySelectorAll(arguments[0]);
+for (var i = 0; i < alerts.length; i++) {
+    if (alerts[i].offsetParent !== null && alerts[i].textContent.trim()) {
+        return 'error';
+    }
+}
+var results = document.querySelectorAll(arguments[1]);
+for (var j = 0; j < results.length; j++) {
+    if (results[j].innerHTML.trim().length > arguments[2]) {
+        return 'results';
+    }
+}
+return null;
+"""
+
+# Resolves as soon as a result container is filled, using a MutationObserver
+RESULTS_LOADED_JS = """
+var selectors = arguments[0], minLength = arguments[1];
+var done = arguments[arguments.length - 1];
+function filled() {
+    var nodes = document.querySelectorAll(selectors);
+    for (var i = 0; i < nodes.length; i++) {
+        if (nodes[i].innerHTML.trim().length > minLength) {
+            return true;
+        }
+    }
+    return false;
+}
+if (filled()) {
+    done(true);
+    return;
+}
+var observer = new MutationObserver(function () {
+    if (filled()) {
+        observer.disconnect();
+        done(true);
+    }
+});
+observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+"""
+
+# Resolves once the DOM has stopped changing for quietMs milliseconds
+DOM_QUIET_JS = """
+var quietMs = arguments[0];
+var done = arguments[arguments.length - 1];
+var timer = setTimeout(finish, quietMs);
+var observer = new MutationObserver(function () {
+    clearTimeout(timer);
+    timer = setTimeout(finish, quietMs);
+});
+function finish() {
+    observer.disconnect();
+    done(true);
+}
+observer.observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+"""
+
+
+class WaitEngine:
+    """Named wait steps driven by DOM conditions, with per-step timing"""
+
+    def __init__(self, driver, timeouts=None, poll_frequency=0.1):
+        self.driver = driver
+        self.timeouts = dict(STEP_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.poll_frequency = poll_frequency
+        self.timings = []
+
+    def _record(self, step, started, ok):
+        """Remember how long a step actually waited"""
+        seconds = time.time() - started
+        self.timings.append({
+            "step": step,
+            "seconds": round(seconds, 3),
+            "ok": ok,
+        })
+        METRICS.observe(f"wait_{step}", seconds)
+        if not ok:
+            METRICS.count("wait_timeouts")
+        return ok
+
+    def _poll(self, step, script, *args, timeout=None):
+        """Poll a JS condition until it returns a truthy value"""
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+        from selenium.webdriver.support.ui import WebDriverWait
+        started = time.time()
+        timeout = timeout or self.timeouts[step]
+        try:
+            value = WebDriverWait(
+                self.driver, timeout, poll_frequency=self.poll_frequency
+            ).until(lambda d: d.execute_script(script, *args))
+            self._record(step, started, True)
+            return value
+        except (TimeoutException, WebDriverException):
+            self._record(step, started, False)
+            return None
+
+    def _observe(self, step, script, *args, timeout=None):
+        """Run an async JS observer that calls back when its condition holds"""
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+        started = time.time()
+        timeout = timeout or self.timeouts[step]
+        try:
+            self.driver.set_script_timeout(timeout)
+            ok = bool(self.driver.execute_async_script(script, *args))
+        except (TimeoutException, WebDriverException):
+            ok = False
+        return self._record(step, started, ok)
+
+    def page_ready(self, timeout=None):
+        """Wait until document.readyState is 'complete'"""
+        return bool(self._poll("page_ready", PAGE_READY_JS, timeout=timeout))
+
+    def captcha_loaded(self, selector=CAPTCHA_SELECTORS, timeout=None):
+        """Wait until the CAPTCHA image has finished downloading"""
+        return bool(self._poll("captcha_loaded", CAPTCHA_LOADED_JS, selector, timeout=timeout))
+
+    def dropdown_populated(self, select_id, min_options=2, timeout=None):
+        """Wait until an AJAX-filled <select> has real options"""
+        return bool(self._poll(
+            "dropdown_populated", DROPDOWN_POPULATED_JS, select_id, min_options, timeout=timeout
+        ))
+
+    def submission_settled(self, min_length=50, timeout=None):
+        """Wait for a form submission to show either an error alert or results
+
+        Returns 'error', 'results' or None on timeout.
+        """
+        return self._poll(
+            "submission_settled", SUBMISSION_SETTLED_JS,
+            ERROR_SELECTORS, RESULT_SELECTORS, min_length, timeout=timeout
+        )
+
+    def results_loaded(self, selectors=RESULT_SELECTORS, min_length=50, timeout=None):
+        """Wait until a result container such as #history_cnr is filled"""
+        return self._observe("results_loaded", RESULTS_LOADED_JS, selectors, min_length, timeout=timeout)
+
+    def dom_quiet(self, quiet_ms=500, timeout=None):
+        """Wait until the page stops mutating (used after AJAX form posts)"""
+        return self._observe("dom_quiet", DOM_QUIET_JS, quiet_ms, timeout=timeout)
+
+    def summary(self):
+        """Total seconds waited per step"""
+        totals = {}
+        for timing in self.timings:
+            totals[timing["step"]] = round(totals.get(timing["step"], 0) + timing["seconds"], 3)
+        return totals
+
+    def format_summary(self):
+        """One-line description of where the waiting time went"""
+        totals = self.summary()
+        if not totals:
+            return "Wait time: none"
+        parts = [f"{step} {seconds:.2f}s" for step, seconds in totals.items()]
+        return f"Wait time: {sum(totals.values()):.2f}s ({', '.join(parts)})"
+
+    def reset(self):
+        """Forget recorded timings"""
+        self.timings = []